@@ -0,0 +1,213 @@
+import io
+import os
+import copy
+import json
+import time
+import queue
+import threading
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import recursive_getattr, save_to_zip_file
+
+from politica_numpy import datos_actor
+
+# ==========================================
+# ALMACÉN DE CHECKPOINTS (guardado en segundo plano + retención)
+# ==========================================
+# Cada checkpoint tiene dos ficheros con el nombre de siempre (prefijo_<pasos>_steps):
+#   .npz -> solo el actor (politica_numpy.py, ~30 KB): basta para evaluar y barrer checkpoints
+#   .zip -> estado completo de PPO (optimizador incluido, ~200 KB): solo de los últimos conservar_completos,
+#           que son los únicos desde los que tiene sentido seguir entrenando (--continuar)
+# Del resto solo quedan los conservar_ultimos más recientes y los conservar_mejores por puntuación.
+# prefijo_indice.json lista lo que hay en disco. "Más recientes" es por orden de escritura, no por pasos:
+# un entrenamiento nuevo empieza otra vez en 0 pasos y sus checkpoints también son los últimos.
+#
+# En el hilo de entrenamiento solo se copian pesos y estado; serializar, escribir en disco, borrar y
+# actualizar el índice lo hace un hilo aparte, así que PPO no espera ni al zip ni al disco.
+
+# Lo que guarda model.save(), en dos tiempos. instantanea_completa() copia en el hilo de entrenamiento los
+# atributos y los state_dict (tensores clonados: PPO los sigue modificando); zip_completo() hace lo caro,
+# pickle + torch.save + zip, en el hilo de escritura.
+def instantanea_completa(model):
+    datos = model.__dict__.copy()
+    excluir = set(model._excluded_save_params())
+    nombres_state_dicts, nombres_variables = model._get_torch_save_params()
+    for nombre in nombres_state_dicts + nombres_variables:
+        excluir.add(nombre.split(".")[0])
+    for nombre in excluir:
+        datos.pop(nombre, None)
+    variables = {nombre: recursive_getattr(model, nombre) for nombre in nombres_variables}
+    return copy.deepcopy((datos, model.get_parameters(), variables))
+
+def zip_completo(instantanea):
+    datos, parametros, variables = instantanea
+    contenido = io.BytesIO()
+    save_to_zip_file(contenido, data=datos, params=parametros, pytorch_variables=variables)
+    return contenido.getvalue()
+
+class AlmacenCheckpoints:
+    # continuar: seguir con el índice que ya hubiera (al continuar un entrenamiento). Si no, el almacén
+    # empieza vacío y los ficheros de entrenamientos anteriores no se tocan
+    def __init__(self, directorio, prefijo="ppo_3sat_larga_duracion", conservar_ultimos=5, conservar_mejores=3,
+                 conservar_completos=2, continuar=False):
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.conservar_ultimos = conservar_ultimos
+        self.conservar_mejores = conservar_mejores
+        self.conservar_completos = conservar_completos
+        os.makedirs(directorio, exist_ok=True)
+
+        self.ruta_indice = os.path.join(directorio, f"{prefijo}_indice.json")
+        self.entradas = []
+        if continuar and os.path.exists(self.ruta_indice):
+            with open(self.ruta_indice) as f:
+                self.entradas = json.load(f)["checkpoints"]
+        # Índices antiguos sin "orden": el de los pasos
+        for orden, entrada in enumerate(sorted(self.entradas, key=lambda e: e.get("orden", e["pasos"]))):
+            entrada["orden"] = orden
+        self._orden = len(self.entradas)
+
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self._hilo.start()
+
+    # --- API (hilo de entrenamiento) ---
+    def guardar(self, model, pasos):
+        actor = datos_actor(model) # Arrays ya copiados
+        # El checkpoint nuevo es el más reciente: lleva estado completo si se conserva alguno
+        completo = instantanea_completa(model) if self.conservar_completos > 0 else None
+        self._cola.put((self._escribir, (int(pasos), actor, completo)))
+
+    # Puntuación de evaluación (más alta = mejor) del checkpoint de esos pasos, para conservar los mejores
+    def puntuar(self, pasos, puntuacion):
+        self._cola.put((self._puntuar, (int(pasos), float(puntuacion))))
+
+    def esperar(self):
+        self._cola.join()
+
+    def cerrar(self):
+        self._cola.put(None)
+        self._hilo.join()
+
+    def mejor(self):
+        puntuadas = [e for e in self.entradas if e["puntuacion"] is not None]
+        return max(puntuadas, key=lambda e: e["puntuacion"]) if puntuadas else None
+
+    def ruta(self, fichero):
+        return os.path.join(self.directorio, fichero)
+
+    # --- HILO DE ESCRITURA ---
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                self._cola.task_done()
+                break
+            funcion, argumentos = tarea
+            try:
+                funcion(*argumentos)
+            except Exception as e:
+                # Un fallo de disco no debe tirar el entrenamiento: se avisa y se sigue
+                print(f"⚠️ Error en el almacén de checkpoints: {e}")
+            finally:
+                self._cola.task_done()
+
+    def _escribir_fichero(self, fichero, contenido):
+        temporal = self.ruta(fichero + ".tmp")
+        with open(temporal, "wb") as f:
+            f.write(contenido)
+        os.replace(temporal, self.ruta(fichero))
+
+    def _escribir(self, pasos, actor, completo):
+        nombre = f"{self.prefijo}_{pasos}_steps"
+        contenido = io.BytesIO()
+        np.savez(contenido, **actor)
+        self._escribir_fichero(nombre + ".npz", contenido.getvalue())
+        if completo is not None:
+            self._escribir_fichero(nombre + ".zip", zip_completo(completo))
+
+        self.entradas = [e for e in self.entradas if e["pasos"] != pasos]
+        self.entradas.append({
+            "pasos": pasos,
+            "orden": self._orden,
+            "politica": nombre + ".npz",
+            "completo": nombre + ".zip" if completo is not None else None,
+            "puntuacion": None,
+            "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        self._orden += 1
+        self._aplicar_retencion()
+        self._escribir_indice()
+
+    def _puntuar(self, pasos, puntuacion):
+        for entrada in self.entradas:
+            if entrada["pasos"] == pasos:
+                entrada["puntuacion"] = puntuacion
+        self._aplicar_retencion()
+        self._escribir_indice()
+
+    def _borrar(self, fichero):
+        if fichero and os.path.exists(self.ruta(fichero)):
+            os.remove(self.ruta(fichero))
+
+    def _aplicar_retencion(self):
+        ordenadas = sorted(self.entradas, key=lambda e: e["orden"])
+        ultimas = {e["pasos"] for e in ordenadas[max(0, len(ordenadas) - self.conservar_ultimos):]}
+        completas = {e["pasos"] for e in ordenadas[max(0, len(ordenadas) - self.conservar_completos):]}
+        puntuadas = sorted((e for e in ordenadas if e["puntuacion"] is not None), key=lambda e: -e["puntuacion"])
+        mejores = {e["pasos"] for e in puntuadas[:self.conservar_mejores]}
+
+        conservadas = []
+        for entrada in ordenadas:
+            if entrada["completo"] and entrada["pasos"] not in completas:
+                self._borrar(entrada["completo"])
+                entrada["completo"] = None
+            if entrada["pasos"] in ultimas or entrada["pasos"] in mejores:
+                conservadas.append(entrada)
+            else:
+                self._borrar(entrada["politica"])
+                self._borrar(entrada["completo"])
+        self.entradas = conservadas
+
+    def _escribir_indice(self):
+        for entrada in self.entradas:
+            entrada["bytes"] = sum(os.path.getsize(self.ruta(entrada[clave]))
+                                   for clave in ("politica", "completo") if entrada[clave])
+        indice = {
+            "prefijo": self.prefijo,
+            "conservar_ultimos": self.conservar_ultimos,
+            "conservar_mejores": self.conservar_mejores,
+            "conservar_completos": self.conservar_completos,
+            "bytes": sum(e["bytes"] for e in self.entradas),
+            "checkpoints": self.entradas,
+        }
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w") as f:
+            json.dump(indice, f, indent=2)
+        os.replace(temporal, self.ruta_indice)
+
+
+# ==========================================
+# CALLBACK: sustituto de CheckpointCallback
+# ==========================================
+# Cuenta pasos de entorno (num_timesteps), no llamadas: la frecuencia no depende del número de entornos
+class CallbackCheckpoints(BaseCallback):
+    def __init__(self, almacen, pasos_entre_checkpoints, verbose=0):
+        super().__init__(verbose)
+        self.almacen = almacen
+        self.pasos_entre_checkpoints = pasos_entre_checkpoints
+        self._guardados = 0
+
+    def _on_training_start(self):
+        self._guardados = self.num_timesteps // self.pasos_entre_checkpoints
+
+    def _on_step(self):
+        if self.num_timesteps // self.pasos_entre_checkpoints > self._guardados:
+            self._guardados = self.num_timesteps // self.pasos_entre_checkpoints
+            self.almacen.guardar(self.model, self.num_timesteps)
+            if self.verbose:
+                print(f"💾 Checkpoint en {self.num_timesteps} pasos (escribiéndose en segundo plano)")
+        return True
+
+    def _on_training_end(self):
+        self.almacen.esperar()
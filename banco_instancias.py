@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+
+from clausulas import FAMILIAS, LITERALES_POR_CLAUSULA, arrays_a_clausulas, generar_familia
+
+# ==========================================
+# BANCO DE INSTANCIAS EN DISCO
+# ==========================================
+# Un banco es una carpeta con:
+#   literales.npy -> [M, A, 3] enteros de ancho fijo, estilo DIMACS:
+#                    +(var + 1) si el agente quiere aprobar la ley, -(var + 1) si quiere rechazarla
+#   meta.json     -> num_instancias, num_agentes, num_variables, semilla, familia, dtype...
+# literales.npy se abre como memmap: leer la instancia i no carga el resto del fichero.
+
+VERSION_BANCO = 1
+
+def _dtype_literales(num_variables):
+    if num_variables < np.iinfo(np.int8).max:
+        return np.int8
+    if num_variables < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+def codificar_literales(variables, signos, dtype=np.int32):
+    literales = variables.astype(np.int32) + 1
+    return np.where(signos == 1, literales, -literales).astype(dtype)
+
+def decodificar_literales(literales):
+    literales = np.asarray(literales, dtype=np.int64)
+    return np.abs(literales) - 1, (literales > 0).astype(np.int8)
+
+# --- ESCRITURA: millones de instancias por trozos, sin tenerlas todas en memoria ---
+def escribir_banco(ruta, num_instancias, num_agentes, num_variables, semilla=0, tamano_trozo=100_000,
+                   familia="aleatoria", ratio_conflicto=0.4):
+    os.makedirs(ruta, exist_ok=True)
+    dtype = _dtype_literales(num_variables)
+    literales = np.lib.format.open_memmap(os.path.join(ruta, "literales.npy"), mode="w+", dtype=dtype,
+                                          shape=(num_instancias, num_agentes, LITERALES_POR_CLAUSULA))
+
+    rng = np.random.default_rng(semilla)
+    for inicio in range(0, num_instancias, tamano_trozo):
+        n = min(tamano_trozo, num_instancias - inicio)
+        variables, signos = generar_familia(rng, familia, n, num_agentes, num_variables,
+                                            ratio_conflicto=ratio_conflicto)
+        literales[inicio:inicio + n] = codificar_literales(variables, signos, dtype)
+    literales.flush()
+    del literales
+
+    meta = {
+        "version": VERSION_BANCO,
+        "num_instancias": num_instancias,
+        "num_agentes": num_agentes,
+        "num_variables": num_variables,
+        "literales_por_clausula": LITERALES_POR_CLAUSULA,
+        "semilla": semilla,
+        "familia": familia,
+        "ratio_conflicto": ratio_conflicto,
+        "dtype": np.dtype(dtype).name,
+    }
+    with open(os.path.join(ruta, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return BancoInstancias(ruta)
+
+# --- LECTURA ---
+class BancoInstancias:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(os.path.join(ruta, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.num_agentes = self.meta["num_agentes"]
+        self.num_variables = self.meta["num_variables"]
+        self.literales = np.load(os.path.join(ruta, "literales.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.literales)
+
+    # banco[i] -> (variables [A, 3], signos [A, 3]), formato de clausulas.py
+    def __getitem__(self, indice):
+        return decodificar_literales(self.literales[indice])
+
+    # Varias instancias de golpe (índices arbitrarios) -> arrays [n, A, 3]
+    def lote(self, indices):
+        return decodificar_literales(self.literales[np.asarray(indices)])
+
+    # Formato de problema_inyectado (dict de tuplas) para los entornos PettingZoo
+    def clausulas(self, indice):
+        return arrays_a_clausulas(*self[indice])
+
+    # Huella del contenido (para claves de caché), leyendo el fichero por trozos
+    def huella(self, tamano_trozo=1 << 20):
+        sha = hashlib.sha256()
+        with open(os.path.join(self.ruta, "literales.npy"), "rb") as f:
+            for trozo in iter(lambda: f.read(tamano_trozo), b""):
+                sha.update(trozo)
+        return sha.hexdigest()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un banco de instancias MAX-3SAT en disco")
+    parser.add_argument("ruta")
+    parser.add_argument("--instancias", type=int, default=1_000_000)
+    parser.add_argument("--agentes", type=int, default=40)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--familia", default="aleatoria", choices=FAMILIAS,
+                        help="utopia: hay una ley que satisface a todos; conflicto: una parte de los agentes la rechaza")
+    parser.add_argument("--ratio-conflicto", type=float, default=0.4)
+    args = parser.parse_args()
+
+    banco = escribir_banco(args.ruta, args.instancias, args.agentes, args.variables, args.semilla,
+                           familia=args.familia, ratio_conflicto=args.ratio_conflicto)
+    print(f"✅ Banco guardado en {args.ruta}: {len(banco)} instancias de {banco.num_agentes} agentes")
@@ -0,0 +1,235 @@
+import os
+import re
+import csv
+import glob
+import json
+import zipfile
+import hashlib
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+from clausulas import generar_instancias
+from banco_instancias import BancoInstancias
+from entorno_vectorizado import VARIANTES, VERSION_MOTOR, tamano_observacion
+from evaluacion_masiva import jugar_banco
+from nucleo_votacion import limitar_hilos
+from politica_numpy import PoliticaNumpy
+from oraculo_maxsat import optimos_maxsat, ratio_aproximacion
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Se incrementa cuando cambian las métricas guardadas en la caché
+VERSION_BARRIDO = 2
+
+# ==========================================
+# 1. CHECKPOINTS Y HUELLAS
+# ==========================================
+# Zips de SB3 y actores .npz de almacen_checkpoints.py; si hay ambos para los mismos pasos, basta el .npz
+def encontrar_checkpoints(directorio, patron="ppo_3sat_larga_duracion_*_steps.*"):
+    checkpoints = {}
+    for ruta in sorted(glob.glob(os.path.join(directorio, patron))):
+        encontrado = re.search(r"_(\d+)_steps\.(zip|npz)$", ruta)
+        if encontrado:
+            pasos = int(encontrado.group(1))
+            if encontrado.group(2) == "npz" or pasos not in checkpoints:
+                checkpoints[pasos] = ruta
+    return sorted(checkpoints.items())
+
+def hash_fichero(ruta, tamano_trozo=1 << 20):
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(tamano_trozo), b""):
+            sha.update(trozo)
+    return sha.hexdigest()
+
+def hash_banco(variables, signos):
+    sha = hashlib.sha256()
+    sha.update(str(variables.shape).encode())
+    sha.update(np.ascontiguousarray(variables, dtype=np.int64).tobytes())
+    sha.update(np.ascontiguousarray(signos, dtype=np.int8).tobytes())
+    return sha.hexdigest()
+
+# Lee el tamaño de observación del zip sin cargar torch (metadatos "data" de SB3) o del .npz del actor
+def tamano_observacion_checkpoint(ruta):
+    if ruta.endswith(".npz"):
+        with np.load(ruta) as datos:
+            return int(datos["tamano_obs"])
+    with zipfile.ZipFile(ruta) as z:
+        datos = json.loads(z.read("data"))
+    return datos["observation_space"]["_shape"][0]
+
+# "box" o "multidiscreta", como VARIANTES[...]["accion"]: del espacio de acciones del zip o del .npz del actor
+def tipo_accion_checkpoint(ruta):
+    if ruta.endswith(".npz"):
+        with np.load(ruta) as datos:
+            return str(datos["tipo_accion"])
+    with zipfile.ZipFile(ruta) as z:
+        datos = json.loads(z.read("data"))
+    return "multidiscreta" if "MultiDiscrete" in datos["action_space"][":type:"] else "box"
+
+# Cada run de modelos/ se entrenó con un entorno distinto: se reconoce por el tamaño de observación y el
+# tipo de acción. Con algunos números de agentes dos variantes coinciden en ambos (p. ej. v3 y v5 con 14
+# agentes): entonces no se adivina y hay que indicarla (ruta@variante en liga.py, --variante aquí).
+def detectar_variante(ruta, num_agentes, num_variables):
+    tamano = tamano_observacion_checkpoint(ruta)
+    accion = tipo_accion_checkpoint(ruta)
+    candidatas = [variante for variante, config in VARIANTES.items()
+                  if tamano_observacion(variante, num_agentes, num_variables) == tamano and config["accion"] == accion]
+    if len(candidatas) > 1:
+        print(f"⚠️ {os.path.basename(ruta)}: puede ser {', '.join(candidatas)}; indica la variante (ruta@variante o --variante)")
+        return None
+    return candidatas[0] if candidatas else None
+
+
+# ==========================================
+# 2. BANCO FIJO DE PROBLEMAS
+# ==========================================
+def generar_banco(num_partidas, num_agentes, num_variables, semilla=0):
+    return generar_instancias(np.random.default_rng(semilla), num_partidas, num_agentes, num_variables)
+
+# Banco en disco (banco_instancias.py): las primeras num_partidas instancias, iguales en cualquier máquina
+def cargar_banco(ruta, num_partidas):
+    banco = BancoInstancias(ruta)
+    variables, signos = banco.lote(np.arange(min(num_partidas, len(banco))))
+    return variables, signos, banco.num_agentes, banco.num_variables
+
+
+# ==========================================
+# 3. CACHÉ EN DISCO (hash del zip + hash del banco + versión del entorno)
+# ==========================================
+def clave_cache(hash_modelo, hash_del_banco, variante):
+    version = json.dumps({"variante": variante, "config": VARIANTES[variante], "motor": VERSION_MOTOR,
+                          "barrido": VERSION_BARRIDO}, sort_keys=True)
+    return hashlib.sha256(f"{hash_modelo}|{hash_del_banco}|{version}".encode()).hexdigest()
+
+def leer_cache(directorio_cache, clave):
+    ruta = os.path.join(directorio_cache, f"{clave}.json")
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta) as f:
+        return json.load(f)
+
+def escribir_cache(directorio_cache, clave, resultado):
+    os.makedirs(directorio_cache, exist_ok=True)
+    ruta = os.path.join(directorio_cache, f"{clave}.json")
+    temporal = ruta + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(resultado, f)
+    os.replace(temporal, ruta) # Escritura atómica: nunca queda un JSON a medias
+
+
+# ==========================================
+# 4. EVALUACIÓN PARALELA DE CHECKPOINTS
+# ==========================================
+_BANCO = None
+
+def _iniciar_trabajador(variables, signos, optimos, num_variables):
+    global _BANCO
+    import torch
+    torch.set_num_threads(1)
+    limitar_hilos(1)
+    _BANCO = (variables, signos, optimos, num_variables)
+
+def _evaluar_checkpoint(tarea):
+    from stable_baselines3 import PPO
+    ruta, variante = tarea
+    variables, signos, optimos, num_variables = _BANCO
+    model = PoliticaNumpy(ruta) if ruta.endswith(".npz") else PPO.load(ruta, device="cpu")
+    resultado = jugar_banco(model, variables, signos, num_variables, variante, optimos=optimos)
+    return {
+        "tasa_exito": float(resultado["exitos"].mean()),
+        "clausulas_satisfechas": float(resultado["satisfechas"].mean()),
+        "tasa_negociacion": float(resultado["cambios"].mean()),
+        "ratio_aproximacion": float(ratio_aproximacion(resultado["satisfechas"], optimos).mean()),
+    }
+
+def barrer_checkpoints(directorio=os.path.join(BASE_DIR, "modelos"), num_partidas=2_000, num_agentes=5, num_variables=10,
+                       semilla=0, num_procesos=None, directorio_cache=os.path.join(BASE_DIR, "cache_barrido"), ruta_banco=None,
+                       variante=None):
+    if ruta_banco is not None:
+        variables, signos, num_agentes, num_variables = cargar_banco(ruta_banco, num_partidas)
+    else:
+        variables, signos = generar_banco(num_partidas, num_agentes, num_variables, semilla)
+    hash_del_banco = hash_banco(variables, signos)
+    optimos = optimos_maxsat(variables, signos, num_variables)
+
+    filas = []
+    pendientes = []
+    for pasos, ruta in encontrar_checkpoints(directorio):
+        variante_checkpoint = variante or detectar_variante(ruta, num_agentes, num_variables)
+        if variante_checkpoint is None:
+            print(f"⚠️ {os.path.basename(ruta)}: observación de tamaño {tamano_observacion_checkpoint(ruta)} sin variante reconocida, se salta")
+            continue
+
+        clave = clave_cache(hash_fichero(ruta), hash_del_banco, variante_checkpoint)
+        fila = {"pasos": pasos, "checkpoint": os.path.basename(ruta), "variante": variante_checkpoint}
+        resultado = leer_cache(directorio_cache, clave)
+        if resultado is None:
+            pendientes.append((fila, clave, ruta, variante_checkpoint))
+        else:
+            fila.update(resultado)
+        filas.append(fila)
+
+    print(f"🔍 {len(filas)} checkpoints ({len(filas) - len(pendientes)} en caché, {len(pendientes)} por evaluar)")
+
+    if pendientes:
+        num_procesos = num_procesos or os.cpu_count()
+        with mp.get_context("spawn").Pool(num_procesos, initializer=_iniciar_trabajador,
+                                          initargs=(variables, signos, optimos, num_variables)) as pool:
+            tareas = [(ruta, variante) for _, _, ruta, variante in pendientes]
+            for (fila, clave, _, _), resultado in zip(pendientes, pool.imap(_evaluar_checkpoint, tareas)):
+                escribir_cache(directorio_cache, clave, resultado)
+                fila.update(resultado)
+                print(f"   > {fila['checkpoint']}: éxito {resultado['tasa_exito']:.2%}")
+
+    return filas
+
+# --- CURVA DE APRENDIZAJE (pasos vs tasa de éxito / cláusulas satisfechas) ---
+def guardar_curva(filas, ruta_csv, ruta_grafica=None):
+    campos = ["pasos", "checkpoint", "variante", "tasa_exito", "clausulas_satisfechas", "tasa_negociacion",
+              "ratio_aproximacion"]
+    with open(ruta_csv, "w", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=campos)
+        escritor.writeheader()
+        escritor.writerows(filas)
+
+    if ruta_grafica:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        fig, (ax_exito, ax_clausulas) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+        for variante in sorted({fila["variante"] for fila in filas}):
+            serie = [fila for fila in filas if fila["variante"] == variante]
+            pasos = [fila["pasos"] for fila in serie]
+            ax_exito.plot(pasos, [fila["tasa_exito"] for fila in serie], marker="o", label=variante)
+            ax_clausulas.plot(pasos, [fila["clausulas_satisfechas"] for fila in serie], marker="o", label=variante)
+        ax_exito.set_ylabel("Tasa de Éxito")
+        ax_clausulas.set_ylabel("Cláusulas satisfechas")
+        ax_clausulas.set_xlabel("Pasos de entrenamiento")
+        ax_exito.legend()
+        fig.tight_layout()
+        fig.savefig(ruta_grafica)
+        plt.close(fig)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de checkpoints de modelos/ con caché de resultados")
+    parser.add_argument("--modelos", default=os.path.join(BASE_DIR, "modelos"))
+    parser.add_argument("--partidas", type=int, default=2_000)
+    parser.add_argument("--agentes", type=int, default=5)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--cache", default=os.path.join(BASE_DIR, "cache_barrido"))
+    parser.add_argument("--salida", default=os.path.join(BASE_DIR, "curva_aprendizaje.csv"))
+    parser.add_argument("--grafica", default=None, help="Ruta .png para dibujar la curva")
+    parser.add_argument("--banco", default=None, help="Carpeta de un banco de instancias (sustituye a --agentes/--variables/--semilla)")
+    parser.add_argument("--variante", default=None, choices=list(VARIANTES),
+                        help="Variante de todos los checkpoints (si no, se reconoce por observación y acción)")
+    args = parser.parse_args()
+
+    filas = barrer_checkpoints(args.modelos, args.partidas, args.agentes, args.variables, args.semilla,
+                               args.procesos, args.cache, args.banco, args.variante)
+    guardar_curva(filas, args.salida, args.grafica)
+    print(f"✅ Curva de aprendizaje guardada en: {args.salida}")
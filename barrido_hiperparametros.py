@@ -0,0 +1,197 @@
+import os
+import json
+import math
+import time
+import itertools
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+from clausulas import generar_instancias
+from entorno_vectorizado import VARIANTES
+from nucleo_votacion import limitar_hilos
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Configuración de PPO de entrenar.py: cada prueba cambia solo lo que se barre
+HIPERPARAMETROS_BASE = {"learning_rate": 0.0003, "gamma": 0.99, "ent_coef": 0.01}
+# Banco de evaluación común a todas las pruebas (distinto del de entrenar.py)
+SEMILLA_EVALUACION = 7
+
+# ==========================================
+# 1. UNA PRUEBA (variante x hiperparámetros x semilla) EN UN PROCESO
+# ==========================================
+# Semilla del motor en cada ronda: el entorno se crea de nuevo en cada una y, con la misma semilla, la
+# ronda r + 1 volvería a empezar por los mismos problemas que ya entrenó la ronda r
+def semilla_ronda(semilla, ronda):
+    return int(np.random.SeedSequence([semilla, ronda]).generate_state(1)[0])
+
+# Sigue entrenando el modelo de la prueba (si ya tiene uno de la ronda anterior) hasta pasos_objetivo
+# y lo puntúa con el banco común. Devuelve las métricas de evaluación.
+def _entrenar_prueba(tarea):
+    import torch
+    from stable_baselines3 import PPO
+    from entrenar import crear_entorno, escalar_hiperparametros
+    from evaluacion_masiva import jugar_banco
+
+    torch.set_num_threads(1) # Un hilo por prueba: el paralelismo lo pone el pool
+    limitar_hilos(1)
+    prueba = tarea["prueba"]
+    env = crear_entorno(tarea["num_agentes"], tarea["num_variables"], tarea["copias"], usar_motor=True,
+                        semilla=semilla_ronda(prueba["semilla"], tarea["ronda"]), variante=prueba["variante"])
+    n_steps, batch_size = escalar_hiperparametros(env.num_envs)
+    hiperparametros = dict(HIPERPARAMETROS_BASE, n_steps=n_steps, batch_size=batch_size)
+    hiperparametros.update(prueba["hiperparametros"])
+
+    inicio = time.perf_counter()
+    if os.path.exists(tarea["ruta_modelo"]):
+        model = PPO.load(tarea["ruta_modelo"], env=env, device="cpu")
+    else:
+        model = PPO("MlpPolicy", env, seed=prueba["semilla"], device="cpu", **hiperparametros)
+    pendientes = tarea["pasos_objetivo"] - model.num_timesteps
+    if pendientes > 0:
+        model.learn(total_timesteps=pendientes, reset_num_timesteps=False)
+    model.save(tarea["ruta_modelo"])
+    env.close()
+
+    variables, signos = tarea["banco"]
+    resultado = jugar_banco(model, variables, signos, tarea["num_variables"], prueba["variante"])
+    return {
+        "pasos": int(model.num_timesteps),
+        "tasa_exito": float(resultado["exitos"].mean()),
+        "clausulas_satisfechas": float(resultado["satisfechas"].mean()),
+        "tasa_negociacion": float(resultado["cambios"].mean()),
+        "segundos": time.perf_counter() - inicio,
+    }
+
+# Pasos de una actualización de PPO (n_steps x entornos) en una prueba. learn() no para a mitad de una
+# actualización, así que un presupuesto menor se redondea hacia arriba y las rondas dejan de ser distintas.
+def pasos_por_actualizacion(prueba, num_agentes, copias):
+    from entrenar import escalar_hiperparametros
+    num_envs = copias * num_agentes
+    n_steps = prueba["hiperparametros"].get("n_steps", escalar_hiperparametros(num_envs)[0])
+    return n_steps * num_envs
+
+# Orden de las pruebas: tasa de éxito y, a igualdad, cláusulas satisfechas
+def puntuacion(metricas):
+    return (metricas["tasa_exito"], metricas["clausulas_satisfechas"])
+
+
+# ==========================================
+# 2. SUCCESSIVE HALVING
+# ==========================================
+# Ronda r: las pruebas que siguen vivas entrenan hasta pasos_iniciales * eta^r pasos (acumulados)
+# y pasa a la siguiente la mejor 1/eta. Así casi todo el presupuesto va a las configuraciones prometedoras.
+def generar_pruebas(variantes, rejilla, semillas):
+    nombres = sorted(rejilla)
+    pruebas = []
+    for variante, valores, semilla in itertools.product(variantes, itertools.product(*(rejilla[n] for n in nombres)), semillas):
+        hiperparametros = dict(zip(nombres, valores))
+        detalle = "_".join(f"{n}={v}" for n, v in hiperparametros.items())
+        pruebas.append({
+            "id": f"{len(pruebas):03d}_{variante}_{detalle}_s{semilla}".replace("=", "-"),
+            "variante": variante,
+            "hiperparametros": hiperparametros,
+            "semilla": semilla,
+        })
+    return pruebas
+
+def barrer_hiperparametros(variantes, rejilla, semillas=(0,), pasos_iniciales=500_000, eta=3, num_rondas=None,
+                           num_agentes=5, num_variables=10, copias=64, partidas_evaluacion=2_000, num_procesos=None,
+                           directorio=os.path.join(BASE_DIR, "barrido_hiperparametros")):
+    os.makedirs(directorio, exist_ok=True)
+    pruebas = generar_pruebas(variantes, rejilla, semillas)
+    actualizacion = max(pasos_por_actualizacion(prueba, num_agentes, copias) for prueba in pruebas)
+    if pasos_iniciales < actualizacion:
+        raise ValueError(f"pasos_iniciales ({pasos_iniciales}) es menor que una actualización de PPO "
+                         f"({actualizacion} pasos): súbelo o baja n_steps con --hp n_steps=...")
+    # Por defecto, rondas hasta que quede una sola prueba
+    num_rondas = num_rondas or max(1, math.ceil(math.log(len(pruebas), eta)) + 1)
+    banco = generar_instancias(np.random.default_rng(SEMILLA_EVALUACION), partidas_evaluacion, num_agentes, num_variables)
+    num_procesos = num_procesos or os.cpu_count()
+
+    print(f"🧪 {len(pruebas)} pruebas, {num_rondas} rondas (eta={eta}), {num_procesos} procesos")
+    vivas = pruebas
+    rondas = []
+    for ronda in range(num_rondas):
+        pasos_objetivo = pasos_iniciales * eta ** ronda
+        tareas = [{
+            "prueba": prueba,
+            "ronda": ronda,
+            "pasos_objetivo": pasos_objetivo,
+            "ruta_modelo": os.path.join(directorio, prueba["id"] + ".zip"),
+            "num_agentes": num_agentes,
+            "num_variables": num_variables,
+            "copias": copias,
+            "banco": banco,
+        } for prueba in vivas]
+
+        print(f"\n🔁 Ronda {ronda + 1}/{num_rondas}: {len(vivas)} pruebas hasta {pasos_objetivo} pasos")
+        inicio = time.perf_counter()
+        with mp.get_context("spawn").Pool(min(num_procesos, len(tareas))) as pool:
+            for prueba, metricas in zip(vivas, pool.imap(_entrenar_prueba, tareas)):
+                prueba.setdefault("rondas", []).append(dict(metricas, ronda=ronda))
+                print(f"   > {prueba['id']}: éxito {metricas['tasa_exito']:.2%}, "
+                      f"cláusulas {metricas['clausulas_satisfechas']:.3f} ({metricas['segundos']:.0f} s)")
+
+        vivas = sorted(vivas, key=lambda p: puntuacion(p["rondas"][-1]), reverse=True)
+        rondas.append({"ronda": ronda, "pasos": pasos_objetivo, "pruebas": [p["id"] for p in vivas],
+                       "segundos": time.perf_counter() - inicio})
+        guardar_resultados(directorio, pruebas, rondas)
+        if ronda < num_rondas - 1:
+            sobreviven = max(1, len(vivas) // eta)
+            # Los modelos de las descartadas ya no hacen falta
+            for prueba in vivas[sobreviven:]:
+                ruta = os.path.join(directorio, prueba["id"] + ".zip")
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            vivas = vivas[:sobreviven]
+
+    return vivas[0], pruebas
+
+def guardar_resultados(directorio, pruebas, rondas):
+    ruta = os.path.join(directorio, "resultados.json")
+    with open(ruta, "w") as f:
+        json.dump({"pruebas": pruebas, "rondas": rondas}, f, indent=2)
+    return ruta
+
+# "learning_rate=0.0003,0.001" -> ("learning_rate", [0.0003, 0.001])
+def leer_rejilla(texto):
+    nombre, _, valores = texto.partition("=")
+    convertidos = []
+    for valor in valores.split(","):
+        try:
+            convertidos.append(int(valor))
+        except ValueError:
+            convertidos.append(float(valor))
+    return nombre, convertidos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de variantes e hiperparámetros de PPO con successive halving")
+    parser.add_argument("--variantes", nargs="+", default=list(VARIANTES), choices=list(VARIANTES))
+    parser.add_argument("--hp", action="append", default=None,
+                        help="Hiperparámetro de PPO y sus valores, p. ej. --hp learning_rate=0.0003,0.001 (se puede repetir)")
+    parser.add_argument("--semillas", type=int, nargs="+", default=[0])
+    parser.add_argument("--pasos-iniciales", type=int, default=500_000,
+                        help="Presupuesto de cada prueba en la primera ronda (al menos una actualización de PPO; se redondea a actualizaciones completas)")
+    parser.add_argument("--eta", type=int, default=3, help="En cada ronda sigue 1/eta de las pruebas con eta veces más pasos")
+    parser.add_argument("--rondas", type=int, default=None)
+    parser.add_argument("--agentes", type=int, default=5)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--copias", type=int, default=64, help="Partidas simultáneas en el motor de cada prueba")
+    parser.add_argument("--partidas-evaluacion", type=int, default=2_000)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--directorio", default=os.path.join(BASE_DIR, "barrido_hiperparametros"))
+    args = parser.parse_args()
+
+    rejilla = dict(leer_rejilla(hp) for hp in (args.hp or ["learning_rate=0.0003,0.001", "ent_coef=0.01,0.0"]))
+    mejor, pruebas = barrer_hiperparametros(args.variantes, rejilla, args.semillas, args.pasos_iniciales, args.eta,
+                                            args.rondas, args.agentes, args.variables, args.copias,
+                                            args.partidas_evaluacion, args.procesos, args.directorio)
+
+    metricas = mejor["rondas"][-1]
+    print("---------------------------------------------------------")
+    print(f"🏆 Mejor configuración: {mejor['variante']} {mejor['hiperparametros']} (semilla {mejor['semilla']})")
+    print(f"   > Éxito {metricas['tasa_exito']:.2%}, cláusulas {metricas['clausulas_satisfechas']:.3f} en {metricas['pasos']} pasos")
+    print(f"   > Modelo: {os.path.join(args.directorio, mejor['id'] + '.zip')}")
+    print("---------------------------------------------------------")
@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import tracemalloc
+import numpy as np
+
+from entorno_vectorizado import MODULOS_ENTORNO, VARIANTES, Entorno3SATVectorizado
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+AGENTES = (5, 40, 200, 1000)
+VARIABLES = (10, 100, 1000)
+LOTES_PREDICCION = (1, 8, 64, 512, 4096)
+# Con el motor por lotes se juegan partidas hasta rondar este número de agentes por paso
+AGENTES_POR_LOTE_MOTOR = 4096
+
+# ==========================================
+# 1. MEDICIÓN
+# ==========================================
+# Repite funcion() hasta gastar tiempo_minimo segundos y devuelve (llamadas, segundos)
+def _cronometrar(funcion, tiempo_minimo, max_repeticiones=1_000_000):
+    repeticiones = 0
+    inicio = time.perf_counter()
+    while True:
+        funcion()
+        repeticiones += 1
+        segundos = time.perf_counter() - inicio
+        if segundos >= tiempo_minimo or repeticiones >= max_repeticiones:
+            return repeticiones, segundos
+
+# Pico de memoria de Python + NumPy (tracemalloc) durante funcion(), en MB
+def _memoria_pico(funcion):
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 2**20
+
+def _acciones_aleatorias(rng, tipo_accion, forma):
+    if tipo_accion == "multidiscreta":
+        return rng.integers(0, 2, size=forma)
+    return rng.random(forma, dtype=np.float32)
+
+
+# ==========================================
+# 2. SUITES
+# ==========================================
+# --- ENTORNO PETTINGZOO: reset y step de una partida ---
+def medir_entorno(variante, num_agentes, num_variables, tiempo_minimo):
+    Entorno3SAT = importlib.import_module(MODULOS_ENTORNO[variante]).Entorno3SAT
+    tipo_accion = VARIANTES[variante]["accion"]
+    rng = np.random.default_rng(0)
+    env = Entorno3SAT(num_agentes=num_agentes, num_variables=num_variables)
+    env.reset(seed=0) # Generador propio del entorno: los resets siguientes siguen esta secuencia
+
+    resets, segundos_reset = _cronometrar(env.reset, tiempo_minimo)
+
+    acciones = _acciones_aleatorias(rng, tipo_accion, (num_agentes, num_variables))
+    acciones_dict = dict(zip(env.possible_agents, acciones))
+    pasos, segundos_paso = 0, 0.0
+    env.reset()
+    while segundos_paso < tiempo_minimo:
+        if not env.agents:
+            env.reset()
+        inicio = time.perf_counter()
+        env.step(acciones_dict)
+        segundos_paso += time.perf_counter() - inicio
+        pasos += 1
+
+    # Memoria de una partida completa, incluida la construcción del entorno
+    def partida():
+        env_nuevo = Entorno3SAT(num_agentes=num_agentes, num_variables=num_variables)
+        env_nuevo.reset(seed=0)
+        while env_nuevo.agents:
+            env_nuevo.step(acciones_dict)
+
+    return {
+        "resets_por_segundo": resets / segundos_reset,
+        "pasos_por_segundo": pasos / segundos_paso,
+        "pasos_agente_por_segundo": pasos * num_agentes / segundos_paso,
+        "memoria_pico_mb": _memoria_pico(partida),
+    }
+
+# --- MOTOR POR LOTES: las mismas medidas con N partidas a la vez ---
+def medir_motor(variante, num_agentes, num_variables, tiempo_minimo):
+    num_partidas = max(1, AGENTES_POR_LOTE_MOTOR // num_agentes)
+    rng = np.random.default_rng(0)
+
+    def crear():
+        return Entorno3SATVectorizado(num_partidas=num_partidas, num_agentes=num_agentes, num_variables=num_variables,
+                                      variante=variante, seed=0)
+
+    memoria = _memoria_pico(lambda: crear().reset())
+    env = crear()
+    resets, segundos_reset = _cronometrar(env.reset, tiempo_minimo)
+    acciones = _acciones_aleatorias(rng, env.tipo_accion, (env.num_envs, num_variables))
+    pasos, segundos_paso = _cronometrar(lambda: env.step(acciones), tiempo_minimo)
+
+    return {
+        "partidas": num_partidas,
+        "resets_por_segundo": resets * num_partidas / segundos_reset,
+        "pasos_por_segundo": pasos * num_partidas / segundos_paso,
+        "pasos_agente_por_segundo": pasos * env.num_envs / segundos_paso,
+        "memoria_pico_mb": memoria,
+    }
+
+# --- PREDICCIÓN: latencia de model.predict con una observación y con lotes ---
+def cargar_modelo(ruta_modelo):
+    from stable_baselines3 import PPO
+    if ruta_modelo and os.path.exists(ruta_modelo):
+        return PPO.load(ruta_modelo, device="cpu")
+    # Sin checkpoint: red sin entrenar del mismo tamaño (la latencia no depende de los pesos)
+    return PPO("MlpPolicy", Entorno3SATVectorizado(num_partidas=1, num_agentes=5, num_variables=10,
+                                                   variante="voto_3sat_v3"), device="cpu")
+
+def medir_prediccion(model, tamano_lote, tiempo_minimo):
+    rng = np.random.default_rng(0)
+    obs = rng.random((tamano_lote,) + model.observation_space.shape, dtype=np.float32)
+    if tamano_lote == 1:
+        obs = obs[0]
+    llamadas, segundos = _cronometrar(lambda: model.predict(obs, deterministic=True), tiempo_minimo)
+    return {
+        "latencia_ms": 1000 * segundos / llamadas,
+        "observaciones_por_segundo": llamadas * tamano_lote / segundos,
+    }
+
+# --- PARTIDA COMPLETA: ejecutar_partida de evaluar.py (entorno v3 + modelo) ---
+def medir_partida(model, num_partidas, tiempo_minimo):
+    from evaluar import ejecutar_partida, ejecutar_partidas_lote
+    Entorno3SAT = importlib.import_module(MODULOS_ENTORNO["voto_3sat_v3"]).Entorno3SAT
+    num_agentes = model.observation_space.shape[0] - 20 # v3: DNI + tablero(10) + mapa(10)
+
+    if num_partidas == 1:
+        env = Entorno3SAT(num_agentes=num_agentes)
+        env.reset(seed=0)
+        llamadas, segundos = _cronometrar(lambda: ejecutar_partida(env, model), tiempo_minimo)
+    else:
+        envs = [Entorno3SAT(num_agentes=num_agentes) for _ in range(num_partidas)]
+        for semilla, env in enumerate(envs):
+            env.reset(seed=semilla)
+        llamadas, segundos = _cronometrar(lambda: ejecutar_partidas_lote(envs, model), tiempo_minimo)
+    return {"segundos_por_partida": segundos / (llamadas * num_partidas)}
+
+
+# ==========================================
+# 3. EJECUCIÓN DE LA SUITE
+# ==========================================
+def ejecutar_benchmark(suites=("entorno", "motor", "prediccion", "partida"), agentes=AGENTES, variables=VARIABLES,
+                       tiempo_minimo=0.5, ruta_modelo=os.path.join(BASE_DIR, "modelos", "ppo_3sat_final_v1.zip")):
+    resultados = []
+
+    def anotar(suite, caso, metricas):
+        resultados.append({"suite": suite, "caso": caso, **metricas})
+        resumen = ", ".join(f"{k}={v:,.4g}" for k, v in metricas.items())
+        print(f"   > [{suite}] {caso}: {resumen}")
+
+    for suite, medir in (("entorno", medir_entorno), ("motor", medir_motor)):
+        if suite not in suites:
+            continue
+        for variante in VARIANTES:
+            for num_agentes in agentes:
+                for num_variables in variables:
+                    caso = f"{variante}|A={num_agentes}|V={num_variables}"
+                    anotar(suite, caso, medir(variante, num_agentes, num_variables, tiempo_minimo))
+
+    if "prediccion" in suites or "partida" in suites:
+        model = cargar_modelo(ruta_modelo)
+        if "prediccion" in suites:
+            for tamano_lote in LOTES_PREDICCION:
+                anotar("prediccion", f"lote={tamano_lote}", medir_prediccion(model, tamano_lote, tiempo_minimo))
+        if "partida" in suites:
+            for num_partidas in (1, 100):
+                anotar("partida", f"partidas={num_partidas}", medir_partida(model, num_partidas, tiempo_minimo))
+
+    return {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor(),
+            "nucleos": os.cpu_count(),
+            "tiempo_minimo": tiempo_minimo,
+        },
+        "resultados": resultados,
+    }
+
+
+# ==========================================
+# 4. COMPARACIÓN CON UNA BASE GUARDADA
+# ==========================================
+# Sentido de cada métrica: las "_por_segundo" mejor cuanto más altas, tiempos y memoria cuanto más bajas
+def _mayor_es_mejor(metrica):
+    return metrica.endswith("_por_segundo")
+
+def comparar(actual, base, tolerancia=0.10):
+    indice_base = {(fila["suite"], fila["caso"]): fila for fila in base["resultados"]}
+    regresiones = []
+    for fila in actual["resultados"]:
+        anterior = indice_base.get((fila["suite"], fila["caso"]))
+        if anterior is None:
+            continue
+        for metrica, valor in fila.items():
+            if metrica in ("suite", "caso", "partidas") or metrica not in anterior or anterior[metrica] <= 0:
+                continue
+            cambio = valor / anterior[metrica] - 1
+            empeora = -cambio if _mayor_es_mejor(metrica) else cambio
+            if empeora > tolerancia:
+                regresiones.append({"suite": fila["suite"], "caso": fila["caso"], "metrica": metrica,
+                                    "base": anterior[metrica], "actual": valor, "cambio": cambio})
+    return regresiones
+
+def imprimir_regresiones(regresiones, tolerancia):
+    if not regresiones:
+        print(f"✅ Sin regresiones (tolerancia {tolerancia:.0%})")
+        return
+    print(f"❌ {len(regresiones)} regresiones (tolerancia {tolerancia:.0%}):")
+    for r in regresiones:
+        print(f"   > [{r['suite']}] {r['caso']} {r['metrica']}: {r['base']:,.4g} -> {r['actual']:,.4g} ({r['cambio']:+.1%})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de entornos, inferencia y evaluación a distintas escalas")
+    parser.add_argument("--suites", nargs="+", default=["entorno", "motor", "prediccion", "partida"],
+                        choices=["entorno", "motor", "prediccion", "partida"])
+    parser.add_argument("--agentes", type=int, nargs="+", default=list(AGENTES))
+    parser.add_argument("--variables", type=int, nargs="+", default=list(VARIABLES))
+    parser.add_argument("--tiempo", type=float, default=0.5, help="Segundos mínimos por medida")
+    parser.add_argument("--modelo", default=os.path.join(BASE_DIR, "modelos", "ppo_3sat_final_v1.zip"))
+    parser.add_argument("--salida", default=os.path.join(BASE_DIR, "resultados_benchmark.json"))
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    print(f"--- BENCHMARK ({', '.join(args.suites)}) ---")
+    actual = ejecutar_benchmark(args.suites, args.agentes, args.variables, args.tiempo, args.modelo)
+    with open(args.salida, "w") as f:
+        json.dump(actual, f, indent=2)
+    print(f"💾 Resultados guardados en: {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+        regresiones = comparar(actual, base, args.tolerancia)
+        imprimir_regresiones(regresiones, args.tolerancia)
+        sys.exit(1 if regresiones else 0)
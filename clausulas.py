@@ -0,0 +1,108 @@
+import numpy as np
+
+LITERALES_POR_CLAUSULA = 3
+
+# ==========================================
+# ALMACÉN DE CLÁUSULAS COMO ARRAYS
+# ==========================================
+# Una cláusula por agente: variables [A, k] (índice de la ley) y signos [A, k]
+# (1 = quiere que se apruebe, 0 = quiere que se rechace). Con lotes de partidas
+# las formas son [N, A, k] y todo funciona igual.
+
+# --- CONVERSIÓN: problema_inyectado (dict de tuplas) -> arrays ---
+def clausulas_a_arrays(clausulas_privadas, agentes):
+    variables = np.array([[var_idx for var_idx, _ in clausulas_privadas[agent]] for agent in agentes], dtype=np.int64)
+    signos = np.array([[signo for _, signo in clausulas_privadas[agent]] for agent in agentes], dtype=np.int8)
+    return variables, signos
+
+# --- CONVERSIÓN INVERSA: arrays -> dict de tuplas (formato de evaluar.py) ---
+def arrays_a_clausulas(variables, signos):
+    return {
+        f"agente_{i}": [(int(v), int(s)) for v, s in zip(variables[i], signos[i])]
+        for i in range(len(variables))
+    }
+
+# --- SATISFACCIÓN: un solo gather + comparación (Lógica OR dentro de la cláusula) ---
+# leyes: [..., V] con 1 (aprobada) o 0 (rechazada). variables puede traer más ejes que [A, k]
+# (p. ej. [N, A, m, k] con varias cláusulas por agente): el resultado es [..., A] o [..., A, m]
+def clausulas_satisfechas(leyes, variables, signos):
+    leyes = np.asarray(leyes)
+    forma = variables.shape
+    lote = forma[:leyes.ndim - 1]
+    elegidas = np.take_along_axis(leyes[..., None, :], variables.reshape(lote + (1, -1)), axis=-1)
+    return (elegidas.reshape(forma) == signos).any(axis=-1)
+
+# --- ESQUEMAS DE RECOMPENSA ---
+# Egoísta (v1, v4): 100 si mi cláusula se cumple, 0 si no
+def recompensa_egoista(satisfechas):
+    return satisfechas * 100.0
+
+# Cooperativa (v2, v3): 20 pts por cada cláusula satisfecha en total, igual para todos
+def recompensa_cooperativa(satisfechas):
+    total = satisfechas.sum(axis=-1, keepdims=True) * 20.0
+    return np.broadcast_to(total, satisfechas.shape)
+
+# Media (v6): 100 x fracción de cláusulas satisfechas, igual para todos. No depende del número de
+# agentes y vale 100 solo si se cumplen todas (el mismo criterio de éxito que v3 con 5 agentes)
+def recompensa_media(satisfechas):
+    media = satisfechas.sum(axis=-1, keepdims=True) / satisfechas.shape[-1] * 100.0
+    return np.broadcast_to(media, satisfechas.shape)
+
+# --- GENERACIÓN VECTORIZADA ---
+# Con pocas leyes se barajan todas (argsort, la generación de siempre para una misma semilla);
+# con más, muestreo de Floyd: k pasadas vectorizadas, sin materializar las V leyes por agente,
+# así que el coste por agente no crece con num_variables
+MAX_VARIABLES_BARAJADO = 64
+
+# k variables distintas (uniformes) para cada posición de forma -> [*forma, k]
+def muestrear_variables(rng, forma, num_variables, literales=LITERALES_POR_CLAUSULA):
+    if literales > num_variables:
+        raise ValueError(f"No caben {literales} literales distintos en {num_variables} variables")
+    if num_variables <= MAX_VARIABLES_BARAJADO:
+        ruido = rng.random(forma + (num_variables,))
+        return np.argsort(ruido, axis=-1)[..., :literales]
+
+    elegidas = np.empty(forma + (literales,), dtype=np.int64)
+    for i, j in enumerate(range(num_variables - literales, num_variables)):
+        candidata = rng.integers(0, j + 1, size=forma)
+        repetida = (elegidas[..., :i] == candidata[..., None]).any(axis=-1)
+        elegidas[..., i] = np.where(repetida, j, candidata)
+    # Floyd elige el conjunto; el orden dentro de la cláusula se baraja aparte
+    orden = np.argsort(rng.random(forma + (literales,)), axis=-1)
+    return np.take_along_axis(elegidas, orden, axis=-1)
+
+# n problemas de A agentes: [n, A, k] o, con varias cláusulas por agente, [n, A, m, k]
+def generar_instancias(rng, num_instancias, num_agentes, num_variables, literales=LITERALES_POR_CLAUSULA,
+                       clausulas_por_agente=1):
+    forma = (num_instancias, num_agentes) if clausulas_por_agente == 1 else (num_instancias, num_agentes, clausulas_por_agente)
+    variables = muestrear_variables(rng, forma, num_variables, literales)
+    signos = rng.integers(0, 2, size=variables.shape, dtype=np.int8)
+    return variables, signos
+
+# --- FAMILIAS ESTRUCTURADAS (los casos de laboratorio de evaluar.py, a cualquier escala) ---
+# "utopia":    todos mencionan la misma ley pivote y la quieren aprobada -> basta aprobarla
+# "conflicto": una fracción ratio_conflicto de los agentes quiere el pivote rechazado y depende
+#              de sus otras leyes para quedar satisfecha (0.4 = el Caso B con 5 agentes)
+FAMILIAS = ("aleatoria", "utopia", "conflicto")
+
+def generar_familia(rng, familia, num_instancias, num_agentes, num_variables, literales=LITERALES_POR_CLAUSULA,
+                    ratio_conflicto=0.4):
+    if familia == "aleatoria":
+        return generar_instancias(rng, num_instancias, num_agentes, num_variables, literales)
+    if familia not in FAMILIAS:
+        raise ValueError(f"Familia desconocida: {familia} (opciones: {', '.join(FAMILIAS)})")
+
+    pivote = rng.integers(0, num_variables, size=num_instancias)
+    # El resto de literales, entre las V-1 leyes que no son el pivote
+    otras = muestrear_variables(rng, (num_instancias, num_agentes), num_variables - 1, literales - 1)
+    otras += otras >= pivote[:, None, None]
+    variables = np.concatenate([np.broadcast_to(pivote[:, None, None], (num_instancias, num_agentes, 1)), otras], axis=-1)
+
+    signos = rng.integers(0, 2, size=variables.shape, dtype=np.int8)
+    signos[..., 0] = 1
+    if familia == "conflicto":
+        # Exactamente round(ratio x A) agentes en contra del pivote, elegidos al azar en cada problema
+        en_contra = int(round(ratio_conflicto * num_agentes))
+        rango = np.argsort(rng.random((num_instancias, num_agentes)), axis=-1)
+        signos[..., 0] = np.where(rango < en_contra, 0, 1)
+    return variables, signos
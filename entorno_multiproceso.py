@@ -0,0 +1,201 @@
+import time
+import multiprocessing as mp
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper, VecEnv
+
+import perfilado
+from nucleo_votacion import limitar_hilos
+
+# ==========================================
+# 1. TRABAJADOR: un VecEnv completo por proceso
+# ==========================================
+# Cada proceso construye su propio VecEnv (motor por lotes o PettingZoo + SuperSuit) y lo
+# avanza entero con cada paso: por la tubería solo viajan acciones y arrays ya concatenados.
+def _trabajador(remoto, remoto_padre, fabrica):
+    remoto_padre.close()
+    limitar_hilos(1) # Un hilo de Numba por trabajador: el paralelismo son los procesos
+    env = fabrica.var()
+    segundos = 0.0
+    pasos = 0
+    while True:
+        try:
+            orden, datos = remoto.recv()
+            if orden == "step":
+                inicio = time.perf_counter()
+                env.step_async(datos)
+                resultado = env.step_wait()
+                segundos += time.perf_counter() - inicio
+                pasos += 1
+                remoto.send(resultado)
+            elif orden == "reset":
+                # Semilla de VecEnv.seed() (p. ej. PPO(seed=...)) para el primer entorno del trabajador
+                if datos is not None:
+                    env.seed(datos)
+                remoto.send(env.reset())
+            elif orden == "espacios":
+                remoto.send((env.num_envs, env.observation_space, env.action_space))
+            elif orden == "rendimiento":
+                remoto.send((pasos * env.num_envs, segundos))
+                segundos, pasos = 0.0, 0
+            elif orden == "perfil":
+                remoto.send(perfilado.CRONOMETRO.extraer() if perfilado.CRONOMETRO is not None else {})
+            elif orden in ("get_attr", "set_attr", "env_method"):
+                # Los errores (p. ej. AttributeError) se devuelven para relanzarlos en el proceso principal
+                try:
+                    if orden == "get_attr":
+                        remoto.send(env.get_attr(datos))
+                    elif orden == "set_attr":
+                        remoto.send(env.set_attr(*datos))
+                    else:
+                        nombre, args, kwargs = datos
+                        remoto.send(env.env_method(nombre, *args, **kwargs))
+                except Exception as error:
+                    remoto.send(error)
+            elif orden == "close":
+                env.close()
+                remoto.close()
+                break
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+# ==========================================
+# 2. VECENV REPARTIDO EN PROCESOS
+# ==========================================
+class VecEnvMultiproceso(VecEnv):
+    def __init__(self, fabricas, start_method="spawn"):
+        self.waiting = False
+        self.closed = False
+        contexto = mp.get_context(start_method)
+
+        self.remotos, self.procesos = [], []
+        for fabrica in fabricas:
+            remoto, remoto_trabajador = contexto.Pipe()
+            proceso = contexto.Process(target=_trabajador, args=(remoto_trabajador, remoto, CloudpickleWrapper(fabrica)),
+                                       daemon=True)
+            proceso.start()
+            remoto_trabajador.close()
+            self.remotos.append(remoto)
+            self.procesos.append(proceso)
+
+        espacios = []
+        for remoto in self.remotos:
+            remoto.send(("espacios", None))
+            espacios.append(remoto.recv())
+        # Cada trabajador ocupa un tramo contiguo de índices: [limites[i], limites[i + 1])
+        self.envs_por_trabajador = [num_envs for num_envs, _, _ in espacios]
+        self.limites = np.concatenate([[0], np.cumsum(self.envs_por_trabajador)])
+        _, observation_space, action_space = espacios[0]
+        super().__init__(int(self.limites[-1]), observation_space, action_space)
+
+    def reset(self):
+        for i, remoto in enumerate(self.remotos):
+            remoto.send(("reset", self._seeds[self.limites[i]]))
+        obs = np.concatenate([remoto.recv() for remoto in self.remotos])
+        self._reset_seeds()
+        self._reset_options()
+        return obs
+
+    def step_async(self, actions):
+        for i, remoto in enumerate(self.remotos):
+            remoto.send(("step", actions[self.limites[i]:self.limites[i + 1]]))
+        self.waiting = True
+
+    def step_wait(self):
+        resultados = [remoto.recv() for remoto in self.remotos]
+        self.waiting = False
+        obs, recompensas, dones, infos = zip(*resultados)
+        return np.concatenate(obs), np.concatenate(recompensas), np.concatenate(dones), [info for bloque in infos for info in bloque]
+
+    # Pasos de entorno por segundo de cada trabajador desde la última llamada (solo tiempo dentro de step)
+    def rendimiento_trabajadores(self):
+        for remoto in self.remotos:
+            remoto.send(("rendimiento", None))
+        return [pasos / segundos if segundos > 0 else 0.0 for pasos, segundos in (remoto.recv() for remoto in self.remotos)]
+
+    # Segundos por fase del entorno en cada trabajador desde la última llamada (perfilado.py)
+    def perfiles_trabajadores(self):
+        for remoto in self.remotos:
+            remoto.send(("perfil", None))
+        return [remoto.recv() for remoto in self.remotos]
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remoto in self.remotos:
+                remoto.recv()
+        for remoto in self.remotos:
+            remoto.send(("close", None))
+        for proceso in self.procesos:
+            proceso.join()
+        self.closed = True
+
+    def _recibir(self, t):
+        resultado = self.remotos[t].recv()
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    # --- ÍNDICES GLOBALES -> (trabajador, índices locales) ---
+    def _trabajadores_de(self, indices):
+        indices = self._get_indices(indices)
+        trabajadores = np.searchsorted(self.limites, indices, side="right") - 1
+        return [(t, [int(i - self.limites[t]) for i, tt in zip(indices, trabajadores) if tt == t])
+                for t in sorted(set(trabajadores.tolist()))]
+
+    def get_attr(self, attr_name, indices=None):
+        resultado = []
+        for t, locales in self._trabajadores_de(indices):
+            self.remotos[t].send(("get_attr", attr_name))
+            valores = self._recibir(t)
+            resultado.extend(valores[i] for i in locales)
+        return resultado
+
+    def set_attr(self, attr_name, value, indices=None):
+        for t, _ in self._trabajadores_de(indices):
+            self.remotos[t].send(("set_attr", (attr_name, value)))
+            self._recibir(t)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        resultado = []
+        for t, locales in self._trabajadores_de(indices):
+            self.remotos[t].send(("env_method", (method_name, method_args, method_kwargs)))
+            valores = self._recibir(t)
+            resultado.extend(valores[i] for i in locales)
+        return resultado
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+# ==========================================
+# 3. CALLBACK DE RENDIMIENTO (pasos/s, también en TensorBoard)
+# ==========================================
+class CallbackRendimiento(BaseCallback):
+    def __init__(self, verbose=1):
+        super().__init__(verbose)
+        self._inicio = None
+        self._pasos_inicio = 0
+
+    def _on_rollout_start(self):
+        self._inicio = time.perf_counter()
+        self._pasos_inicio = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        total = (self.num_timesteps - self._pasos_inicio) / (time.perf_counter() - self._inicio)
+        self.logger.record("rendimiento/pasos_por_segundo", total)
+
+        if hasattr(self.training_env, "rendimiento_trabajadores"):
+            por_trabajador = self.training_env.rendimiento_trabajadores()
+            for i, pasos_por_segundo in enumerate(por_trabajador):
+                self.logger.record(f"rendimiento/trabajador_{i}", pasos_por_segundo)
+            if self.verbose:
+                detalle = ", ".join(f"{p:,.0f}" for p in por_trabajador)
+                print(f"⚡ {total:,.0f} pasos/s en total | por trabajador: {detalle}")
+        elif self.verbose:
+            print(f"⚡ {total:,.0f} pasos/s")
@@ -0,0 +1,307 @@
+import numpy as np
+from gymnasium.spaces import Box, MultiDiscrete
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from clausulas import (LITERALES_POR_CLAUSULA, generar_familia, recompensa_cooperativa,
+                       recompensa_egoista, recompensa_media)
+import perfilado
+from nucleo_votacion import elegir_nucleo
+from mi_entorno_3sat_poblacion import BITS_IDENTIDAD, codificar_identidad
+
+# ==========================================
+# 1. VARIANTES DEL ENTORNO (las mismas que los ficheros mi_entorno_*)
+# ==========================================
+# observacion:
+#   "global"     -> DNI + Tablero + Cláusulas de todos (v1, mi_entorno_3sat.py)
+#   "propia"     -> DNI + Tablero + Mis 3 leyes (v2, mi_entorno_3sat_recompensa.py)
+#   "posicional" -> DNI + Tablero + Mapa Posicional (v3, mi_entonrno_3sat_recompensayobservaciones.py)
+#   "mapa"       -> DNI + Mapa Posicional (v4, mi_entorno_3sat_observacion.py)
+#   "compacta"   -> Identidad binaria + Tablero / A + Mapa Posicional (v5, mi_entorno_3sat_poblacion.py),
+#                   mismo tamaño con cualquier número de agentes
+#   "agnostica"  -> Tablero / A + Mapa Posicional (v6, mi_entorno_3sat_agnostico.py), sin identidad:
+#                   no cambia con el número de agentes ni con su orden (un modelo sirve para cualquier A)
+VARIANTES = {
+    "voto_3sat_v1": {"observacion": "global", "recompensa": "egoista", "accion": "box", "limite_pasos": 5},
+    "voto_3sat_v2": {"observacion": "propia", "recompensa": "cooperativa", "accion": "box", "limite_pasos": 5},
+    "voto_3sat_v3": {"observacion": "posicional", "recompensa": "cooperativa", "accion": "box", "limite_pasos": 5},
+    "voto_3sat_v4_egoista": {"observacion": "mapa", "recompensa": "egoista", "accion": "multidiscreta", "limite_pasos": 1},
+    "voto_3sat_v5_poblacion": {"observacion": "compacta", "recompensa": "egoista", "accion": "box", "limite_pasos": 5},
+    "voto_3sat_v6_agnostico": {"observacion": "agnostica", "recompensa": "media", "accion": "box", "limite_pasos": 5},
+}
+
+# Fichero PettingZoo de cada variante
+MODULOS_ENTORNO = {
+    "voto_3sat_v1": "mi_entorno_3sat",
+    "voto_3sat_v2": "mi_entorno_3sat_recompensa",
+    "voto_3sat_v3": "mi_entonrno_3sat_recompensayobservaciones",
+    "voto_3sat_v4_egoista": "mi_entorno_3sat_observacion",
+    "voto_3sat_v5_poblacion": "mi_entorno_3sat_poblacion",
+    "voto_3sat_v6_agnostico": "mi_entorno_3sat_agnostico",
+}
+
+# Se incrementa cuando cambia la dinámica del motor (invalida resultados cacheados)
+VERSION_MOTOR = 1
+
+# Tamaño de observación de cada variante (para reconocer a qué entorno pertenece un checkpoint)
+def tamano_observacion(variante, num_agentes, num_variables, literales=LITERALES_POR_CLAUSULA):
+    tipo = VARIANTES[variante]["observacion"]
+    if tipo == "global":
+        return num_agentes + num_variables + num_agentes * literales * 2
+    if tipo == "propia":
+        return num_agentes + num_variables + literales * 2
+    if tipo == "posicional":
+        return num_agentes + num_variables + num_variables
+    if tipo == "compacta":
+        return BITS_IDENTIDAD + num_variables + num_variables
+    if tipo == "agnostica":
+        return num_variables + num_variables
+    return num_agentes + num_variables
+
+
+# ==========================================
+# 2. MOTOR POR LOTES (N partidas x A agentes como arrays)
+# ==========================================
+# Cada agente de cada partida es un "sub-entorno" de SB3, en el mismo orden que
+# ss.pettingzoo_env_to_vec_env_v1 + concat_vec_envs_v1: indice = partida * A + agente.
+class Entorno3SATVectorizado(VecEnv):
+    metadata = {"render_modes": []}
+
+    # banco: BancoInstancias opcional; los problemas se leen en orden desde indice_banco en vez de generarse
+    # familia / ratio_conflicto / literales: qué problemas se generan (clausulas.generar_familia)
+    # limite_pasos: rondas por partida (None = las de la variante); rondas_consenso: si se da, la partida
+    # termina antes en cuanto el resultado (leyes aprobadas) se repite esas rondas seguidas
+    # nucleo: "auto" (Numba si está instalado), "numpy" o "numba" para el recuento de cada step (nucleo_votacion.py)
+    def __init__(self, num_partidas=64, num_agentes=40, num_variables=10, variante="voto_3sat_v4_egoista", seed=None,
+                 banco=None, indice_banco=0, familia="aleatoria", ratio_conflicto=0.4, literales=LITERALES_POR_CLAUSULA,
+                 limite_pasos=None, rondas_consenso=None, nucleo="auto"):
+        self.render_mode = None
+
+        config = VARIANTES[variante]
+        self.variante = variante
+        self.tipo_observacion = config["observacion"]
+        self.tipo_recompensa = config["recompensa"]
+        self.tipo_accion = config["accion"]
+        self.limite_pasos = limite_pasos or config["limite_pasos"]
+        self.rondas_consenso = rondas_consenso
+        self._nucleo = elegir_nucleo(nucleo)
+
+        self.num_partidas = num_partidas
+        self.num_agentes = num_agentes
+        self.num_variables = num_variables
+        self.familia = familia
+        self.ratio_conflicto = ratio_conflicto
+        self.literales = literales
+        self.rng = np.random.default_rng(seed)
+        self.banco = banco
+        self._indice_banco = indice_banco
+        if banco is not None and (banco.num_agentes, banco.num_variables) != (num_agentes, num_variables):
+            raise ValueError(f"El banco es de {banco.num_agentes} agentes y {banco.num_variables} variables, "
+                             f"el motor de {num_agentes} y {num_variables}")
+        if banco is not None and literales != LITERALES_POR_CLAUSULA:
+            raise ValueError(f"Los bancos guardan cláusulas de {LITERALES_POR_CLAUSULA} literales, no de {literales}")
+
+        # --- ACCIONES ---
+        if self.tipo_accion == "box":
+            action_space = Box(low=0, high=1, shape=(num_variables,), dtype=np.float32)
+        else:
+            action_space = MultiDiscrete([2] * num_variables)
+
+        # --- OBSERVACIÓN (mismo orden de bloques que los entornos originales) ---
+        if self.tipo_observacion == "compacta":
+            self._identidad = codificar_identidad(np.arange(num_agentes))
+        elif self.tipo_observacion == "agnostica":
+            self._identidad = np.zeros((num_agentes, 0), dtype=np.float32)
+        else:
+            self._identidad = np.eye(num_agentes, dtype=np.float32)
+        self._inicio_tablero = self._identidad.shape[1]
+        if self.tipo_observacion == "mapa":
+            self._fin_tablero = self._inicio_tablero
+        else:
+            self._fin_tablero = self._inicio_tablero + num_variables
+        tamano_obs = tamano_observacion(variante, num_agentes, num_variables, literales)
+
+        observation_space = Box(low=-float("inf"), high=float("inf"), shape=(tamano_obs,), dtype=np.float32)
+        super().__init__(num_partidas * num_agentes, observation_space, action_space)
+
+        # --- ESTADO (todo arrays, nada de diccionarios por agente) ---
+        self.variables = np.zeros((num_partidas, num_agentes, literales), dtype=np.int64)
+        self.signos = np.zeros((num_partidas, num_agentes, literales), dtype=np.int8)
+        self.estado_votacion = np.zeros((num_partidas, num_variables), dtype=np.float32)
+        self.num_pasos = np.zeros(num_partidas, dtype=np.int64)
+        self.rondas_estables = np.zeros(num_partidas, dtype=np.int64)
+        self.ronda_consenso = np.zeros(num_partidas, dtype=np.int64)
+        self._leyes_previas = np.zeros((num_partidas, num_variables), dtype=bool)
+        self._obs = np.zeros((num_partidas, num_agentes, tamano_obs), dtype=np.float32)
+
+        # Resumen de la última partida terminada en cada hueco (para evaluar sin infos por agente)
+        self.ultimas_leyes = np.zeros((num_partidas, num_variables), dtype=np.int8)
+        self.ultimas_satisfechas = np.zeros((num_partidas, num_agentes), dtype=bool)
+        self.ultimos_tableros = np.zeros((num_partidas, num_variables), dtype=np.float32)
+        self.ultimos_cambios = np.zeros(num_partidas, dtype=bool)
+        self.ultimas_terminadas = np.zeros(num_partidas, dtype=bool)
+        self.ultimas_rondas = np.zeros(num_partidas, dtype=np.int64)
+        self.ultimas_rondas_consenso = np.zeros(num_partidas, dtype=np.int64)
+        self._primer_tablero = np.zeros((num_partidas, num_variables), dtype=np.float32)
+
+        self._acciones = None
+        self._infos_vacios = [{} for _ in range(self.num_envs)]
+
+    # --- GENERACIÓN DE PROBLEMAS (k variables distintas por agente, de la familia elegida) o lectura del banco ---
+    def _generar_problemas(self, partidas):
+        n = len(partidas)
+        if self.banco is not None:
+            indices = (self._indice_banco + np.arange(n)) % len(self.banco)
+            self._indice_banco = int((self._indice_banco + n) % len(self.banco))
+            self.variables[partidas], self.signos[partidas] = self.banco.lote(indices)
+        else:
+            self.variables[partidas], self.signos[partidas] = generar_familia(self.rng, self.familia, n, self.num_agentes,
+                                                                              self.num_variables, self.literales,
+                                                                              self.ratio_conflicto)
+
+    # --- PARTE FIJA DE LA OBSERVACIÓN (DNI + cláusulas), se escribe una vez por partida ---
+    def _escribir_parte_fija(self, partidas):
+        obs = self._obs[partidas]
+        obs[:] = 0.0
+        obs[:, :, :self._inicio_tablero] = self._identidad
+
+        variables = self.variables[partidas]
+        signos = self.signos[partidas]
+        bloque = obs[:, :, self._fin_tablero:]
+
+        if self.tipo_observacion == "global":
+            pares = np.stack([variables, signos], axis=-1).reshape(len(partidas), 1, -1)
+            bloque[:] = pares
+        elif self.tipo_observacion == "propia":
+            bloque[:] = np.stack([variables, signos], axis=-1).reshape(len(partidas), self.num_agentes, -1)
+        else:
+            # Mapa posicional: 1 si quiere Sí, -1 si quiere No, 0 el resto
+            idx_partida = np.arange(len(partidas))[:, None, None]
+            idx_agente = np.arange(self.num_agentes)[None, :, None]
+            bloque[idx_partida, idx_agente, variables] = np.where(signos == 1, 1.0, -1.0)
+
+        self._obs[partidas] = obs
+
+    def _reiniciar_partidas(self, partidas, variables=None, signos=None):
+        if variables is None:
+            self._generar_problemas(partidas)
+        else:
+            self.variables[partidas] = variables
+            self.signos[partidas] = signos
+        self.num_pasos[partidas] = 0
+        self.rondas_estables[partidas] = 0
+        self.ronda_consenso[partidas] = 0
+        self.estado_votacion[partidas] = 0.0
+        self._escribir_parte_fija(partidas)
+
+    def _observaciones(self):
+        return self._obs.reshape(self.num_envs, -1).copy()
+
+    # --- API VecEnv ---
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        return self.reiniciar()
+
+    # Reinicio con problemas inyectados (arrays [N, A, 3]) para evaluar
+    def reiniciar(self, variables=None, signos=None):
+        self._reiniciar_partidas(np.arange(self.num_partidas), variables, signos)
+        return self._observaciones()
+
+    def step_async(self, actions):
+        self._acciones = actions
+
+    def step_wait(self):
+        cronometro = perfilado.CRONOMETRO
+        if cronometro is not None:
+            cronometro.iniciar()
+        acciones = np.asarray(self._acciones).reshape(self.num_partidas, self.num_agentes, self.num_variables)
+        self.num_pasos += 1
+
+        # Votos -1/+1 (Box se umbraliza en 0.5; MultiDiscrete ya da 0 o 1), tablero y cláusulas en un solo
+        # núcleo. Las cláusulas solo se comprueban en las partidas que pueden terminar en este paso
+        if self.rondas_consenso is None:
+            pueden_terminar = self.num_pasos >= self.limite_pasos
+        else:
+            pueden_terminar = np.ones(self.num_partidas, dtype=bool)
+        self.estado_votacion, satisfechas_ronda = self._nucleo(acciones, self.variables, self.signos, pueden_terminar)
+        if self._fin_tablero > self._inicio_tablero:
+            if self.tipo_observacion in ("compacta", "agnostica"):
+                tablero = self.estado_votacion / self.num_agentes
+            else:
+                tablero = self.estado_votacion
+            self._obs[:, :, self._inicio_tablero:self._fin_tablero] = tablero[:, None, :]
+
+        # Tablero del primer sondeo, para saber si hubo negociación (hubo_cambios en evaluar.py)
+        primera_ronda = self.num_pasos == 1
+        self._primer_tablero[primera_ronda] = self.estado_votacion[primera_ronda]
+        if cronometro is not None:
+            cronometro.marcar("votacion")
+
+        # Consenso: rondas seguidas con las mismas leyes aprobadas (la primera ronda no tiene con qué comparar)
+        leyes_ronda = self.estado_votacion > 0
+        estable = (self.num_pasos > 1) & (leyes_ronda == self._leyes_previas).all(axis=1)
+        self.rondas_estables = np.where(estable, self.rondas_estables + 1, 0)
+        self.ronda_consenso = np.where(estable, self.ronda_consenso, self.num_pasos)
+        self._leyes_previas = leyes_ronda
+
+        terminadas = self.num_pasos >= self.limite_pasos
+        if self.rondas_consenso is not None:
+            terminadas |= self.rondas_estables >= self.rondas_consenso
+        self.ultimas_terminadas = terminadas
+        recompensas = np.zeros((self.num_partidas, self.num_agentes), dtype=np.float32)
+
+        if terminadas.any():
+            leyes = (self.estado_votacion[terminadas] > 0).astype(np.int8)
+            satisfechas = satisfechas_ronda[terminadas]
+
+            if self.tipo_recompensa == "egoista":
+                recompensas[terminadas] = recompensa_egoista(satisfechas)
+            elif self.tipo_recompensa == "media":
+                recompensas[terminadas] = recompensa_media(satisfechas)
+            else:
+                recompensas[terminadas] = recompensa_cooperativa(satisfechas)
+
+            self.ultimas_leyes[terminadas] = leyes
+            self.ultimas_satisfechas[terminadas] = satisfechas
+            self.ultimos_tableros[terminadas] = self.estado_votacion[terminadas]
+            self.ultimos_cambios[terminadas] = (self.estado_votacion[terminadas] != self._primer_tablero[terminadas]).any(axis=1)
+            self.ultimas_rondas[terminadas] = self.num_pasos[terminadas]
+            self.ultimas_rondas_consenso[terminadas] = self.ronda_consenso[terminadas]
+
+        if cronometro is not None:
+            cronometro.marcar("recompensa")
+
+        dones = np.repeat(terminadas, self.num_agentes)
+        if terminadas.any():
+            obs_terminales = self._obs.reshape(self.num_envs, -1).copy()
+            infos = [{} for _ in range(self.num_envs)]
+            for idx in np.flatnonzero(dones):
+                infos[idx]["terminal_observation"] = obs_terminales[idx]
+            # Auto-reset estilo SB3: las partidas terminadas empiezan de nuevo
+            self._reiniciar_partidas(np.flatnonzero(terminadas))
+        else:
+            infos = self._infos_vacios
+        if cronometro is not None:
+            cronometro.marcar("reinicio")
+
+        obs = self._observaciones()
+        if cronometro is not None:
+            cronometro.marcar("observacion")
+        return obs, recompensas.reshape(-1), dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(self, method_name)(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
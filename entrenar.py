@@ -1,12 +1,96 @@
 import os
+import argparse
+import importlib
+from functools import partial
+import numpy as np
 import gymnasium as gym
-import supersuit as ss
+from supersuit.vector import ConcatVecEnv, MarkovVectorEnv
+from supersuit.vector.sb3_vector_wrapper import SB3VecEnvWrapper
 from stable_baselines3 import PPO
-from stable_baselines3.common.callbacks import CheckpointCallback
+from stable_baselines3.common.callbacks import CallbackList
 
 from mi_entorno_3sat_observacion import Entorno3SAT
+from entorno_vectorizado import MODULOS_ENTORNO, VARIANTES, Entorno3SATVectorizado
+from entorno_multiproceso import CallbackRendimiento, VecEnvMultiproceso
+from perfilado import CallbackPerfilado, VecEnvCronometrado, activar_perfilado
+from banco_instancias import BancoInstancias
+from almacen_checkpoints import AlmacenCheckpoints, CallbackCheckpoints
+from evaluacion_periodica import CallbackEvaluacion
+from clausulas import FAMILIAS, generar_instancias
 
-def entrenar():
+# Referencia: el entrenamiento original (1 copia de 40 agentes, n_steps=2048, batch_size=2048).
+# Con más entornos se mantiene el tamaño de cada actualización y el número de minilotes,
+# así que n_steps baja y batch_size se queda en 2048 aunque se usen 32 núcleos.
+PASOS_POR_ACTUALIZACION = 2048 * 40
+MINILOTES_POR_EPOCA = 40
+# Checkpoint cada 100.000 llamadas con 40 entornos = cada 4M pasos, igual con cualquier número de entornos
+# (almacen_checkpoints.py: solo el actor de los intermedios y el estado completo de los últimos)
+PASOS_ENTRE_CHECKPOINTS = 100_000 * 40
+# Semilla del banco de evaluación: problemas fijos y distintos de los del entrenamiento
+SEMILLA_EVALUACION = 2024
+
+def escalar_hiperparametros(num_envs):
+    n_steps = max(1, PASOS_POR_ACTUALIZACION // num_envs)
+    batch_size = max(1, n_steps * num_envs // MINILOTES_POR_EPOCA)
+    return n_steps, batch_size
+
+# --- VECENV DE SUPERSUIT CON SEMILLA ---
+# El envoltorio SB3 de SuperSuit no implementa seed() (PPO(seed=...) lo llama y falla): aquí la semilla se
+# guarda y se pasa al siguiente reset, como en los VecEnv de SB3. La copia i usa semilla + i.
+class VecEnvSuperSuit(SB3VecEnvWrapper):
+    _semilla = None
+
+    def seed(self, seed=None):
+        self._semilla = seed
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def reset(self, seed=None, options=None):
+        seed = self._semilla if seed is None else seed
+        self._semilla = None
+        observations, self.reset_infos = self.venv.reset(seed=seed, options=options)
+        return observations
+
+# --- UN VECENV (lo que corre dentro de cada proceso trabajador) ---
+# Motor por lotes: "copias" partidas como arrays en un solo VecEnv (sin SuperSuit)
+# PettingZoo + SuperSuit: "copias" entornos concatenados en el mismo proceso
+# variante: voto_3sat_v4_egoista por defecto; voto_3sat_v5_poblacion para miles de agentes (observación de tamaño fijo)
+# familia: problemas de clausulas.generar_familia (solo con el motor; PettingZoo genera siempre aleatorios)
+# indice_banco / tramo_banco: primera instancia del banco y cuántas le tocan a este VecEnv (por defecto, todo
+# el banco); con PettingZoo las copias se reparten el tramo a partes iguales
+# limite_pasos / rondas_consenso: rondas por partida y parada por consenso (None = como la variante)
+def crear_entorno(num_agentes, num_variables, copias=1, usar_motor=False, ruta_banco=None, semilla=None, indice_banco=0,
+                  perfilar=False, variante=Entorno3SAT.metadata["name"], familia="aleatoria", ratio_conflicto=0.4,
+                  limite_pasos=None, rondas_consenso=None, tramo_banco=None):
+    if perfilar:
+        activar_perfilado() # En el proceso que ejecuta el entorno (el principal o cada trabajador)
+    banco = BancoInstancias(ruta_banco) if ruta_banco else None
+    if usar_motor:
+        return Entorno3SATVectorizado(num_partidas=copias, num_agentes=num_agentes, num_variables=num_variables,
+                                      variante=variante, seed=semilla, banco=banco,
+                                      indice_banco=indice_banco, familia=familia, ratio_conflicto=ratio_conflicto,
+                                      limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+    if familia != "aleatoria" and banco is None:
+        # Con banco la familia no cuenta: los problemas salen del banco
+        raise ValueError(f"La familia {familia} necesita el motor por lotes (--motor)")
+    clase_entorno = importlib.import_module(MODULOS_ENTORNO[variante]).Entorno3SAT
+    # Copias construidas una a una (concat_vec_envs_v1 hace copias profundas de un solo entorno): con banco,
+    # la copia i empieza tramo * i instancias más allá, así que no juegan las mismas partidas a la vez
+    tramo = (tramo_banco or len(banco)) // copias if banco is not None else 0
+    def copia(i):
+        env = clase_entorno(num_agentes=num_agentes, num_variables=num_variables, banco=banco,
+                            indice_banco=(indice_banco + i * tramo) % len(banco) if banco is not None else 0,
+                            limite_pasos=limite_pasos or VARIANTES[variante]["limite_pasos"],
+                            rondas_consenso=rondas_consenso)
+        return MarkovVectorEnv(env)
+    env = VecEnvSuperSuit(ConcatVecEnv([partial(copia, i) for i in range(copias)]))
+    env.seed(semilla) # El primer reset (en el trabajador) ya usa la semilla
+    return env
+
+def entrenar(num_procesos=1, copias_por_proceso=1, usar_motor=False, num_agentes=40, num_variables=10,
+             total_timesteps=10_000_000, ruta_banco=None, semilla=None, perfilar=False,
+             variante=Entorno3SAT.metadata["name"], modelo_inicial=None, conservar_ultimos=5, conservar_mejores=3,
+             conservar_completos=2, evaluar_cada=0, partidas_evaluacion=2_000, paciencia=5, ruta_banco_evaluacion=None,
+             familia="aleatoria", ratio_conflicto=0.4, limite_pasos=None, rondas_consenso=None):
     # 1. Configuración de carpetas
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     LOG_DIR = os.path.join(BASE_DIR, "logs")
@@ -15,54 +99,137 @@ def entrenar():
     os.makedirs(MODEL_DIR, exist_ok=True)
 
     # 2. CONFIGURACIÓN DE TIEMPO (FUERZA BRUTA)
-    NUM_AGENTES = 40
-    NUM_VARIABLES = 10
-    
-    # 3 MILLONES de pasos. 
-    # En un PC normal esto son unas 3-4 horas. 
-    # Es suficiente para ver resultados muy sólidos.
-    TOTAL_TIMESTEPS = 10_000_000 
-
+    # 10 MILLONES de pasos por defecto.
+    # En un PC normal, con un solo proceso, esto son unas 3-4 horas.
+    # Con --procesos N el tiempo baja casi linealmente con los núcleos.
     print(f"--- ENTRENAMIENTO BLINDADO (Sin paradas) ---")
-    print(f"   > Objetivo: {TOTAL_TIMESTEPS} pasos.")
+    print(f"   > Objetivo: {total_timesteps} pasos.")
+    print(f"   > Entorno: {variante} con {num_agentes} agentes")
+    print(f"   > Procesos: {num_procesos} x {copias_por_proceso} copias ({'motor por lotes' if usar_motor else 'SuperSuit'})")
     print(f"   > Guardando en: {MODEL_DIR}")
 
     # 3. Entorno
-    env = Entorno3SAT(num_agentes=NUM_AGENTES, num_variables=NUM_VARIABLES)
-    env = ss.pettingzoo_env_to_vec_env_v1(env)
-    env = ss.concat_vec_envs_v1(env, num_vec_envs=1, num_cpus=1, base_class="stable_baselines3")
+    if num_procesos == 1:
+        env = crear_entorno(num_agentes, num_variables, copias_por_proceso, usar_motor, ruta_banco, semilla,
+                            perfilar=perfilar, variante=variante, familia=familia, ratio_conflicto=ratio_conflicto,
+                            limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+    else:
+        # Semillas independientes por proceso y, con banco, cada proceso empieza en un tramo distinto
+        semillas = [None] * num_procesos
+        if semilla is not None:
+            semillas = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(semilla).spawn(num_procesos)]
+        tamano_banco = len(BancoInstancias(ruta_banco)) if ruta_banco else 0
+        env = VecEnvMultiproceso([
+            partial(crear_entorno, num_agentes, num_variables, copias_por_proceso, usar_motor, ruta_banco,
+                    semillas[i], i * tamano_banco // num_procesos, perfilar=perfilar,
+                    variante=variante, familia=familia, ratio_conflicto=ratio_conflicto, limite_pasos=limite_pasos,
+                    rondas_consenso=rondas_consenso, tramo_banco=tamano_banco // num_procesos)
+            for i in range(num_procesos)
+        ])
+
+    callbacks = [CallbackRendimiento()]
+    if perfilar:
+        # Tiempo de step visto por PPO, para separar envoltorios/tuberías de las fases del entorno
+        env = VecEnvCronometrado(env)
+        callbacks.append(CallbackPerfilado())
+
+    n_steps, batch_size = escalar_hiperparametros(env.num_envs)
+    print(f"   > {env.num_envs} entornos: n_steps={n_steps}, batch_size={batch_size}")
 
     # 4. El Cerebro
-    model = PPO(
-        "MlpPolicy", 
-        env, 
-        verbose=1,
-        tensorboard_log=LOG_DIR,
-        learning_rate=0.0003,
-        batch_size=2048,        # Aumentamos el batch para más estabilidad
-        n_steps=2048,           # Pasos por actualización
-        gamma=0.99,
-        ent_coef=0.01           # Vital para que exploren
-    )
-
-    # 5. Guardado de seguridad cada 100.000 pasos
-    checkpoint_callback = CheckpointCallback(        save_freq=100_000, 
-        save_path=MODEL_DIR, 
-        name_prefix="ppo_3sat_larga_duracion"
-    )
+    if modelo_inicial:
+        # Afinado: con voto_3sat_v6_agnostico la observación no depende del número de agentes,
+        # así que un checkpoint entrenado con 5 agentes se carga sin cambios en un entorno de 1.000
+        model = PPO.load(modelo_inicial, env=env, tensorboard_log=LOG_DIR, n_steps=n_steps, batch_size=batch_size)
+        print(f"   > Continuando desde: {modelo_inicial}")
+    else:
+        model = PPO(
+            "MlpPolicy",
+            env,
+            verbose=1,
+            tensorboard_log=LOG_DIR,
+            learning_rate=0.0003,
+            batch_size=batch_size,  # 2048 con la configuración original: más estabilidad
+            n_steps=n_steps,        # Pasos por actualización (por entorno)
+            gamma=0.99,
+            ent_coef=0.01,          # Vital para que exploren
+            seed=semilla
+        )
+
+    # 5. Guardado de seguridad en segundo plano, con retención (índice en modelos/ppo_3sat_larga_duracion_indice.json)
+    almacen = AlmacenCheckpoints(MODEL_DIR, "ppo_3sat_larga_duracion", conservar_ultimos, conservar_mejores,
+                                 conservar_completos, continuar=bool(modelo_inicial))
+    checkpoint_callback = CallbackCheckpoints(almacen, PASOS_ENTRE_CHECKPOINTS)
+
+    # 6. Evaluación periódica con parada temprana (opcional)
+    # Un nombre por configuración: entrenar otra variante u otro número de agentes no pisa el mejor de antes
+    ruta_mejor = os.path.join(MODEL_DIR, f"ppo_3sat_mejor_{variante}_{num_agentes}agentes.zip")
+    if evaluar_cada:
+        if ruta_banco_evaluacion:
+            banco_evaluacion = BancoInstancias(ruta_banco_evaluacion)
+            if (banco_evaluacion.num_agentes, banco_evaluacion.num_variables) != (num_agentes, num_variables):
+                raise ValueError(f"El banco de evaluación es de {banco_evaluacion.num_agentes} agentes y "
+                                 f"{banco_evaluacion.num_variables} variables")
+            variables, signos = banco_evaluacion.lote(np.arange(min(partidas_evaluacion, len(banco_evaluacion))))
+        else:
+            variables, signos = generar_instancias(np.random.default_rng(SEMILLA_EVALUACION), partidas_evaluacion,
+                                                   num_agentes, num_variables)
+        callbacks.append(CallbackEvaluacion(variables, signos, num_variables, variante, evaluar_cada, paciencia,
+                                            ruta_mejor=ruta_mejor, almacen=almacen, limite_pasos=limite_pasos,
+                                            rondas_consenso=rondas_consenso))
+        print(f"   > Evaluando cada {evaluar_cada} pasos con {len(variables)} partidas fijas (paciencia {paciencia})")
 
     print("🚀 Entrenando... (Volveré dentro de unas horas)")
-    model.learn(total_timesteps=TOTAL_TIMESTEPS, callback=checkpoint_callback)
+    model.learn(total_timesteps=total_timesteps, callback=CallbackList([checkpoint_callback] + callbacks))
+    almacen.cerrar()
+    env.close()
 
-    # 6. Guardado Final
-    nombre_final = "ppo_3sat_final_40agentes" # Usamos el mismo nombre para que evaluar.py lo encuentre fácil
+    # 7. Guardado Final
+    # Como ruta_mejor: un nombre por variante y número de agentes (evaluar2.py busca el de v4 con 40)
+    nombre_final = f"ppo_3sat_final_{variante}_{num_agentes}agentes"
     ruta_final = os.path.join(MODEL_DIR, nombre_final)
     model.save(ruta_final)
-    
+
     print("---------------------------------------------------------")
     print(f"¡TERMINADO! Modelo guardado en: {ruta_final}.zip")
+    if evaluar_cada:
+        print(f"🏅 Mejor modelo en la evaluación: {ruta_mejor}")
     print("Ahora sí, ejecuta evaluar.py y verás la magia.")
     print("---------------------------------------------------------")
 
 if __name__ == "__main__":
-    entrenar()
+    parser = argparse.ArgumentParser(description="Entrenamiento PPO del entorno de votación 3-SAT")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos trabajadores (uno por núcleo)")
+    parser.add_argument("--copias", type=int, default=1, help="Copias del entorno (partidas) por proceso")
+    parser.add_argument("--motor", action="store_true", help="Usar el motor por lotes en vez de PettingZoo + SuperSuit")
+    parser.add_argument("--variante", default=Entorno3SAT.metadata["name"], choices=list(MODULOS_ENTORNO),
+                        help="voto_3sat_v5_poblacion: observación de tamaño fijo para 1.000-10.000 agentes; "
+                             "voto_3sat_v6_agnostico: un mismo modelo para cualquier número de agentes")
+    parser.add_argument("--agentes", type=int, default=40)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--pasos", type=int, default=10_000_000)
+    parser.add_argument("--banco", default=None, help="Carpeta de un banco de instancias (python banco_instancias.py ...)")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--continuar", default=None, help="Checkpoint .zip desde el que seguir entrenando (afinado)")
+    parser.add_argument("--perfilar", action="store_true", help="Medir fases del entorno y rollout vs optimización")
+    parser.add_argument("--conservar-ultimos", type=int, default=5, help="Checkpoints más recientes que se conservan")
+    parser.add_argument("--conservar-mejores", type=int, default=3, help="Checkpoints con mejor puntuación que se conservan")
+    parser.add_argument("--conservar-completos", type=int, default=2,
+                        help="Últimos checkpoints con estado completo (optimizador incluido) para poder continuar")
+    parser.add_argument("--evaluar-cada", type=int, default=0,
+                        help="Pasos entre evaluaciones con partidas fijas (0 = sin evaluación ni parada temprana)")
+    parser.add_argument("--partidas-evaluacion", type=int, default=2_000)
+    parser.add_argument("--paciencia", type=int, default=5, help="Evaluaciones seguidas sin mejorar antes de parar")
+    parser.add_argument("--banco-evaluacion", default=None, help="Banco de instancias para evaluar (por defecto, generado)")
+    parser.add_argument("--familia", default="aleatoria", choices=FAMILIAS,
+                        help="Problemas de entrenamiento con el motor: aleatoria, utopia o conflicto")
+    parser.add_argument("--ratio-conflicto", type=float, default=0.4)
+    parser.add_argument("--rondas", type=int, default=None, help="Rondas máximas por partida (por defecto, las de la variante)")
+    parser.add_argument("--consenso", type=int, default=None,
+                        help="Terminar la partida cuando el resultado se repite estas rondas seguidas")
+    args = parser.parse_args()
+
+    entrenar(args.procesos, args.copias, args.motor, args.agentes, args.variables, args.pasos, args.banco, args.semilla,
+             args.perfilar, args.variante, args.continuar, args.conservar_ultimos, args.conservar_mejores,
+             args.conservar_completos, args.evaluar_cada, args.partidas_evaluacion, args.paciencia,
+             args.banco_evaluacion, args.familia, args.ratio_conflicto, args.rondas, args.consenso)
@@ -0,0 +1,320 @@
+import os
+import math
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+
+from entorno_vectorizado import Entorno3SATVectorizado, VARIANTES
+from nucleo_votacion import limitar_hilos
+from oraculo_maxsat import optimos_maxsat, ratio_aproximacion
+from trazas import GrabadorTrazas
+
+# ==========================================
+# 1. TRABAJADOR (un modelo y un motor por proceso)
+# ==========================================
+_MODELO = None
+_CONFIG = None
+
+def _iniciar_trabajador(ruta_modelo, config, servidor=None):
+    global _MODELO, _CONFIG
+    _CONFIG = config
+    limitar_hilos(1) # Un hilo de Numba por proceso: el paralelismo lo pone el pool
+    if servidor is not None:
+        # Modelo ya cargado en servidor_inferencia.py: el trabajador ni importa torch ni lee el zip
+        from servidor_inferencia import ClienteInferencia
+        _MODELO = ClienteInferencia(servidor, ruta_modelo)
+        return
+    if ruta_modelo.endswith(".npz"):
+        # Actor exportado con politica_numpy.py: se carga en milisegundos y predice sin torch
+        from politica_numpy import PoliticaNumpy
+        _MODELO = PoliticaNumpy(ruta_modelo)
+        return
+    import torch
+    from stable_baselines3 import PPO
+    torch.set_num_threads(1) # Un hilo por proceso: el paralelismo lo pone el pool
+    _MODELO = PPO.load(ruta_modelo, device="cpu")
+
+# Juega num_partidas con el motor por lotes y devuelve arrays por partida
+# Con con_optimo también se resuelve cada problema con el oráculo MAX-3SAT exacto
+# Con grabador (trazas.GrabadorTrazas) se guarda además la traza completa de cada partida
+# limite_pasos / rondas_consenso: duración de las partidas (ver Entorno3SATVectorizado)
+def jugar_partidas(model, num_partidas, num_agentes, num_variables, variante, semilla, partidas_por_lote=256,
+                   con_optimo=False, grabador=None, limite_pasos=None, rondas_consenso=None):
+    env = Entorno3SATVectorizado(num_partidas=min(partidas_por_lote, num_partidas), num_agentes=num_agentes,
+                                 num_variables=num_variables, variante=variante, seed=semilla,
+                                 limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+    exitos, satisfechas, cambios, rondas_jugadas, consensos, optimos = [], [], [], [], [], []
+    jugadas = 0
+
+    obs = env.reset()
+    # Copia del problema de cada hueco: el auto-reset del motor lo sobrescribe al terminar
+    problemas_variables, problemas_signos = env.variables.copy(), env.signos.copy()
+    if grabador is not None:
+        # Rondas de cada hueco hasta que termina: voto binario por agente y tablero
+        huecos = np.arange(env.num_partidas)
+        votos_partida = np.zeros((env.num_partidas, env.limite_pasos, num_agentes, num_variables), dtype=bool)
+        tableros_partida = np.zeros((env.num_partidas, env.limite_pasos, num_variables), dtype=np.float32)
+
+    while jugadas < num_partidas:
+        acciones, _ = model.predict(obs, deterministic=True)
+        rondas = env.num_pasos.copy()
+        obs, recompensas, dones, infos = env.step(acciones)
+
+        terminadas = env.ultimas_terminadas
+        if grabador is not None:
+            votos_partida[huecos, rondas] = np.asarray(acciones).reshape(env.num_partidas, num_agentes, num_variables) > 0.5
+            # Las terminadas ya se reiniciaron: su último tablero está en ultimos_tableros
+            tableros_partida[huecos, rondas] = np.where(terminadas[:, None], env.ultimos_tableros, env.estado_votacion)
+
+        if terminadas.any():
+            if grabador is not None:
+                guardar = np.flatnonzero(terminadas)[:num_partidas - jugadas]
+                grabador.anadir(problemas_variables[guardar], problemas_signos[guardar], votos_partida[guardar],
+                                tableros_partida[guardar], env.ultimas_leyes[guardar],
+                                recompensas.reshape(env.num_partidas, env.num_agentes)[guardar], rondas[guardar] + 1)
+                votos_partida[terminadas] = False
+                tableros_partida[terminadas] = 0.0
+
+            # Éxito si se cumplen las cláusulas de todos los agentes. No se mira la recompensa: con la
+            # cooperativa (20 por cláusula cumplida) y más de 5 agentes, 100 puntos no significan eso
+            exitos.append(env.ultimas_satisfechas[terminadas].all(axis=1))
+            satisfechas.append(env.ultimas_satisfechas[terminadas].sum(axis=1))
+            cambios.append(env.ultimos_cambios[terminadas])
+            rondas_jugadas.append(env.ultimas_rondas[terminadas])
+            consensos.append(env.ultimas_rondas_consenso[terminadas])
+            jugadas += int(terminadas.sum())
+
+            if con_optimo:
+                optimos.append(optimos_maxsat(problemas_variables[terminadas], problemas_signos[terminadas], num_variables))
+            if con_optimo or grabador is not None:
+                problemas_variables[terminadas] = env.variables[terminadas]
+                problemas_signos[terminadas] = env.signos[terminadas]
+
+    resultado = {
+        "exitos": np.concatenate(exitos)[:num_partidas],
+        "satisfechas": np.concatenate(satisfechas)[:num_partidas],
+        "cambios": np.concatenate(cambios)[:num_partidas],
+        "rondas": np.concatenate(rondas_jugadas)[:num_partidas],
+        "rondas_consenso": np.concatenate(consensos)[:num_partidas],
+    }
+    if con_optimo:
+        resultado["optimos"] = np.concatenate(optimos)[:num_partidas]
+    return resultado
+
+# Juega un banco fijo de problemas (variables/signos [M, A, 3]): misma partida para todos los modelos.
+# Los óptimos del banco se pueden pasar ya calculados (son los mismos para cualquier modelo).
+def jugar_banco(model, variables, signos, num_variables, variante, partidas_por_lote=256, optimos=None,
+                limite_pasos=None, rondas_consenso=None):
+    total, num_agentes = variables.shape[:2]
+    exitos = np.zeros(total, dtype=bool)
+    satisfechas = np.zeros(total, dtype=np.int64)
+    cambios = np.zeros(total, dtype=bool)
+    rondas = np.zeros(total, dtype=np.int64)
+    consenso = np.zeros(total, dtype=np.int64)
+
+    for inicio in range(0, total, partidas_por_lote):
+        fin = min(total, inicio + partidas_por_lote)
+        env = Entorno3SATVectorizado(num_partidas=fin - inicio, num_agentes=num_agentes,
+                                     num_variables=num_variables, variante=variante, limite_pasos=limite_pasos,
+                                     rondas_consenso=rondas_consenso)
+        obs = env.reiniciar(variables[inicio:fin], signos[inicio:fin])
+        pendientes = np.ones(fin - inicio, dtype=bool)
+
+        while pendientes.any():
+            acciones, _ = model.predict(obs, deterministic=True)
+            obs, recompensas, dones, infos = env.step(acciones)
+
+            # Solo cuenta la primera vez que termina cada hueco (luego el motor juega problemas nuevos)
+            nuevas = env.ultimas_terminadas & pendientes
+            if nuevas.any():
+                exitos[inicio:fin][nuevas] = env.ultimas_satisfechas[nuevas].all(axis=1)
+                satisfechas[inicio:fin][nuevas] = env.ultimas_satisfechas[nuevas].sum(axis=1)
+                cambios[inicio:fin][nuevas] = env.ultimos_cambios[nuevas]
+                rondas[inicio:fin][nuevas] = env.ultimas_rondas[nuevas]
+                consenso[inicio:fin][nuevas] = env.ultimas_rondas_consenso[nuevas]
+                pendientes &= ~nuevas
+
+    resultado = {"exitos": exitos, "satisfechas": satisfechas, "cambios": cambios, "rondas": rondas,
+                 "rondas_consenso": consenso}
+    if optimos is not None:
+        resultado["optimos"] = optimos
+    return resultado
+
+def _evaluar_bloque(tarea):
+    semilla, num_partidas, ruta_trazas = tarea
+    if ruta_trazas is None:
+        return jugar_partidas(_MODELO, num_partidas, semilla=semilla, **_CONFIG)
+    # Cada bloque graba en su propia carpeta: LectorTrazas las lee todas juntas desde la carpeta madre
+    limite_pasos = _CONFIG["limite_pasos"] or VARIANTES[_CONFIG["variante"]]["limite_pasos"]
+    with GrabadorTrazas(ruta_trazas, _CONFIG["num_agentes"], _CONFIG["num_variables"], limite_pasos,
+                        _CONFIG["variante"]) as grabador:
+        return jugar_partidas(_MODELO, num_partidas, semilla=semilla, grabador=grabador, **_CONFIG)
+
+
+# ==========================================
+# 2. ESTADÍSTICAS CON INTERVALOS DE CONFIANZA
+# ==========================================
+Z_95 = 1.959963984540054
+
+# Intervalo de Wilson para una proporción (tasa de éxito, tasa de negociación)
+def intervalo_wilson(aciertos, total, z=Z_95):
+    if total == 0:
+        return 0.0, 0.0, 1.0
+    p = aciertos / total
+    denominador = 1 + z * z / total
+    centro = (p + z * z / (2 * total)) / denominador
+    margen = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominador
+    return p, max(0.0, centro - margen), min(1.0, centro + margen)
+
+# Intervalo normal para una media (cláusulas satisfechas)
+def intervalo_media(suma, suma_cuadrados, total, z=Z_95):
+    if total == 0:
+        return 0.0, 0.0, 0.0
+    media = suma / total
+    varianza = max(0.0, suma_cuadrados / total - media * media) * total / max(1, total - 1)
+    margen = z * math.sqrt(varianza / total)
+    return media, media - margen, media + margen
+
+class Acumulador:
+    def __init__(self):
+        self.total = 0
+        self.exitos = 0
+        self.cambios = 0
+        self.suma_satisfechas = 0.0
+        self.suma_cuadrados = 0.0
+        self.suma_rondas = 0.0
+        self.suma_rondas_cuadrados = 0.0
+        self.suma_consenso = 0.0
+        self.suma_consenso_cuadrados = 0.0
+        self.con_optimo = False
+        self.partidas_optimas = 0
+        self.suma_ratios = 0.0
+        self.suma_ratios_cuadrados = 0.0
+
+    def anadir(self, bloque):
+        self.total += len(bloque["exitos"])
+        self.exitos += int(bloque["exitos"].sum())
+        self.cambios += int(bloque["cambios"].sum())
+        satisfechas = bloque["satisfechas"].astype(np.float64)
+        self.suma_satisfechas += float(satisfechas.sum())
+        self.suma_cuadrados += float((satisfechas ** 2).sum())
+        rondas = bloque["rondas"].astype(np.float64)
+        self.suma_rondas += float(rondas.sum())
+        self.suma_rondas_cuadrados += float((rondas ** 2).sum())
+        consenso = bloque["rondas_consenso"].astype(np.float64)
+        self.suma_consenso += float(consenso.sum())
+        self.suma_consenso_cuadrados += float((consenso ** 2).sum())
+
+        if "optimos" in bloque:
+            self.con_optimo = True
+            ratios = ratio_aproximacion(satisfechas, bloque["optimos"])
+            self.partidas_optimas += int((bloque["satisfechas"] >= bloque["optimos"]).sum())
+            self.suma_ratios += float(ratios.sum())
+            self.suma_ratios_cuadrados += float((ratios ** 2).sum())
+
+    def resumen(self):
+        resumen = {
+            "partidas": self.total,
+            "tasa_exito": intervalo_wilson(self.exitos, self.total),
+            "clausulas_satisfechas": intervalo_media(self.suma_satisfechas, self.suma_cuadrados, self.total),
+            "tasa_negociacion": intervalo_wilson(self.cambios, self.total),
+            "rondas": intervalo_media(self.suma_rondas, self.suma_rondas_cuadrados, self.total),
+            "rondas_consenso": intervalo_media(self.suma_consenso, self.suma_consenso_cuadrados, self.total),
+        }
+        if self.con_optimo:
+            resumen["ratio_aproximacion"] = intervalo_media(self.suma_ratios, self.suma_ratios_cuadrados, self.total)
+            resumen["tasa_optimo"] = intervalo_wilson(self.partidas_optimas, self.total)
+        return resumen
+
+
+# ==========================================
+# 3. EVALUACIÓN PARALELA
+# ==========================================
+# Reparte total_partidas en bloques con semillas independientes (SeedSequence.spawn):
+# el resultado solo depende de semilla y tamano_bloque, no del número de procesos.
+# Si tolerancia está definida, para en cuanto el IC de la tasa de éxito mide menos de ±tolerancia.
+# Con ruta_trazas, cada bloque guarda sus partidas en ruta_trazas/bloque_XXXXX (trazas.py).
+# Con servidor (socket de servidor_inferencia.py), los trabajadores piden las acciones al modelo ya cargado.
+def evaluar_masivo(ruta_modelo, total_partidas=10_000, num_agentes=5, num_variables=10, variante="voto_3sat_v3",
+                   num_procesos=None, tamano_bloque=2_000, semilla=0, tolerancia=None, con_optimo=False,
+                   ruta_trazas=None, servidor=None, limite_pasos=None, rondas_consenso=None):
+    num_procesos = num_procesos or os.cpu_count()
+    config = {"num_agentes": num_agentes, "num_variables": num_variables, "variante": variante, "con_optimo": con_optimo,
+              "limite_pasos": limite_pasos, "rondas_consenso": rondas_consenso}
+
+    num_bloques = math.ceil(total_partidas / tamano_bloque)
+    semillas = np.random.SeedSequence(semilla).spawn(num_bloques)
+    tareas = [
+        (int(s.generate_state(1)[0]), min(tamano_bloque, total_partidas - i * tamano_bloque),
+         os.path.join(ruta_trazas, f"bloque_{i:05d}") if ruta_trazas else None)
+        for i, s in enumerate(semillas)
+    ]
+
+    acumulador = Acumulador()
+    parada_temprana = False
+    inicio = time.perf_counter()
+
+    with mp.get_context("spawn").Pool(num_procesos, initializer=_iniciar_trabajador, initargs=(ruta_modelo, config, servidor)) as pool:
+        # imap (ordenado) para que la parada temprana también sea reproducible
+        for bloque in pool.imap(_evaluar_bloque, tareas):
+            acumulador.anadir(bloque)
+            if tolerancia is not None:
+                _, bajo, alto = acumulador.resumen()["tasa_exito"]
+                if (alto - bajo) / 2 <= tolerancia:
+                    parada_temprana = True
+                    pool.terminate()
+                    break
+
+    resumen = acumulador.resumen()
+    resumen["segundos"] = time.perf_counter() - inicio
+    resumen["parada_temprana"] = parada_temprana
+    return resumen
+
+def imprimir_resumen(resumen):
+    p, bajo, alto = resumen["tasa_exito"]
+    m, m_bajo, m_alto = resumen["clausulas_satisfechas"]
+    n, n_bajo, n_alto = resumen["tasa_negociacion"]
+    r, r_bajo, r_alto = resumen["rondas"]
+    c, c_bajo, c_alto = resumen["rondas_consenso"]
+    print(f"\nRESULTADOS ({resumen['partidas']} partidas en {resumen['segundos']:.1f} s):")
+    print(f"---------------------------------------")
+    print(f"✅ Tasa de Éxito:         {p:.2%}  IC95 [{bajo:.2%}, {alto:.2%}]")
+    print(f"📜 Cláusulas satisfechas: {m:.3f}  IC95 [{m_bajo:.3f}, {m_alto:.3f}]")
+    print(f"🤝 Tasa de Negociación:   {n:.2%}  IC95 [{n_bajo:.2%}, {n_alto:.2%}]")
+    print(f"🔁 Rondas jugadas:        {r:.2f}  IC95 [{r_bajo:.2f}, {r_alto:.2f}]")
+    print(f"🕊️  Rondas hasta consenso: {c:.2f}  IC95 [{c_bajo:.2f}, {c_alto:.2f}]")
+    if "ratio_aproximacion" in resumen:
+        r, r_bajo, r_alto = resumen["ratio_aproximacion"]
+        o, o_bajo, o_alto = resumen["tasa_optimo"]
+        print(f"🎯 Ratio de aproximación: {r:.4f}  IC95 [{r_bajo:.4f}, {r_alto:.4f}]")
+        print(f"🏁 Partidas en el óptimo: {o:.2%}  IC95 [{o_bajo:.2%}, {o_alto:.2%}]")
+    if resumen["parada_temprana"]:
+        print(f"⏹️  Parada temprana: intervalo suficientemente estrecho")
+    print(f"---------------------------------------")
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Evaluación masiva y paralela de un modelo PPO")
+    parser.add_argument("--modelo", default=os.path.join(BASE_DIR, "modelos", "ppo_3sat_final_v1.zip"),
+                        help="Zip de PPO o .npz exportado con politica_numpy.py")
+    parser.add_argument("--variante", default="voto_3sat_v3")
+    parser.add_argument("--agentes", type=int, default=5)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--partidas", type=int, default=10_000)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--bloque", type=int, default=2_000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--tolerancia", type=float, default=None, help="Semiancho del IC de éxito para parar antes")
+    parser.add_argument("--optimo", action="store_true", help="Comparar cada partida con el óptimo MAX-3SAT exacto")
+    parser.add_argument("--trazas", default=None, help="Carpeta donde grabar la traza de cada partida (trazas.py)")
+    parser.add_argument("--servidor", default=None, help="Socket de servidor_inferencia.py en vez de cargar el modelo")
+    parser.add_argument("--rondas", type=int, default=None, help="Rondas máximas por partida (por defecto, las de la variante)")
+    parser.add_argument("--consenso", type=int, default=None,
+                        help="Terminar la partida cuando el resultado se repite estas rondas seguidas")
+    args = parser.parse_args()
+
+    resumen = evaluar_masivo(args.modelo, args.partidas, args.agentes, args.variables, args.variante,
+                             args.procesos, args.bloque, args.semilla, args.tolerancia, args.optimo, args.trazas,
+                             args.servidor, args.rondas, args.consenso)
+    imprimir_resumen(resumen)
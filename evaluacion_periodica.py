@@ -0,0 +1,93 @@
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+from evaluacion_masiva import jugar_banco
+
+# ==========================================
+# EVALUACIÓN DURANTE EL ENTRENAMIENTO + PARADA POR ESTANCAMIENTO
+# ==========================================
+# Cada pasos_entre_evaluaciones juega el banco fijo de problemas (variables/signos [M, A, 3], siempre
+# los mismos y distintos de los de entrenamiento) con el motor por lotes: un predict por ronda para
+# las M partidas, en vez de una partida cada vez como EvalCallback de SB3.
+# Puntuación = fracción media de cláusulas satisfechas (1.0 = éxito en todas las partidas). No la tasa de
+# éxito: con muchos agentes se queda en 0 durante millones de pasos mientras las cláusulas van subiendo, y
+# la paciencia pararía el entrenamiento sin motivo. Si no mejora en mejora_minima durante "paciencia"
+# evaluaciones seguidas, el entrenamiento se para. Cada mejora se guarda completa en ruta_mejor y, con
+# almacen (almacen_checkpoints.py), como checkpoint puntuado para conservar los mejores; las evaluaciones
+# sin mejora no escriben nada (los checkpoints periódicos ya los guarda CallbackCheckpoints).
+# limite_pasos / rondas_consenso: las partidas de evaluación duran como las de entrenamiento.
+class CallbackEvaluacion(BaseCallback):
+    def __init__(self, variables, signos, num_variables, variante, pasos_entre_evaluaciones, paciencia=5,
+                 mejora_minima=0.005, ruta_mejor=None, almacen=None, partidas_por_lote=1024, limite_pasos=None,
+                 rondas_consenso=None, verbose=1):
+        super().__init__(verbose)
+        self.variables = variables
+        self.signos = signos
+        self.num_variables = num_variables
+        self.variante = variante
+        self.pasos_entre_evaluaciones = pasos_entre_evaluaciones
+        self.paciencia = paciencia
+        self.mejora_minima = mejora_minima
+        self.ruta_mejor = ruta_mejor
+        self.almacen = almacen
+        self.partidas_por_lote = partidas_por_lote
+        self.limite_pasos = limite_pasos
+        self.rondas_consenso = rondas_consenso
+
+        self.mejor = -np.inf
+        self.pasos_mejor = None
+        self.sin_mejora = 0
+        self.historial = []
+        self._evaluaciones = 0
+
+    def _on_training_start(self):
+        self._evaluaciones = self.num_timesteps // self.pasos_entre_evaluaciones
+
+    def _on_step(self):
+        if self.num_timesteps // self.pasos_entre_evaluaciones <= self._evaluaciones:
+            return True
+        self._evaluaciones = self.num_timesteps // self.pasos_entre_evaluaciones
+        return self._evaluar()
+
+    def _evaluar(self):
+        resultado = jugar_banco(self.model, self.variables, self.signos, self.num_variables, self.variante,
+                                self.partidas_por_lote, limite_pasos=self.limite_pasos,
+                                rondas_consenso=self.rondas_consenso)
+        metricas = {
+            "tasa_exito": float(resultado["exitos"].mean()),
+            "clausulas_satisfechas": float(resultado["satisfechas"].mean()),
+            "fraccion_clausulas": float(resultado["satisfechas"].mean() / self.variables.shape[1]),
+            "tasa_negociacion": float(resultado["cambios"].mean()),
+            "rondas": float(resultado["rondas"].mean()),
+            "rondas_consenso": float(resultado["rondas_consenso"].mean()),
+        }
+        for nombre, valor in metricas.items():
+            self.logger.record(f"evaluacion/{nombre}", valor)
+        self.historial.append(dict(metricas, pasos=self.num_timesteps))
+
+        puntuacion = metricas["fraccion_clausulas"]
+        if puntuacion > self.mejor + self.mejora_minima:
+            self.mejor = puntuacion
+            self.pasos_mejor = self.num_timesteps
+            self.sin_mejora = 0
+            if self.ruta_mejor is not None:
+                self.model.save(self.ruta_mejor)
+            if self.almacen is not None:
+                self.almacen.guardar(self.model, self.num_timesteps)
+                self.almacen.puntuar(self.num_timesteps, puntuacion)
+        else:
+            self.sin_mejora += 1
+        self.logger.record("evaluacion/mejor_fraccion_clausulas", self.mejor)
+        self.logger.record("evaluacion/sin_mejora", self.sin_mejora)
+
+        if self.verbose:
+            marca = "🏅" if self.sin_mejora == 0 else f"({self.sin_mejora}/{self.paciencia} sin mejora)"
+            print(f"📊 Evaluación en {self.num_timesteps} pasos: éxito {metricas['tasa_exito']:.2%}, "
+                  f"cláusulas {metricas['clausulas_satisfechas']:.3f}, negociación {metricas['tasa_negociacion']:.2%} {marca}")
+
+        if self.sin_mejora >= self.paciencia:
+            if self.verbose:
+                print(f"⏹️  Sin mejora en {self.paciencia} evaluaciones: se para. "
+                      f"Mejor: {self.mejor:.2%} de cláusulas satisfechas en {self.pasos_mejor} pasos")
+            return False
+        return True
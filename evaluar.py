@@ -1,8 +1,13 @@
 import os
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from stable_baselines3 import PPO
+from clausulas import clausulas_a_arrays, clausulas_satisfechas
+from oraculo_maxsat import optimos_maxsat, ratio_aproximacion
+from graficas import RenderizadorGraficas
+from trazas import GrabadorTrazas
 from mi_entonrno_3sat_recompensayobservaciones import Entorno3SAT
 
 # ==========================================
@@ -29,7 +34,11 @@ def generar_casos_laboratorio(num_variables):
 # ==========================================
 # 2. FUNCIONES DE ANÁLISIS Y GRÁFICAS
 # ==========================================
-def graficar_evolucion(historial_votos, titulo, exito):
+def graficar_evolucion(historial_votos, titulo, exito, renderizador=None):
+    # Modo sin pantalla: la figura se dibuja a fichero en segundo plano y la evaluación sigue
+    if renderizador is not None:
+        renderizador.encargar("historial", historial_votos, titulo, exito)
+        return
     try:
         plt.figure(figsize=(10, 6))
         ax = sns.heatmap(historial_votos, cmap="RdYlGn", center=0, vmin=-5, vmax=5, 
@@ -51,50 +60,95 @@ def graficar_evolucion(historial_votos, titulo, exito):
 
 # --- CAMBIO CLAVE: BYPASS A LA LIBRERÍA ---
 def ejecutar_partida(env_raw, model, caso_datos=None):
-    options = {"problema_inyectado": caso_datos} if caso_datos else None
-    
+    historiales, exitos, cambios = ejecutar_partidas_lote([env_raw], model, [caso_datos])
+    return historiales[0], exitos[0], cambios[0]
+
+# --- INFERENCIA POR LOTES: un solo predict por ronda para todos los agentes de todas las partidas ---
+# Con grabador (trazas.GrabadorTrazas) se guarda además la traza completa de cada partida
+def ejecutar_partidas_lote(envs, model, casos=None, grabador=None):
+    if casos is None:
+        casos = [None] * len(envs)
+
     # El entorno puro sí acepta las opciones
-    obs_dict, _ = env_raw.reset(options=options)
-    
-    historial_votos = [] 
-    
-    # Mientras queden agentes vivos en la partida (Paso 1 al 5)
-    while env_raw.agents:
-        acciones_dict = {}
-        votos_reales_paso = []
-
-        for agent in env_raw.agents:
-            obs_agente = obs_dict[agent]
-            # PPO predice. Le pasamos la observación de este agente.
-            action, _ = model.predict(obs_agente, deterministic=True)
-            acciones_dict[agent] = action
-            
-            # Calculamos el voto físico (-1 o +1) para la gráfica
-            accion_binaria = (action > 0.5).astype(int)
-            voto_real = (accion_binaria * 2) - 1
-            votos_reales_paso.append(voto_real)
-
-        # Sumamos el tablero
-        suma_votos_paso = np.sum(votos_reales_paso, axis=0)
-        historial_votos.append(suma_votos_paso)
-
-        # Avanzamos un turno en el entorno puro
-        obs_dict, rewards, terms, truncs, infos = env_raw.step(acciones_dict)
-    
-    # En el entorno v2, el máximo son 100 puntos (20pts x 5 cláusulas)
-    es_exito = all(r >= 100.0 for r in rewards.values()) if rewards else False
-    matriz_historial = np.array(historial_votos)
-    
-    primer_voto = matriz_historial[0] if len(matriz_historial) > 0 else np.zeros(10)
-    ultimo_voto = matriz_historial[-1] if len(matriz_historial) > 0 else np.zeros(10)
-    hubo_cambios = not np.array_equal(primer_voto, ultimo_voto)
-    
-    return matriz_historial, es_exito, hubo_cambios
+    obs_dicts = []
+    for env_raw, caso_datos in zip(envs, casos):
+        options = {"problema_inyectado": caso_datos} if caso_datos else None
+        obs_dict, _ = env_raw.reset(options=options)
+        obs_dicts.append(obs_dict)
+
+    historiales = [[] for _ in envs]
+    votos_binarios = [[] for _ in envs]
+    recompensas = [{} for _ in envs]
+
+    # Mientras queden agentes vivos en alguna partida (Paso 1 al 5)
+    while any(env_raw.agents for env_raw in envs):
+        vivas = [g for g, env_raw in enumerate(envs) if env_raw.agents]
+
+        # Apilamos las observaciones de todos los agentes y PPO predice de una vez
+        obs_lote = np.stack([obs_dicts[g][agent] for g in vivas for agent in envs[g].agents])
+        acciones, _ = model.predict(obs_lote, deterministic=True)
+
+        inicio = 0
+        for g in vivas:
+            env_raw = envs[g]
+            fin = inicio + len(env_raw.agents)
+            acciones_partida = acciones[inicio:fin]
+            inicio = fin
+            acciones_dict = dict(zip(env_raw.agents, acciones_partida))
+
+            # Calculamos el voto físico (-1 o +1) para la gráfica y sumamos el tablero
+            accion_binaria = (acciones_partida > 0.5).astype(int)
+            votos_reales_paso = (accion_binaria * 2) - 1
+            historiales[g].append(np.sum(votos_reales_paso, axis=0))
+            votos_binarios[g].append(accion_binaria)
+
+            # Avanzamos un turno en el entorno puro
+            obs_dicts[g], recompensas[g], terms, truncs, infos = env_raw.step(acciones_dict)
+
+    exitos = []
+    cambios = []
+    for g, rewards in enumerate(recompensas):
+        # En el entorno v2, el máximo son 100 puntos (20pts x 5 cláusulas)
+        exitos.append(all(r >= 100.0 for r in rewards.values()) if rewards else False)
+        historiales[g] = np.array(historiales[g])
+
+        matriz_historial = historiales[g]
+        primer_voto = matriz_historial[0] if len(matriz_historial) > 0 else np.zeros(10)
+        ultimo_voto = matriz_historial[-1] if len(matriz_historial) > 0 else np.zeros(10)
+        cambios.append(not np.array_equal(primer_voto, ultimo_voto))
+
+    if grabador is not None:
+        # Con parada por consenso no todas las partidas duran lo mismo: se rellenan con ceros hasta la más larga
+        max_rondas = max(len(historial) for historial in historiales)
+        def rellenar(matriz):
+            return np.pad(matriz, [(0, max_rondas - len(matriz))] + [(0, 0)] * (matriz.ndim - 1))
+
+        grabador.anadir(
+            np.stack([env_raw.variables_clausulas for env_raw in envs]),
+            np.stack([env_raw.signos_clausulas for env_raw in envs]),
+            np.stack([rellenar(np.array(votos)) for votos in votos_binarios]),
+            np.stack([rellenar(historial) for historial in historiales]),
+            np.stack([historial[-1] > 0 for historial in historiales]),
+            np.array([[rewards.get(agent, 0.0) for agent in env_raw.possible_agents]
+                      for env_raw, rewards in zip(envs, recompensas)]),
+            np.array([len(historial) for historial in historiales]),
+        )
+
+    return historiales, exitos, cambios
+
+# Ratio de aproximación de cada partida ya jugada: cláusulas satisfechas con las leyes finales / óptimo MAX-3SAT
+def ratios_aproximacion(envs):
+    variables = np.stack([env.variables_clausulas for env in envs])
+    signos = np.stack([env.signos_clausulas for env in envs])
+    leyes = np.stack([env.estado_votacion > 0 for env in envs]).astype(np.int8)
+    satisfechas = clausulas_satisfechas(leyes, variables, signos).sum(axis=1)
+    return ratio_aproximacion(satisfechas, optimos_maxsat(variables, signos, envs[0].num_variables))
 
 # ==========================================
 # 3. FUNCIÓN PRINCIPAL
 # ==========================================
-def evaluar():
+# limite_pasos / rondas_consenso: duración de las partidas (parada por consenso opcional, ver los entornos)
+def evaluar(directorio_graficas=None, ruta_trazas=None, limite_pasos=5, rondas_consenso=None):
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     nombre_archivo = "ppo_3sat_final_v1.zip"
     ruta_modelo = os.path.join(BASE_DIR, "modelos", nombre_archivo)
@@ -106,7 +160,10 @@ def evaluar():
         return
 
     # --- CAMBIO CLAVE: Entorno CRUDO sin SuperSuit ---
-    env_raw = Entorno3SAT(num_agentes=5, num_variables=10)
+    env_raw = Entorno3SAT(num_agentes=5, num_variables=10, limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+
+    # Sin pantalla: las gráficas van a ficheros PNG + index.html, dibujadas en segundo plano
+    renderizador = RenderizadorGraficas(directorio_graficas) if directorio_graficas else None
 
     model = PPO.load(ruta_modelo)
     print("✅ ¡Modelo cargado! Vamos a examinarlo de verdad.")
@@ -116,24 +173,52 @@ def evaluar():
     
     for nombre_caso, datos_caso in casos.items():
         historial, exito, cambio = ejecutar_partida(env_raw, model, datos_caso)
-        graficar_evolucion(historial, nombre_caso, exito)
+        graficar_evolucion(historial, nombre_caso, exito, renderizador)
+        optimo = optimos_maxsat(*clausulas_a_arrays(datos_caso, env_raw.possible_agents), env_raw.num_variables)
+        print(f"   > Óptimo MAX-3SAT: {optimo}/{env_raw.num_agentes} cláusulas satisfacibles")
 
     print("\n📈 --- FASE 2: ESTADÍSTICAS GLOBALES (100 PARTIDAS ALEATORIAS) ---")
     total_partidas = 100
-    wins = 0
-    negociaciones = 0
-    
-    for i in range(total_partidas):
-        _, exito, cambio = ejecutar_partida(env_raw, model)
-        if exito: wins += 1
-        if cambio: negociaciones += 1
-        if i % 10 == 0: print(".", end="", flush=True)
+
+    # Todas las partidas a la vez: una pasada de la red por ronda
+    envs = [Entorno3SAT(num_agentes=5, num_variables=10, limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+            for _ in range(total_partidas)]
+    if ruta_trazas:
+        # Traza completa de cada partida aleatoria, para repetirlas o analizarlas después (trazas.py)
+        with GrabadorTrazas(ruta_trazas, env_raw.num_agentes, env_raw.num_variables, limite_pasos,
+                            env_raw.metadata["name"]) as grabador:
+            historiales, exitos, cambios = ejecutar_partidas_lote(envs, model, grabador=grabador)
+    else:
+        historiales, exitos, cambios = ejecutar_partidas_lote(envs, model)
+    if renderizador is not None:
+        for i, (historial_partida, exito) in enumerate(zip(historiales, exitos)):
+            graficar_evolucion(historial_partida, f"Partida aleatoria {i + 1}", exito, renderizador)
+    wins = sum(exitos)
+    negociaciones = sum(cambios)
+    # Rondas jugadas y ronda desde la que el resultado (leyes aprobadas) ya no cambia
+    rondas_medias = np.mean([len(historial) for historial in historiales])
+    consenso_medio = np.mean([env.ronda_consenso for env in envs])
+    ratios = ratios_aproximacion(envs)
 
     print(f"\n\nRESULTADOS DEL MODELO ACTUAL:")
     print(f"---------------------------------------")
     print(f"✅ Tasa de Éxito:       {wins}/{total_partidas} ({wins}%)")
+    print(f"🎯 Ratio de aproximación: {ratios.mean():.4f} de media (mínimo {ratios.min():.4f})")
     print(f"🤝 Tasa de Negociación: {negociaciones}/{total_partidas} ({negociaciones}%)")
+    print(f"🔁 Rondas jugadas:      {rondas_medias:.2f} de media (máximo {limite_pasos})")
+    print(f"🕊️  Consenso en ronda:   {consenso_medio:.2f} de media")
     print(f"---------------------------------------")
 
+    if renderizador is not None:
+        renderizador.cerrar()
+
 if __name__ == "__main__":
-    evaluar()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluación del modelo con casos de laboratorio y partidas aleatorias")
+    parser.add_argument("--graficas", default=None, help="Carpeta donde guardar las gráficas (modo sin pantalla)")
+    parser.add_argument("--trazas", default=None, help="Carpeta donde grabar las partidas aleatorias (trazas.py)")
+    parser.add_argument("--rondas", type=int, default=5, help="Rondas máximas por partida")
+    parser.add_argument("--consenso", type=int, default=None,
+                        help="Terminar la partida cuando el resultado se repite estas rondas seguidas")
+    args = parser.parse_args()
+
+    evaluar(args.graficas, args.trazas, args.rondas, args.consenso)
\ No newline at end of file
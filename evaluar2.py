@@ -1,8 +1,12 @@
 import os
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from stable_baselines3 import PPO
+from clausulas import clausulas_a_arrays, clausulas_satisfechas
+from oraculo_maxsat import optimos_maxsat, ratio_aproximacion
+from graficas import RenderizadorGraficas
 from mi_entorno_3sat_observacion import Entorno3SAT
 
 # ==========================================
@@ -29,7 +33,11 @@ def generar_casos_laboratorio(num_variables, num_agentes=40):
 # ==========================================
 # 2. FUNCIONES DE ANÁLISIS Y GRÁFICAS
 # ==========================================
-def graficar_evolucion(matriz_votos, titulo, exito):
+def graficar_evolucion(matriz_votos, titulo, exito, renderizador=None):
+    # Modo sin pantalla: la figura se dibuja a fichero en segundo plano (agrupando agentes si son muchos)
+    if renderizador is not None:
+        renderizador.encargar("matriz", matriz_votos, titulo, exito)
+        return
     try:
         # Aumentamos el tamaño vertical para que quepan los 40 agentes
         plt.figure(figsize=(10, 10)) 
@@ -50,38 +58,56 @@ def graficar_evolucion(matriz_votos, titulo, exito):
         print(f"⚠️ Error al generar gráfica: {e}")
 
 def ejecutar_partida(env_raw, model, caso_datos=None):
-    options = {"problema_inyectado": caso_datos} if caso_datos else None
-    obs_dict, _ = env_raw.reset(options=options)
-    
-    acciones_dict = {}
-    votos_reales = []
-
-    # Solo hay un turno, leemos las acciones de todos
-    for agent in env_raw.agents:
-        obs_agente = obs_dict[agent]
-        action, _ = model.predict(obs_agente, deterministic=True)
-        acciones_dict[agent] = action
-        
+    matrices, exitos = ejecutar_partidas_lote([env_raw], model, [caso_datos])
+    return matrices[0], exitos[0]
+
+# --- INFERENCIA POR LOTES: un solo predict para los 40 agentes de todas las partidas ---
+def ejecutar_partidas_lote(envs, model, casos=None):
+    if casos is None:
+        casos = [None] * len(envs)
+
+    obs_lote = []
+    for env_raw, caso_datos in zip(envs, casos):
+        options = {"problema_inyectado": caso_datos} if caso_datos else None
+        obs_dict, _ = env_raw.reset(options=options)
+        obs_lote.extend(obs_dict[agent] for agent in env_raw.agents)
+
+    # Solo hay un turno, leemos las acciones de todos con una pasada de la red
+    acciones, _ = model.predict(np.stack(obs_lote), deterministic=True)
+
+    matrices_votos = []
+    exitos = []
+    inicio = 0
+    for env_raw in envs:
+        fin = inicio + len(env_raw.agents)
+        acciones_partida = acciones[inicio:fin]
+        inicio = fin
+        acciones_dict = dict(zip(env_raw.agents, acciones_partida))
+
+        # Avanzamos y terminamos el entorno puro
+        obs_dict, rewards, terms, truncs, infos = env_raw.step(acciones_dict)
+        exitos.append(all(r >= 100.0 for r in rewards.values()) if rewards else False)
+
         # Eliminada la conversión > 0.5. MultiDiscrete ya da 0 o 1.
-        voto_real = (action * 2) - 1 
-        votos_reales.append(voto_real)
+        # La matriz guarda las 40 filas (agentes) y 10 columnas (leyes) de un solo turno
+        matrices_votos.append((acciones_partida * 2) - 1)
 
-    # Avanzamos y terminamos el entorno puro
-    obs_dict, rewards, terms, truncs, infos = env_raw.step(acciones_dict)
-    
-    es_exito = all(r >= 100.0 for r in rewards.values()) if rewards else False
-    
-    # La matriz ahora guarda las 40 filas (agentes) y 10 columnas (leyes) de un solo turno
-    matriz_votos = np.array(votos_reales) 
-    
-    return matriz_votos, es_exito
+    return matrices_votos, exitos
+
+# Ratio de aproximación de cada partida ya jugada: cláusulas satisfechas con las leyes finales / óptimo MAX-3SAT
+def ratios_aproximacion(envs):
+    variables = np.stack([env.variables_clausulas for env in envs])
+    signos = np.stack([env.signos_clausulas for env in envs])
+    leyes = np.stack([env.estado_votacion > 0 for env in envs]).astype(np.int8)
+    satisfechas = clausulas_satisfechas(leyes, variables, signos).sum(axis=1)
+    return ratio_aproximacion(satisfechas, optimos_maxsat(variables, signos, envs[0].num_variables))
 
 # ==========================================
 # 3. FUNCIÓN PRINCIPAL
 # ==========================================
-def evaluar():
+def evaluar(directorio_graficas=None):
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    nombre_archivo = "ppo_3sat_final_40agentes.zip"
+    nombre_archivo = "ppo_3sat_final_voto_3sat_v4_egoista_40agentes.zip" # entrenar.py con la configuración por defecto
     ruta_modelo = os.path.join(BASE_DIR, "modelos", nombre_archivo)
     
     print(f"🔍 Buscando cerebro en: {ruta_modelo}")
@@ -93,6 +119,9 @@ def evaluar():
     # Ajustado a 40 agentes
     env_raw = Entorno3SAT(num_agentes=40, num_variables=10)
 
+    # Sin pantalla: las gráficas van a ficheros PNG + index.html, dibujadas en segundo plano
+    renderizador = RenderizadorGraficas(directorio_graficas) if directorio_graficas else None
+
     model = PPO.load(ruta_modelo)
     print("✅ ¡Modelo cargado! Vamos a examinarlo de verdad.")
 
@@ -101,21 +130,34 @@ def evaluar():
     
     for nombre_caso, datos_caso in casos.items():
         matriz_votos, exito = ejecutar_partida(env_raw, model, datos_caso)
-        graficar_evolucion(matriz_votos, nombre_caso, exito)
+        graficar_evolucion(matriz_votos, nombre_caso, exito, renderizador)
+        optimo = optimos_maxsat(*clausulas_a_arrays(datos_caso, env_raw.possible_agents), env_raw.num_variables)
+        print(f"   > Óptimo MAX-3SAT: {optimo}/{env_raw.num_agentes} cláusulas satisfacibles")
 
     print("\n📈 --- FASE 2: ESTADÍSTICAS GLOBALES (100 PARTIDAS ALEATORIAS) ---")
     total_partidas = 100
-    wins = 0
-    
-    for i in range(total_partidas):
-        _, exito = ejecutar_partida(env_raw, model)
-        if exito: wins += 1
-        if i % 10 == 0: print(".", end="", flush=True)
+
+    # Todas las partidas a la vez: una sola pasada de la red
+    envs = [Entorno3SAT(num_agentes=40, num_variables=10) for _ in range(total_partidas)]
+    matrices_votos, exitos = ejecutar_partidas_lote(envs, model)
+    if renderizador is not None:
+        for i, (matriz_partida, exito) in enumerate(zip(matrices_votos, exitos)):
+            graficar_evolucion(matriz_partida, f"Partida aleatoria {i + 1}", exito, renderizador)
+    wins = sum(exitos)
+    ratios = ratios_aproximacion(envs)
 
     print(f"\n\nRESULTADOS DEL MODELO ACTUAL:")
     print(f"---------------------------------------")
     print(f"✅ Tasa de Éxito:       {wins}/{total_partidas} ({wins}%)")
+    print(f"🎯 Ratio de aproximación: {ratios.mean():.4f} de media (mínimo {ratios.min():.4f})")
     print(f"---------------------------------------")
 
+    if renderizador is not None:
+        renderizador.cerrar()
+
 if __name__ == "__main__":
-    evaluar()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluación del modelo con casos de laboratorio y partidas aleatorias")
+    parser.add_argument("--graficas", default=None, help="Carpeta donde guardar las gráficas (modo sin pantalla)")
+    args = parser.parse_args()
+
+    evaluar(args.graficas)
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import re
+import html
+import warnings
+import multiprocessing as mp
+import numpy as np
+
+# ==========================================
+# 1. DIBUJO A FICHERO (backend Agg, sin ventanas)
+# ==========================================
+# Con más agentes que esto, las filas de la matriz agente x ley se agrupan (voto medio del grupo)
+MAX_FILAS_AGENTES = 50
+
+def _iniciar_trabajador():
+    import matplotlib
+    matplotlib.use("Agg")
+    # Los emojis del título (🏆/💀) no están en la fuente por defecto: sin avisos por cada figura
+    warnings.filterwarnings("ignore", message=r"Glyph .* missing")
+
+def _estado(exito):
+    return '🏆 ÉXITO' if exito else '💀 FRACASO'
+
+# Evolución del tablero (sondeos x leyes), como graficar_evolucion de evaluar.py
+def dibujar_historial(historial_votos, titulo, exito, ruta, limite=None):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    historial_votos = np.asarray(historial_votos)
+    limite = limite or max(1.0, float(np.abs(historial_votos).max()))
+    fig = plt.figure(figsize=(10, 6))
+    ax = sns.heatmap(historial_votos, cmap="RdYlGn", center=0, vmin=-limite, vmax=limite,
+                     annot=historial_votos.size <= 200, fmt=".0f", cbar_kws={'label': 'Suma de Votos'})
+    plt.title(f"{titulo} | Resultado: {_estado(exito)}")
+    plt.xlabel("Variables (Leyes)")
+    plt.ylabel("Tiempo (Sondeos)")
+    ax.set_yticklabels([f"Paso {p}" for p in range(1, len(historial_votos) + 1)], rotation=0)
+    plt.tight_layout()
+    fig.savefig(ruta)
+    plt.close(fig)
+
+# Matriz de votos agente x ley (evaluar2.py); con poblaciones grandes, una fila por grupo de agentes
+def dibujar_matriz_votos(matriz_votos, titulo, exito, ruta, max_filas=MAX_FILAS_AGENTES):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    matriz_votos = np.asarray(matriz_votos, dtype=np.float32)
+    num_agentes = len(matriz_votos)
+    if num_agentes > max_filas:
+        grupos = np.array_split(np.arange(num_agentes), max_filas)
+        matriz_votos = np.stack([matriz_votos[g].mean(axis=0) for g in grupos])
+        etiquetas = [f"{g[0]}-{g[-1]}" for g in grupos]
+        etiqueta_eje = f"Agentes ({num_agentes}, voto medio por grupo)"
+    else:
+        etiquetas = [str(i) for i in range(num_agentes)]
+        etiqueta_eje = f"Agentes (0 al {num_agentes - 1})"
+
+    fig = plt.figure(figsize=(10, 10))
+    ax = sns.heatmap(matriz_votos, cmap="RdYlGn", center=0, vmin=-1, vmax=1,
+                     annot=False, cbar_kws={'label': 'Voto (-1 Contra, +1 A favor)'})
+    plt.title(f"{titulo} | Resultado: {_estado(exito)}")
+    plt.xlabel("Variables (Leyes)")
+    plt.ylabel(etiqueta_eje)
+    ax.set_yticks(np.arange(len(etiquetas)) + 0.5)
+    ax.set_yticklabels(etiquetas, rotation=0, fontsize=7)
+    plt.tight_layout()
+    fig.savefig(ruta)
+    plt.close(fig)
+
+DIBUJOS = {"historial": dibujar_historial, "matriz": dibujar_matriz_votos}
+
+def _dibujar(tarea):
+    tipo, datos, titulo, exito, ruta, opciones = tarea
+    DIBUJOS[tipo](datos, titulo, exito, ruta, **opciones)
+    return ruta
+
+
+# ==========================================
+# 2. RENDERIZADOR EN SEGUNDO PLANO + ÍNDICE
+# ==========================================
+# encargar() vuelve enseguida: las figuras se dibujan en un pool de procesos mientras la
+# evaluación sigue jugando. cerrar() espera a todas y escribe index.html con la galería.
+class RenderizadorGraficas:
+    def __init__(self, directorio, num_procesos=None):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+        self.pool = mp.get_context("spawn").Pool(num_procesos or os.cpu_count(), initializer=_iniciar_trabajador)
+        self.figuras = []
+
+    def encargar(self, tipo, datos, titulo, exito, **opciones):
+        nombre = re.sub(r"[^0-9A-Za-z]+", "_", titulo).strip("_").lower()
+        fichero = f"{len(self.figuras):04d}_{nombre}.png"
+        tarea = (tipo, np.asarray(datos), titulo, bool(exito), os.path.join(self.directorio, fichero), opciones)
+        self.figuras.append({"titulo": titulo, "fichero": fichero, "exito": bool(exito),
+                             "pendiente": self.pool.apply_async(_dibujar, (tarea,))})
+
+    def cerrar(self):
+        self.pool.close()
+        errores = 0
+        for figura in self.figuras:
+            try:
+                figura.pop("pendiente").get()
+            except Exception as e:
+                figura["error"] = str(e)
+                errores += 1
+        self.pool.join()
+
+        ruta_indice = escribir_indice(self.directorio, self.figuras)
+        print(f"🖼️  {len(self.figuras) - errores} gráficas en {self.directorio} (índice: {ruta_indice})")
+        if errores:
+            print(f"⚠️ {errores} gráficas no se pudieron generar")
+        return ruta_indice
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+def escribir_indice(directorio, figuras, titulo="Evaluación MARL MAX-3SAT"):
+    tarjetas = []
+    for figura in figuras:
+        estado = "✅" if figura["exito"] else "❌"
+        if "error" in figura:
+            contenido = f"<p>⚠️ {html.escape(figura['error'])}</p>"
+        else:
+            contenido = f'<a href="{figura["fichero"]}"><img src="{figura["fichero"]}" loading="lazy"></a>'
+        tarjetas.append(f'<figure>{contenido}<figcaption>{estado} {html.escape(figura["titulo"])}</figcaption></figure>')
+
+    exitos = sum(figura["exito"] for figura in figuras)
+    pagina = f"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(titulo)}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+main {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(320px, 1fr)); gap: 1em; }}
+figure {{ margin: 0; }}
+img {{ width: 100%; border: 1px solid #ccc; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(titulo)}</h1>
+<p>{len(figuras)} gráficas, {exitos} con éxito</p>
+<main>
+{chr(10).join(tarjetas)}
+</main>
+</body>
+</html>
+"""
+    ruta = os.path.join(directorio, "index.html")
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(pagina)
+    return ruta
@@ -0,0 +1,175 @@
+import os
+import time
+import argparse
+import numpy as np
+
+from clausulas import FAMILIAS, clausulas_satisfechas, generar_familia
+from oraculo_maxsat import optimos_maxsat, ratio_aproximacion
+
+# ==========================================
+# 1. ESTRATEGIAS DE REFERENCIA (sin aprendizaje)
+# ==========================================
+# Juegan los mismos problemas que los entornos (variables/signos [M, A, 3]) y devuelven el resultado
+# de la votación: leyes [M, V] con 1 = aprobada. Todo por lotes: los bucles son por variable (voraz)
+# o por cambio (WalkSAT), nunca por problema, así que 100.000 problemas se resuelven en segundos.
+
+# --- MAYORÍA INGENUA: cada agente vota lo que pide su cláusula y se abstiene en el resto ---
+# Ley aprobada si tiene más votos a favor que en contra (empate = rechazada, como estado_votacion > 0)
+def votos_mayoria(variables, signos, num_variables):
+    total = len(variables)
+    indices = (np.arange(total)[:, None, None] * num_variables + variables).reshape(-1)
+    pesos = np.where(signos == 1, 1.0, -1.0).reshape(-1)
+    return np.bincount(indices, weights=pesos, minlength=total * num_variables).reshape(total, num_variables)
+
+def mayoria(variables, signos, num_variables, rng=None):
+    return (votos_mayoria(variables, signos, num_variables) > 0).astype(np.int8)
+
+# --- VORAZ: ley a ley, el valor que satisface más cláusulas aún incumplidas ---
+# Se decide antes la ley que aparece en más cláusulas
+def voraz(variables, signos, num_variables, rng=None):
+    total = len(variables)
+    filas = np.arange(total)
+    indices = (filas[:, None, None] * num_variables + variables).reshape(-1)
+    apariciones = np.bincount(indices, minlength=total * num_variables).reshape(total, num_variables)
+    orden = np.argsort(-apariciones, axis=1, kind="stable")
+
+    leyes = np.zeros((total, num_variables), dtype=np.int8)
+    cumplidas = np.zeros(variables.shape[:2], dtype=bool)
+    for paso in range(num_variables):
+        ley = orden[:, paso]
+        pendientes = (variables == ley[:, None, None]) & ~cumplidas[:, :, None]
+        a_favor = (pendientes & (signos == 1)).sum(axis=(1, 2))
+        en_contra = (pendientes & (signos == 0)).sum(axis=(1, 2))
+        valor = (a_favor > en_contra).astype(np.int8)
+        leyes[filas, ley] = valor
+        cumplidas |= (pendientes & (signos == valor[:, None, None])).any(axis=2)
+    return leyes
+
+# --- WALKSAT POR LOTES: todos los problemas a la vez, un cambio de ley por iteración ---
+# Arranca de la mayoría. En cada problema aún sin resolver se elige una cláusula incumplida al azar y
+# se cambia una de sus leyes: al azar con probabilidad ruido o, si no, la que deja más cláusulas
+# cumplidas. Se devuelve la mejor votación vista de cada problema.
+def walksat(variables, signos, num_variables, rng=None, max_cambios=100, ruido=0.3):
+    rng = rng if rng is not None else np.random.default_rng(0)
+    total, num_agentes, literales = variables.shape
+    leyes = mayoria(variables, signos, num_variables)
+    cumplidas = clausulas_satisfechas(leyes, variables, signos)
+    mejores = leyes.copy()
+    mejor_cuenta = cumplidas.sum(axis=1)
+
+    activos = np.flatnonzero(mejor_cuenta < num_agentes)
+    for _ in range(max_cambios):
+        if len(activos) == 0:
+            break
+        n = len(activos)
+        filas = np.arange(n)
+        v, s, l, c = variables[activos], signos[activos], leyes[activos], cumplidas[activos]
+
+        # Cláusula incumplida al azar: la de mayor número aleatorio entre las incumplidas
+        clausula = np.argmax(np.where(c, -1.0, rng.random(c.shape)), axis=1)
+        candidatas = v[filas, clausula]
+
+        cuentas = np.empty((n, literales), dtype=np.int64)
+        for i in range(literales):
+            prueba = l.copy()
+            prueba[filas, candidatas[:, i]] ^= 1
+            cuentas[:, i] = clausulas_satisfechas(prueba, v, s).sum(axis=1)
+        elegida = np.where(rng.random(n) < ruido, rng.integers(0, literales, n), cuentas.argmax(axis=1))
+        l[filas, candidatas[filas, elegida]] ^= 1
+
+        c = clausulas_satisfechas(l, v, s)
+        cuenta = c.sum(axis=1)
+        leyes[activos], cumplidas[activos] = l, c
+        mejora = cuenta > mejor_cuenta[activos]
+        mejores[activos[mejora]] = l[mejora]
+        mejor_cuenta[activos[mejora]] = cuenta[mejora]
+        activos = activos[mejor_cuenta[activos] < num_agentes]
+    return mejores
+
+ESTRATEGIAS = {"mayoria": mayoria, "voraz": voraz, "walksat": walksat}
+
+
+# ==========================================
+# 2. EVALUACIÓN SOBRE UN BANCO DE PROBLEMAS
+# ==========================================
+# Mismas claves que evaluacion_masiva.jugar_banco (exitos, satisfechas) más el tiempo total,
+# para comparar con un modelo a igualdad de coste
+def jugar_estrategia(estrategia, variables, signos, num_variables, partidas_por_lote=10_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    total, num_agentes = variables.shape[:2]
+    satisfechas = np.zeros(total, dtype=np.int64)
+
+    inicio = time.perf_counter()
+    for desde in range(0, total, partidas_por_lote):
+        hasta = min(total, desde + partidas_por_lote)
+        v, s = variables[desde:hasta], signos[desde:hasta]
+        leyes = ESTRATEGIAS[estrategia](v, s, num_variables, rng)
+        satisfechas[desde:hasta] = clausulas_satisfechas(leyes, v, s).sum(axis=1)
+    segundos = time.perf_counter() - inicio
+    return {"exitos": satisfechas == num_agentes, "satisfechas": satisfechas, "segundos": segundos}
+
+# Política entrenada sobre los mismos problemas (zip de PPO o .npz de politica_numpy.py)
+def jugar_modelo(ruta_modelo, variables, signos, num_variables, variante, partidas_por_lote=1024):
+    from evaluacion_masiva import jugar_banco
+    from politica_numpy import PoliticaNumpy
+
+    if ruta_modelo.endswith(".npz"):
+        model = PoliticaNumpy(ruta_modelo)
+    else:
+        from stable_baselines3 import PPO
+        model = PPO.load(ruta_modelo, device="cpu")
+    inicio = time.perf_counter()
+    resultado = jugar_banco(model, variables, signos, num_variables, variante, partidas_por_lote)
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+def comparar(variables, signos, num_variables, estrategias=tuple(ESTRATEGIAS), ruta_modelo=None,
+             variante="voto_3sat_v3", con_optimo=False):
+    resultados = {estrategia: jugar_estrategia(estrategia, variables, signos, num_variables)
+                  for estrategia in estrategias}
+    if ruta_modelo is not None:
+        resultados[os.path.basename(ruta_modelo)] = jugar_modelo(ruta_modelo, variables, signos, num_variables, variante)
+    if con_optimo:
+        optimos = optimos_maxsat(variables, signos, num_variables)
+        for resultado in resultados.values():
+            resultado["optimos"] = optimos
+    return resultados
+
+def imprimir_comparacion(resultados):
+    print(f"\n{'Estrategia':<34} {'Éxito':>8} {'Cláusulas':>10} {'Ratio':>8} {'µs/partida':>11}")
+    print("-" * 75)
+    for nombre, resultado in resultados.items():
+        total = len(resultado["satisfechas"])
+        ratio = "-"
+        if "optimos" in resultado:
+            ratio = f"{ratio_aproximacion(resultado['satisfechas'], resultado['optimos']).mean():.4f}"
+        print(f"{nombre:<34} {resultado['exitos'].mean():>8.2%} {resultado['satisfechas'].mean():>10.3f} "
+              f"{ratio:>8} {resultado['segundos'] / total * 1e6:>11.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estrategias de referencia (mayoría, voraz, WalkSAT) frente a un modelo")
+    parser.add_argument("--partidas", type=int, default=100_000)
+    parser.add_argument("--agentes", type=int, default=5)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--familia", default="aleatoria", choices=FAMILIAS)
+    parser.add_argument("--banco", default=None, help="Banco de instancias (banco_instancias.py) en vez de generar")
+    parser.add_argument("--estrategias", nargs="+", default=list(ESTRATEGIAS), choices=list(ESTRATEGIAS))
+    parser.add_argument("--modelo", default=None, help="Zip de PPO o .npz para jugar los mismos problemas")
+    parser.add_argument("--variante", default="voto_3sat_v3")
+    parser.add_argument("--optimo", action="store_true", help="Ratio de aproximación frente al óptimo MAX-3SAT exacto")
+    args = parser.parse_args()
+
+    if args.banco:
+        from banco_instancias import BancoInstancias
+        banco = BancoInstancias(args.banco)
+        variables, signos = banco.lote(np.arange(min(args.partidas, len(banco))))
+        num_variables = banco.num_variables
+    else:
+        variables, signos = generar_familia(np.random.default_rng(args.semilla), args.familia, args.partidas,
+                                            args.agentes, args.variables)
+        num_variables = args.variables
+
+    print(f"🧮 {len(variables)} problemas de {variables.shape[1]} agentes y {num_variables} leyes")
+    resultados = comparar(variables, signos, num_variables, args.estrategias, args.modelo, args.variante, args.optimo)
+    imprimir_comparacion(resultados)
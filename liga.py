@@ -0,0 +1,235 @@
+import os
+import csv
+import json
+import math
+import time
+import argparse
+import tempfile
+import itertools
+import multiprocessing as mp
+import numpy as np
+
+from barrido_checkpoints import detectar_variante, tamano_observacion_checkpoint
+from clausulas import generar_instancias
+from entorno_vectorizado import Entorno3SATVectorizado, VARIANTES, tamano_observacion
+from nucleo_votacion import limitar_hilos
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ==========================================
+# 1. PARTICIPANTES
+# ==========================================
+# "ruta" o "ruta@variante". Sin variante se reconoce por el tamaño de observación y el tipo de acción
+# (barrido_checkpoints.py); si encajan varias hay que indicarla.
+# Los zips se exportan una sola vez a .npz (politica_numpy.py): cada trabajador carga todos los actores
+# al arrancar, en milisegundos, y ya no vuelve a leer ningún fichero.
+def preparar_participantes(entradas, num_agentes, num_variables, directorio_npz):
+    from politica_numpy import exportar
+
+    participantes = []
+    for entrada in entradas:
+        ruta, _, variante = entrada.partition("@")
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        variante = variante or detectar_variante(ruta, num_agentes, num_variables)
+        if variante is None:
+            print(f"⚠️ {nombre}: sin variante reconocida con {num_agentes} agentes y {num_variables} leyes, se omite")
+            continue
+        if tamano_observacion_checkpoint(ruta) != tamano_observacion(variante, num_agentes, num_variables):
+            raise ValueError(f"{nombre} no es un modelo de {variante} con {num_agentes} agentes y {num_variables} leyes")
+        if not ruta.endswith(".npz"):
+            ruta = exportar(ruta, os.path.join(directorio_npz, nombre + ".npz"))
+        participantes.append({"nombre": nombre, "modelo": entrada.partition("@")[0], "ruta": ruta, "variante": variante})
+    return participantes
+
+
+# ==========================================
+# 2. PARTIDAS MIXTAS
+# ==========================================
+# En cada partida, una parte de los agentes (proporcion, en asientos al azar) la controla la política a
+# y el resto la b. Cada variante ve la partida con su propia observación: hay un motor por variante,
+# todos con los mismos problemas y las mismas acciones, así que sus tableros coinciden. En cada ronda
+# se hace un predict por política con todos sus agentes de todas las partidas.
+def jugar_cruce(politica_a, variante_a, politica_b, variante_b, num_partidas, num_agentes, num_variables, semilla,
+                proporcion=0.5, limite_pasos=5, rondas_consenso=None):
+    rng = np.random.default_rng(semilla)
+    variables, signos = generar_instancias(rng, num_partidas, num_agentes, num_variables)
+    de_a = np.argsort(rng.random((num_partidas, num_agentes)), axis=1) < int(round(proporcion * num_agentes))
+
+    motores, obs = {}, {}
+    for variante in {variante_a, variante_b}:
+        motores[variante] = Entorno3SATVectorizado(num_partidas=num_partidas, num_agentes=num_agentes,
+                                                   num_variables=num_variables, variante=variante,
+                                                   limite_pasos=limite_pasos, rondas_consenso=rondas_consenso)
+        obs[variante] = motores[variante].reiniciar(variables, signos).reshape(num_partidas, num_agentes, -1)
+    referencia = motores[variante_a]
+
+    satisfechas = np.zeros((num_partidas, num_agentes), dtype=bool)
+    rondas = np.zeros(num_partidas, dtype=np.int64)
+    pendientes = np.ones(num_partidas, dtype=bool)
+    acciones = np.zeros((num_partidas, num_agentes, num_variables), dtype=np.float32)
+    while pendientes.any():
+        for politica, variante, mascara in ((politica_a, variante_a, de_a), (politica_b, variante_b, ~de_a)):
+            if mascara.any():
+                acciones[mascara] = politica.votar(obs[variante][mascara])
+        for variante, motor in motores.items():
+            obs[variante] = motor.step(acciones.reshape(-1, num_variables))[0].reshape(num_partidas, num_agentes, -1)
+
+        # Solo cuenta la primera vez que termina cada partida (luego el motor juega problemas nuevos)
+        nuevas = referencia.ultimas_terminadas & pendientes
+        satisfechas[nuevas] = referencia.ultimas_satisfechas[nuevas]
+        rondas[nuevas] = referencia.ultimas_rondas[nuevas]
+        pendientes &= ~nuevas
+
+    return {
+        "partidas": num_partidas,
+        "agentes_a": int(de_a.sum()),
+        "satisfechas_a": int((satisfechas & de_a).sum()),
+        "agentes_b": int((~de_a).sum()),
+        "satisfechas_b": int((satisfechas & ~de_a).sum()),
+        "exitos": int(satisfechas.all(axis=1).sum()),
+        "rondas": int(rondas.sum()),
+    }
+
+
+# ==========================================
+# 3. TRABAJADORES (todas las políticas cargadas una vez por proceso)
+# ==========================================
+_POLITICAS = None
+_PARTICIPANTES = None
+_CONFIG = None
+
+def _iniciar_trabajador(participantes, config):
+    global _POLITICAS, _PARTICIPANTES, _CONFIG
+    from politica_numpy import PoliticaNumpy
+
+    limitar_hilos(1) # Un hilo de Numba por proceso: el paralelismo lo pone el pool
+    _POLITICAS = [PoliticaNumpy(p["ruta"]) for p in participantes]
+    _PARTICIPANTES = participantes
+    _CONFIG = config
+
+def _jugar_tarea(tarea):
+    a, b, semilla, num_partidas = tarea
+    resultado = jugar_cruce(_POLITICAS[a], _PARTICIPANTES[a]["variante"], _POLITICAS[b], _PARTICIPANTES[b]["variante"],
+                            num_partidas, semilla=semilla, **_CONFIG)
+    return a, b, resultado
+
+
+# ==========================================
+# 4. LIGA: MATRIZ DE PAGOS
+# ==========================================
+# pagos[i][j] = fracción de agentes de i con su cláusula satisfecha jugando junto a j (la recompensa
+# egoísta / 100). La diagonal es el juego consigo mismo. Todos los cruces juegan los mismos problemas
+# (mismas semillas por bloque). Solo si a y b controlan exactamente el mismo número de agentes (proporcion
+# = 0.5 con num_agentes par) los papeles son simétricos y basta un cruce por pareja; si no (p. ej. 0.5 con
+# 5 agentes son 3 contra 2), se juegan los dos órdenes e i es siempre el que controla round(proporcion * A).
+def cruces_liga(n, proporcion, num_agentes):
+    simetrico = 2 * int(round(proporcion * num_agentes)) == num_agentes
+    if simetrico:
+        return simetrico, list(itertools.combinations_with_replacement(range(n), 2))
+    return simetrico, list(itertools.product(range(n), repeat=2))
+
+def jugar_liga(participantes, num_partidas=2_000, num_agentes=5, num_variables=10, proporcion=0.5, limite_pasos=None,
+               rondas_consenso=None, semilla=0, tamano_bloque=1_000, num_procesos=None):
+    # Todas las variantes juegan las mismas rondas: por defecto, las de la más larga
+    limite_pasos = limite_pasos or max(VARIANTES[p["variante"]]["limite_pasos"] for p in participantes)
+    config = {"num_agentes": num_agentes, "num_variables": num_variables, "proporcion": proporcion,
+              "limite_pasos": limite_pasos, "rondas_consenso": rondas_consenso}
+
+    n = len(participantes)
+    simetrico, cruces = cruces_liga(n, proporcion, num_agentes)
+    num_bloques = math.ceil(num_partidas / tamano_bloque)
+    semillas = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(semilla).spawn(num_bloques)]
+    tareas = [(a, b, semillas[i], min(tamano_bloque, num_partidas - i * tamano_bloque))
+              for a, b in cruces for i in range(num_bloques)]
+
+    totales = {}
+    inicio = time.perf_counter()
+    num_procesos = min(num_procesos or os.cpu_count(), len(tareas))
+    print(f"🏟️  {n} participantes, {len(cruces)} cruces x {num_partidas} partidas ({num_procesos} procesos)")
+    with mp.get_context("spawn").Pool(num_procesos, initializer=_iniciar_trabajador,
+                                      initargs=(participantes, config)) as pool:
+        for a, b, resultado in pool.imap_unordered(_jugar_tarea, tareas):
+            acumulado = totales.setdefault((a, b), dict.fromkeys(resultado, 0))
+            for clave, valor in resultado.items():
+                acumulado[clave] += valor
+
+    pagos = np.full((n, n), np.nan)
+    exitos = np.full((n, n), np.nan)
+    rondas = np.full((n, n), np.nan)
+    for (a, b), total in totales.items():
+        pagos[a, b] = total["satisfechas_a"] / total["agentes_a"] if total["agentes_a"] else np.nan
+        exitos[a, b] = total["exitos"] / total["partidas"]
+        rondas[a, b] = total["rondas"] / total["partidas"]
+        if simetrico:
+            # Mismo cruce visto desde b
+            pagos[b, a] = total["satisfechas_b"] / total["agentes_b"] if total["agentes_b"] else np.nan
+            exitos[b, a] = exitos[a, b]
+            rondas[b, a] = rondas[a, b]
+
+    return {
+        "participantes": participantes,
+        "config": dict(config, num_partidas=num_partidas, semilla=semilla),
+        "pagos": pagos,
+        "exitos": exitos,
+        "rondas": rondas,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+# Pago medio de cada participante contra toda la liga (sin contar la diagonal), de mayor a menor
+def clasificacion(liga):
+    pagos = liga["pagos"]
+    fuera_diagonal = ~np.eye(len(pagos), dtype=bool)
+    medias = [float(np.nanmean(fila[mascara])) if mascara.any() else float(fila[i])
+              for i, (fila, mascara) in enumerate(zip(pagos, fuera_diagonal))]
+    orden = np.argsort(medias)[::-1]
+    return [(liga["participantes"][i]["nombre"], medias[i], float(pagos[i, i])) for i in orden]
+
+def guardar_liga(liga, directorio):
+    os.makedirs(directorio, exist_ok=True)
+    nombres = [p["nombre"] for p in liga["participantes"]]
+    with open(os.path.join(directorio, "pagos.csv"), "w", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow([""] + nombres)
+        for nombre, fila in zip(nombres, liga["pagos"]):
+            escritor.writerow([nombre] + [f"{valor:.4f}" for valor in fila])
+    with open(os.path.join(directorio, "liga.json"), "w") as f:
+        json.dump({clave: valor.tolist() if isinstance(valor, np.ndarray) else valor for clave, valor in liga.items()},
+                  f, indent=2)
+    return directorio
+
+def imprimir_liga(liga):
+    nombres = [p["nombre"] for p in liga["participantes"]]
+    ancho = max(8, max(len(nombre) for nombre in nombres))
+    print(f"\nMATRIZ DE PAGOS (fila = agentes de ese modelo, columna = con quién juegan) en {liga['segundos']:.1f} s:")
+    print(" " * (ancho + 4) + " ".join(f"{i:>7}" for i in range(len(nombres))))
+    for i, (nombre, fila) in enumerate(zip(nombres, liga["pagos"])):
+        print(f"{i:>2} {nombre:<{ancho}} " + " ".join(f"{valor:>7.3f}" for valor in fila))
+
+    print(f"\n🏆 CLASIFICACIÓN (pago medio contra el resto de la liga):")
+    for puesto, (nombre, media, propio) in enumerate(clasificacion(liga), 1):
+        print(f"   {puesto:>2}. {nombre:<{ancho}} {media:.3f}  (consigo mismo {propio:.3f})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Liga de checkpoints: partidas con agentes de modelos distintos")
+    parser.add_argument("modelos", nargs="+", help="Zips de PPO o .npz; 'ruta@variante' si no se reconoce la variante")
+    parser.add_argument("--agentes", type=int, default=5)
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--partidas", type=int, default=2_000, help="Partidas por cruce")
+    parser.add_argument("--proporcion", type=float, default=0.5, help="Fracción de agentes del modelo de la fila")
+    parser.add_argument("--rondas", type=int, default=None, help="Rondas por partida (por defecto, las de la variante más larga)")
+    parser.add_argument("--consenso", type=int, default=None,
+                        help="Terminar la partida cuando el resultado se repite estas rondas seguidas")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--bloque", type=int, default=1_000)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--salida", default=os.path.join(BASE_DIR, "liga"), help="Carpeta para pagos.csv y liga.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio_npz:
+        participantes = preparar_participantes(args.modelos, args.agentes, args.variables, directorio_npz)
+        if not participantes:
+            raise SystemExit("❌ Ningún modelo encaja con la configuración de la liga")
+        liga = jugar_liga(participantes, args.partidas, args.agentes, args.variables, args.proporcion, args.rondas,
+                          args.consenso, args.semilla, args.bloque, args.procesos)
+    imprimir_liga(liga)
+    print(f"\n💾 Resultados en {guardar_liga(liga, args.salida)}")
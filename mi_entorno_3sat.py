@@ -1,19 +1,29 @@
 import functools
-import random
 import numpy as np
 from gymnasium.spaces import Discrete, Box, MultiBinary
 from pettingzoo import ParallelEnv
 
+from clausulas import clausulas_a_arrays, clausulas_satisfechas, generar_instancias
+import perfilado
+
 class Entorno3SAT(ParallelEnv):
     metadata = {"render_modes": ["human"], "name": "voto_3sat_v1"}
 
-    def __init__(self, num_agentes=5, num_variables=10):
+    def __init__(self, num_agentes=5, num_variables=10, banco=None, indice_banco=0, limite_pasos=5, rondas_consenso=None):
         # 1. Parche para SuperSuit
         self.render_mode = None
         
         # --- CONFIGURACIÓN DEL TABLERO ---
         self.num_agentes = num_agentes
         self.num_variables = num_variables
+        # Banco de instancias en disco (banco_instancias.py): si se pasa, reset lee de él en vez de generar
+        self.banco = banco
+        self._indice_banco = indice_banco # Primera instancia del banco que juega este entorno
+        # Rondas por partida (antes fijas en step) y parada opcional por consenso
+        self.limite_pasos = limite_pasos
+        self.rondas_consenso = rondas_consenso
+        # Generador propio de cada entorno: reset(seed=...) lo reinicia (partidas reproducibles e independientes)
+        self.rng = np.random.default_rng()
         self.possible_agents = [f"agente_{i}" for i in range(num_agentes)]
 
         # --- ACCIONES ---
@@ -33,6 +43,11 @@ class Entorno3SAT(ParallelEnv):
             for agent in self.possible_agents
         }
 
+        # Buffer de observaciones [agentes, tamano_obs]: el DNI se escribe aquí una sola vez
+        self._obs = np.zeros((self.num_agentes, tamano_obs), dtype=np.float32)
+        self._obs[:, :self.num_agentes] = np.eye(self.num_agentes, dtype=np.float32)
+        self._indice_agente = {agent: i for i, agent in enumerate(self.possible_agents)}
+
     @functools.lru_cache(maxsize=None)#lo mete en la cache para que sea mas eficiente porqeu lo va a estar preguntando todo el rato
     def observation_space(self, agent):#Esto son gets obligados por pettingzoo
         return self.observation_spaces[agent]
@@ -43,18 +58,32 @@ class Entorno3SAT(ParallelEnv):
     
     # --- RESET ---
     def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
         self.agents = self.possible_agents[:]
         self.num_pasos = 0
+        self.rondas_estables = 0
+        self.ronda_consenso = 0
+        self._leyes_previas = None
         self.estado_votacion = np.zeros(self.num_variables, dtype=np.float32)
         self.clausulas_privadas = {}
 
         if options is not None and "problema_inyectado" in options:#modo evaluar
             self.clausulas_privadas = options["problema_inyectado"]#acceso al valor del diccionario cuya clave es "problema_inyectado"
+            # Almacén compacto: variables [A, 3] + signos [A, 3], se convierte una vez por partida
+            self.variables_clausulas, self.signos_clausulas = clausulas_a_arrays(self.clausulas_privadas, self.possible_agents)
+        elif self.banco is not None:
+            # Modo banco: la instancia sale del memmap ya como arrays (sin generar ni convertir)
+            indice = options.get("indice_banco", self._indice_banco) if options else self._indice_banco
+            self.variables_clausulas, self.signos_clausulas = self.banco[indice]
+            self._indice_banco = (indice + 1) % len(self.banco)
         else:#modo entrenamiento
-            for agent in self.agents:
-                vars_interes = random.sample(range(self.num_variables), 3)
-                signos = [random.choice([0, 1]) for _ in range(3)]
-                self.clausulas_privadas[agent] = list(zip(vars_interes, signos))
+            # Todas las cláusulas de una vez (sin bucle por agente); clausulas_privadas solo se rellena
+            # con problema_inyectado: el problema generado está en variables_clausulas / signos_clausulas
+            variables, signos = generar_instancias(self.rng, 1, self.num_agentes, self.num_variables)
+            self.variables_clausulas, self.signos_clausulas = variables[0], signos[0]
+
+        self._escribir_parte_fija()
 
         observations = {}
         for agent in self.agents:
@@ -63,6 +92,10 @@ class Entorno3SAT(ParallelEnv):
         return observations, {}
 
     def step(self, actions):
+        # Perfilado opcional por fases (perfilado.py): con CRONOMETRO = None no se mide nada
+        cronometro = perfilado.CRONOMETRO
+        if cronometro is not None:
+            cronometro.iniciar()
         self.num_pasos += 1
         
         votos_ronda = np.zeros(self.num_variables, dtype=np.float32)
@@ -73,29 +106,35 @@ class Entorno3SAT(ParallelEnv):
             votos_ronda += voto_matematico
 
         self.estado_votacion = votos_ronda
+        self._obs[:, self.num_agentes:self.num_agentes + self.num_variables] = self.estado_votacion
+        if cronometro is not None:
+            cronometro.marcar("votacion")
         
-        LIMITE_PASOS = 5 
-        terminado = (self.num_pasos >= LIMITE_PASOS)
+        # Fin de la partida: limite_pasos rondas o, con rondas_consenso, en cuanto el resultado
+        # (leyes aprobadas) se repite esas rondas seguidas
+        leyes_ronda = self.estado_votacion > 0
+        if self._leyes_previas is not None and np.array_equal(leyes_ronda, self._leyes_previas):
+            self.rondas_estables += 1
+        else:
+            self.rondas_estables = 0
+            self.ronda_consenso = self.num_pasos # Ronda desde la que el resultado ya no cambia
+        self._leyes_previas = leyes_ronda
+        terminado = (self.num_pasos >= self.limite_pasos) or (
+            self.rondas_consenso is not None and self.rondas_estables >= self.rondas_consenso)
         truncado = False 
         
         rewards = {agent: 0.0 for agent in self.agents}
 
         if terminado:
             resultado_final_leyes = (self.estado_votacion > 0).astype(int) #si es mayor que 0 devuelve uno (aprobada) eoc 0 (rechazada)
+            satisfechas = clausulas_satisfechas(resultado_final_leyes, self.variables_clausulas, self.signos_clausulas)
             
-            for agent in self.agents:
-                clausula = self.clausulas_privadas[agent]
-                satisfecho = False
-                
-                for variable_idx, deseo_agente in clausula:
-                    if resultado_final_leyes[variable_idx] == deseo_agente:
-                        satisfecho = True
-                        break 
-                
-                if satisfecho:
-                    rewards[agent] = 100.0
-                else:
-                    rewards[agent] = 0.0
+            for agent, satisfecho in zip(self.agents, satisfechas.tolist()):
+                rewards[agent] = 100.0 if satisfecho else 0.0
+
+        if cronometro is not None:
+            cronometro.marcar("recompensa")
+
         #Puras formalidades para pettinzoo:
         terminations = {agent: terminado for agent in self.agents}
         truncations = {agent: truncado for agent in self.agents}
@@ -104,26 +143,25 @@ class Entorno3SAT(ParallelEnv):
         observations = {agent: self._crear_observacion(agent) for agent in self.agents}
             
         if terminado:
+            # El siguiente reset reescribe el buffer: la observación final sale como copia (terminal_observation)
+            observations = {agent: obs.copy() for agent, obs in observations.items()}
             self.agents = []
 
+        if cronometro is not None:
+            cronometro.marcar("observacion")
+
         return observations, rewards, terminations, truncations, infos #estanar de pettingzoo
 
     # CAMBIO CLAVE: Nueva función para crear la observación con el DNI
+    # Parte fija por partida (cláusulas). El tablero empieza a 0 y se refresca en step
+    def _escribir_parte_fija(self):
+        inicio_clausulas = self.num_agentes + self.num_variables
+        self._obs[:, self.num_agentes:inicio_clausulas] = 0.0
+
+        # 3. Datos Globales (Cláusulas de todos): los mismos pares (var, signo) para todos los agentes
+        pares = np.stack([self.variables_clausulas, self.signos_clausulas], axis=-1).reshape(-1)
+        self._obs[:, inicio_clausulas:] = pares
+
+    # La observación es una vista de la fila del agente en el buffer (sin copias)
     def _crear_observacion(self, agent):
-        # 1. DNI del Agente (One-hot encoding: [1,0,0,0,0] = Agente 0)
-        agente_idx = int(agent.split("_")[1])
-        id_one_hot = [0.0] * self.num_agentes
-        id_one_hot[agente_idx] = 1.0
-
-        # 2. Datos Públicos
-        datos_publicos = self.estado_votacion.tolist()
-
-        # 3. Datos Globales (Cláusulas de todos)
-        datos_clausulas_globales = []
-        for nombre_agente in self.possible_agents:
-            clausula = self.clausulas_privadas[nombre_agente]
-            for var_idx, signo in clausula:
-                datos_clausulas_globales.extend([var_idx, signo])
-        
-        # Unimos: DNI + Tablero + Cláusulas
-        return np.array(id_one_hot + datos_publicos + datos_clausulas_globales, dtype=np.float32)
\ No newline at end of file
+        return self._obs[self._indice_agente[agent]]
\ No newline at end of file
@@ -0,0 +1,171 @@
+import functools
+import numpy as np
+from gymnasium.spaces import Box
+from pettingzoo import ParallelEnv
+
+from clausulas import clausulas_a_arrays, clausulas_satisfechas, generar_instancias
+import perfilado
+
+# --- IDENTIDAD COMPACTA: el índice del agente en binario (2^14 = 16.384 agentes como mucho) ---
+# Sustituye al DNI one-hot, que crece con la población
+BITS_IDENTIDAD = 14
+
+def codificar_identidad(indices, bits=BITS_IDENTIDAD):
+    indices = np.asarray(indices, dtype=np.int64)
+    return ((indices[..., None] >> np.arange(bits)) & 1).astype(np.float32)
+
+class Entorno3SAT(ParallelEnv):
+    metadata = {"render_modes": ["human"], "name": "voto_3sat_v5_poblacion"}
+
+    # Modo poblaciones grandes (1.000-10.000 votantes): la observación de cada agente NO depende
+    # de num_agentes, así que la red de PPO y el coste por agente son los mismos con 5 que con 10.000
+    def __init__(self, num_agentes=1000, num_variables=10, banco=None, indice_banco=0, limite_pasos=5, rondas_consenso=None):
+        self.render_mode = None
+
+        if num_agentes > 2 ** BITS_IDENTIDAD:
+            raise ValueError(f"Como mucho {2 ** BITS_IDENTIDAD} agentes con {BITS_IDENTIDAD} bits de identidad")
+
+        self.num_agentes = num_agentes
+        self.num_variables = num_variables
+        # Banco de instancias en disco (banco_instancias.py): si se pasa, reset lee de él en vez de generar
+        self.banco = banco
+        self._indice_banco = indice_banco # Primera instancia del banco que juega este entorno
+        # Rondas por partida (antes fijas en step) y parada opcional por consenso
+        self.limite_pasos = limite_pasos
+        self.rondas_consenso = rondas_consenso
+        # Generador propio de cada entorno: reset(seed=...) lo reinicia (partidas reproducibles e independientes)
+        self.rng = np.random.default_rng()
+        self.possible_agents = [f"agente_{i}" for i in range(num_agentes)]
+
+        self.action_spaces = {
+            agent: Box(low=0, high=1, shape=(self.num_variables,), dtype=np.float32)
+            for agent in self.possible_agents
+        }
+
+        # --- OBSERVACIÓN (V5) ---
+        # Identidad binaria (14) + Tablero normalizado por el número de agentes (10) + Mapa Posicional (10) = 34
+        tamano_obs = BITS_IDENTIDAD + self.num_variables + self.num_variables
+
+        self.observation_spaces = {
+            agent: Box(low=-float("inf"), high=float("inf"), shape=(tamano_obs,), dtype=np.float32)
+            for agent in self.possible_agents
+        }
+
+        # Buffer de observaciones [agentes, tamano_obs]: la identidad se escribe aquí una sola vez
+        self._obs = np.zeros((self.num_agentes, tamano_obs), dtype=np.float32)
+        self._obs[:, :BITS_IDENTIDAD] = codificar_identidad(np.arange(self.num_agentes))
+        self._indice_agente = {agent: i for i, agent in enumerate(self.possible_agents)}
+
+    @functools.lru_cache(maxsize=None)
+    def observation_space(self, agent):
+        return self.observation_spaces[agent]
+
+    @functools.lru_cache(maxsize=None)
+    def action_space(self, agent):
+        return self.action_spaces[agent]
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.agents = self.possible_agents[:]
+        self.num_pasos = 0
+        self.rondas_estables = 0
+        self.ronda_consenso = 0
+        self._leyes_previas = None
+        self.estado_votacion = np.zeros(self.num_variables, dtype=np.float32)
+        self.clausulas_privadas = {}
+
+        if options is not None and "problema_inyectado" in options:
+            self.clausulas_privadas = options["problema_inyectado"]
+            self.variables_clausulas, self.signos_clausulas = clausulas_a_arrays(self.clausulas_privadas, self.possible_agents)
+        elif self.banco is not None:
+            indice = options.get("indice_banco", self._indice_banco) if options else self._indice_banco
+            self.variables_clausulas, self.signos_clausulas = self.banco[indice]
+            self._indice_banco = (indice + 1) % len(self.banco)
+        else:
+            # Todas las cláusulas de una vez (sin bucle por agente); clausulas_privadas solo se rellena
+            # con problema_inyectado: el problema generado está en variables_clausulas / signos_clausulas
+            variables, signos = generar_instancias(self.rng, 1, self.num_agentes, self.num_variables)
+            self.variables_clausulas, self.signos_clausulas = variables[0], signos[0]
+
+        self._escribir_parte_fija()
+
+        observations = {}
+        for agent in self.agents:
+            observations[agent] = self._crear_observacion(agent)
+
+        return observations, {}
+
+    def step(self, actions):
+        # Perfilado opcional por fases (perfilado.py): con CRONOMETRO = None no se mide nada
+        cronometro = perfilado.CRONOMETRO
+        if cronometro is not None:
+            cronometro.iniciar()
+        self.num_pasos += 1
+
+        # Con miles de agentes los votos se suman como una matriz [agentes, variables]
+        acciones = np.stack(list(actions.values()))
+        votos_ronda = np.where(acciones > 0.5, 1.0, -1.0).sum(axis=0).astype(np.float32)
+
+        self.estado_votacion = votos_ronda
+        # Tablero normalizado a [-1, 1]: la escala no cambia con el tamaño de la población
+        self._obs[:, BITS_IDENTIDAD:BITS_IDENTIDAD + self.num_variables] = self.estado_votacion / self.num_agentes
+        if cronometro is not None:
+            cronometro.marcar("votacion")
+
+        # Fin de la partida: limite_pasos rondas o, con rondas_consenso, en cuanto el resultado
+        # (leyes aprobadas) se repite esas rondas seguidas
+        leyes_ronda = self.estado_votacion > 0
+        if self._leyes_previas is not None and np.array_equal(leyes_ronda, self._leyes_previas):
+            self.rondas_estables += 1
+        else:
+            self.rondas_estables = 0
+            self.ronda_consenso = self.num_pasos # Ronda desde la que el resultado ya no cambia
+        self._leyes_previas = leyes_ronda
+        terminado = (self.num_pasos >= self.limite_pasos) or (
+            self.rondas_consenso is not None and self.rondas_estables >= self.rondas_consenso)
+        truncado = False
+
+        rewards = {agent: 0.0 for agent in self.agents}
+
+        if terminado:
+            resultado_final_leyes = (self.estado_votacion > 0).astype(int)
+            satisfechas = clausulas_satisfechas(resultado_final_leyes, self.variables_clausulas, self.signos_clausulas)
+
+            # Recompensa egoísta: con miles de agentes la cooperativa (20 pts x cláusula) no tiene escala fija
+            for agent, satisfecho in zip(self.agents, satisfechas.tolist()):
+                rewards[agent] = 100.0 if satisfecho else 0.0
+
+        if cronometro is not None:
+            cronometro.marcar("recompensa")
+
+        terminations = {agent: terminado for agent in self.agents}
+        truncations = {agent: truncado for agent in self.agents}
+        infos = {agent: {} for agent in self.agents}
+
+        observations = {agent: self._crear_observacion(agent) for agent in self.agents}
+
+        if terminado:
+            # El siguiente reset reescribe el buffer: la observación final sale como copia (terminal_observation)
+            observations = {agent: obs.copy() for agent, obs in observations.items()}
+            self.agents = []
+
+        if cronometro is not None:
+            cronometro.marcar("observacion")
+
+        return observations, rewards, terminations, truncations, infos
+
+    # Parte fija por partida (cláusulas). El tablero empieza a 0 y se refresca en step
+    def _escribir_parte_fija(self):
+        inicio_clausulas = BITS_IDENTIDAD + self.num_variables
+        self._obs[:, BITS_IDENTIDAD:inicio_clausulas] = 0.0
+
+        # Mapa Posicional: 1 si quiere Sí, -1 si quiere No. El resto se queda en 0.
+        mapa_leyes = self._obs[:, inicio_clausulas:]
+        mapa_leyes[:] = 0.0
+        filas = np.arange(self.num_agentes)[:, None]
+        mapa_leyes[filas, self.variables_clausulas] = np.where(self.signos_clausulas == 1, 1.0, -1.0)
+
+    # La observación es una vista de la fila del agente en el buffer (sin copias)
+    def _crear_observacion(self, agent):
+        return self._obs[self._indice_agente[agent]]
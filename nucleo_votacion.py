@@ -0,0 +1,137 @@
+import time
+import argparse
+import numpy as np
+
+from clausulas import clausulas_satisfechas
+
+# ==========================================
+# NÚCLEO DEL PASO: acciones -> tablero -> leyes -> cláusulas satisfechas
+# ==========================================
+# Es el trabajo de cada step del motor por lotes (entorno_vectorizado.py) para N partidas a la vez:
+#   acciones [N, A, V] (Box: > 0.5 es Sí; MultiDiscrete: 0/1), variables/signos [N, A, k]
+#   evaluar  [N] partidas en las que hace falta comprobar las cláusulas (las que pueden terminar)
+# Devuelve tablero [N, V] (suma de votos ±1, float32) y satisfechas [N, A] (False donde no se evalúa).
+# Con Numba instalado se usa un único bucle compilado y en paralelo por partidas; si no, NumPy.
+# Las dos versiones dan exactamente lo mismo: tests/test_nucleo_votacion.py compara recompensas, dones y
+# observaciones del motor con cada núcleo; comprobar() (abajo) es una comprobación rápida del núcleo solo.
+
+try:
+    import numba
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    numba = None
+    NUMBA_DISPONIBLE = False
+
+# --- NUMPY (siempre disponible) ---
+def nucleo_numpy(acciones, variables, signos, evaluar):
+    num_agentes = acciones.shape[1]
+    # Suma de ±1 = 2 * (votos a favor) - agentes: exacta en float32
+    tablero = (2 * np.count_nonzero(acciones > 0.5, axis=1) - num_agentes).astype(np.float32)
+    satisfechas = np.zeros(variables.shape[:2], dtype=bool)
+    if evaluar.any():
+        leyes = (tablero[evaluar] > 0).astype(np.int8)
+        satisfechas[evaluar] = clausulas_satisfechas(leyes, variables[evaluar], signos[evaluar])
+    return tablero, satisfechas
+
+# --- NUMBA (opcional): todo fusionado, sin arrays intermedios ---
+if NUMBA_DISPONIBLE:
+    @numba.njit(parallel=True, cache=True)
+    def _nucleo_compilado(acciones, variables, signos, evaluar):
+        num_partidas, num_agentes, num_variables = acciones.shape
+        literales = variables.shape[2]
+        tablero = np.zeros((num_partidas, num_variables), dtype=np.float32)
+        satisfechas = np.zeros((num_partidas, num_agentes), dtype=np.bool_)
+        for p in numba.prange(num_partidas):
+            for a in range(num_agentes):
+                for v in range(num_variables):
+                    if acciones[p, a, v] > 0.5:
+                        tablero[p, v] += 1.0
+                    else:
+                        tablero[p, v] -= 1.0
+            if evaluar[p]:
+                for a in range(num_agentes):
+                    for i in range(literales):
+                        aprobada = 1 if tablero[p, variables[p, a, i]] > 0 else 0
+                        if aprobada == signos[p, a, i]:
+                            satisfechas[p, a] = True
+                            break
+        return tablero, satisfechas
+
+def nucleo_numba(acciones, variables, signos, evaluar):
+    if not NUMBA_DISPONIBLE:
+        raise ImportError("Numba no está instalado (pip install numba)")
+    return _nucleo_compilado(np.ascontiguousarray(acciones), variables, signos, evaluar)
+
+NUCLEOS = {"numpy": nucleo_numpy, "numba": nucleo_numba}
+
+# Hilos del bucle en paralelo de Numba. En los procesos de un pool (evaluación, barridos, liga, VecEnv
+# multiproceso) el paralelismo ya lo ponen los procesos: con un hilo por proceso no se pisan los núcleos.
+# Sin Numba no hace nada.
+def limitar_hilos(num_hilos=1):
+    if NUMBA_DISPONIBLE:
+        numba.set_num_threads(min(num_hilos, numba.config.NUMBA_NUM_THREADS))
+
+# "auto": Numba si está instalado, si no NumPy
+def elegir_nucleo(nombre="auto"):
+    if nombre == "auto":
+        nombre = "numba" if NUMBA_DISPONIBLE else "numpy"
+    if nombre not in NUCLEOS:
+        raise ValueError(f"Núcleo desconocido: {nombre} (opciones: auto, {', '.join(NUCLEOS)})")
+    return NUCLEOS[nombre]
+
+
+# ==========================================
+# EQUIVALENCIA Y VELOCIDAD
+# ==========================================
+# Acciones Box y MultiDiscrete al azar, con empates en el tablero (número par de agentes) y partidas
+# evaluadas y sin evaluar. Devuelve el número de diferencias en tablero y en satisfechas (0 y 0).
+def comprobar(num_partidas=4096, num_agentes=6, num_variables=10, literales=3, semilla=0):
+    from clausulas import generar_instancias
+
+    if not NUMBA_DISPONIBLE:
+        raise ImportError("Sin Numba no hay nada que comparar: solo existe el núcleo NumPy")
+    rng = np.random.default_rng(semilla)
+    variables, signos = generar_instancias(rng, num_partidas, num_agentes, num_variables, literales)
+    evaluar = rng.random(num_partidas) < 0.7
+    diferencias_tablero, diferencias_satisfechas = 0, 0
+    for acciones in (rng.random((num_partidas, num_agentes, num_variables), dtype=np.float32),
+                     rng.integers(0, 2, (num_partidas, num_agentes, num_variables))):
+        tablero, satisfechas = nucleo_numpy(acciones, variables, signos, evaluar)
+        tablero_numba, satisfechas_numba = nucleo_numba(acciones, variables, signos, evaluar)
+        diferencias_tablero += int((tablero != tablero_numba).sum())
+        diferencias_satisfechas += int((satisfechas != satisfechas_numba).sum())
+    return diferencias_tablero, diferencias_satisfechas
+
+def medir(nucleo, num_partidas, num_agentes, num_variables, repeticiones=200, semilla=0):
+    from clausulas import generar_instancias
+
+    rng = np.random.default_rng(semilla)
+    variables, signos = generar_instancias(rng, num_partidas, num_agentes, num_variables)
+    acciones = rng.random((num_partidas, num_agentes, num_variables), dtype=np.float32)
+    evaluar = np.ones(num_partidas, dtype=bool)
+    funcion = elegir_nucleo(nucleo)
+    funcion(acciones, variables, signos, evaluar) # Compilación (Numba) fuera de la medida
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(acciones, variables, signos, evaluar)
+    return (time.perf_counter() - inicio) / repeticiones
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Núcleo de votación: equivalencia NumPy/Numba y velocidad")
+    parser.add_argument("--comprobar", action="store_true", help="Comparar los dos núcleos con partidas al azar")
+    parser.add_argument("--partidas", type=int, nargs="+", default=[64, 1024, 16384])
+    parser.add_argument("--agentes", type=int, default=40)
+    parser.add_argument("--variables", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"⚙️  Numba {'disponible' if NUMBA_DISPONIBLE else 'no instalado: se usa NumPy'}")
+    if args.comprobar:
+        diferencias_tablero, diferencias_satisfechas = comprobar()
+        estado = "✅" if diferencias_tablero == diferencias_satisfechas == 0 else "❌"
+        print(f"{estado} Diferencias: tablero {diferencias_tablero}, cláusulas satisfechas {diferencias_satisfechas}")
+
+    for num_partidas in args.partidas:
+        linea = f"   > {num_partidas} partidas x {args.agentes} agentes:"
+        for nucleo in NUCLEOS if NUMBA_DISPONIBLE else ["numpy"]:
+            linea += f"  {nucleo} {medir(nucleo, num_partidas, args.agentes, args.variables) * 1e6:.1f} µs"
+        print(linea)
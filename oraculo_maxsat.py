@@ -0,0 +1,163 @@
+import numpy as np
+
+# ==========================================
+# ORÁCULO EXACTO MAX-3SAT
+# ==========================================
+# Dado un problema (variables/signos [A, 3] o un lote [M, A, 3]) devuelve el máximo
+# número de cláusulas que puede satisfacer CUALQUIER resultado de la votación.
+# Con pocas variables se prueban todas las asignaciones a la vez con máscaras de bits;
+# con muchas, ramificación y poda sobre bitsets de cláusulas.
+
+LIMITE_FUERZA_BRUTA = 14 # 2^14 asignaciones por problema como mucho
+ELEMENTOS_POR_TROZO = 1 << 24 # Tamaño máximo de la matriz [problemas, agentes, asignaciones]
+
+# --- MÁSCARAS: una cláusula se incumple solo si vale exactamente su patrón negativo ---
+# union = bits de sus variables, negativas = bits de las variables que quiere rechazar (signo 0)
+def _mascaras_clausulas(variables, signos):
+    bits = np.left_shift(np.int64(1), variables.astype(np.int64))
+    union = np.bitwise_or.reduce(bits, axis=-1)
+    negativas = np.bitwise_or.reduce(np.where(signos == 0, bits, 0), axis=-1)
+    return union, negativas
+
+def optimos_fuerza_bruta(variables, signos, num_variables):
+    union, negativas = _mascaras_clausulas(variables, signos)
+    total, num_agentes = union.shape
+    asignaciones = np.arange(1 << num_variables, dtype=np.int64)
+
+    optimos = np.zeros(total, dtype=np.int64)
+    trozo = max(1, ELEMENTOS_POR_TROZO // (num_agentes * len(asignaciones)))
+    for inicio in range(0, total, trozo):
+        u = union[inicio:inicio + trozo, :, None]
+        n = negativas[inicio:inicio + trozo, :, None]
+        incumplidas = ((asignaciones & u) == n).sum(axis=1)
+        optimos[inicio:inicio + trozo] = num_agentes - incumplidas.min(axis=1)
+    return optimos
+
+# --- COTA INFERIOR: búsqueda local tipo WalkSAT sobre el problema (índices locales 0..n-1) ---
+def _busqueda_local(locales, signos, num_locales, max_cambios=2_000, ruido=0.3, semilla=0):
+    rng = np.random.default_rng(semilla)
+    num_agentes = len(locales)
+
+    # Arranque: voto de la mayoría de literales en cada variable
+    votos = np.zeros(num_locales)
+    np.add.at(votos, locales, np.where(signos == 1, 1.0, -1.0))
+    asignacion = (votos >= 0).astype(np.int8)
+
+    mejor = 0
+    for _ in range(max_cambios):
+        cumplidas = (asignacion[locales] == signos).any(axis=1)
+        mejor = max(mejor, int(cumplidas.sum()))
+        if mejor == num_agentes:
+            break
+
+        j = rng.choice(np.flatnonzero(~cumplidas))
+        candidatas = locales[j]
+        if rng.random() < ruido:
+            elegida = rng.choice(candidatas)
+        else:
+            # La variable de la cláusula cuyo cambio deja más cláusulas cumplidas
+            puntuaciones = []
+            for var_idx in candidatas:
+                asignacion[var_idx] ^= 1
+                puntuaciones.append(int((asignacion[locales] == signos).any(axis=1).sum()))
+                asignacion[var_idx] ^= 1
+            elegida = candidatas[int(np.argmax(puntuaciones))]
+        asignacion[elegida] ^= 1
+
+    return mejor
+
+# --- ORDEN DE RAMIFICACIÓN: que las cláusulas se cierren cuanto antes (mejor poda) ---
+def _orden_variables(locales, num_locales):
+    pendientes_por_clausula = np.array([len(set(fila)) for fila in locales.tolist()])
+    clausulas_de = [[] for _ in range(num_locales)]
+    for j, fila in enumerate(locales.tolist()):
+        for var_idx in set(fila):
+            clausulas_de[var_idx].append(j)
+
+    orden = []
+    elegidas = np.zeros(num_locales, dtype=bool)
+    for _ in range(num_locales):
+        mejor, mejor_puntuacion = -1, None
+        for var_idx in np.flatnonzero(~elegidas):
+            restantes = pendientes_por_clausula[clausulas_de[var_idx]]
+            # 1º cláusulas que cierra, 2º cláusulas ya empezadas que toca, 3º apariciones
+            puntuacion = (int((restantes == 1).sum()), int((restantes < 3).sum()), len(restantes))
+            if mejor_puntuacion is None or puntuacion > mejor_puntuacion:
+                mejor, mejor_puntuacion = var_idx, puntuacion
+        orden.append(mejor)
+        elegidas[mejor] = True
+        pendientes_por_clausula[clausulas_de[mejor]] -= 1
+    return orden
+
+# --- RAMIFICACIÓN Y PODA (un problema, bitsets de cláusulas como enteros de Python) ---
+def optimo_ramificacion(variables, signos):
+    variables = np.asarray(variables)
+    signos = np.asarray(signos)
+    num_agentes = len(variables)
+    todas = (1 << num_agentes) - 1
+
+    # Solo importan las variables que aparecen: se renumeran 0..n-1
+    usadas, locales = np.unique(variables, return_inverse=True)
+    locales = locales.reshape(variables.shape)
+    num_locales = len(usadas)
+
+    mejor = _busqueda_local(locales, signos, num_locales)
+    if mejor == num_agentes:
+        return mejor
+
+    orden = _orden_variables(locales, num_locales)
+    posicion = np.empty(num_locales, dtype=np.int64)
+    posicion[orden] = np.arange(num_locales)
+
+    positivas = [0] * num_locales # cláusulas que se cumplen si la variable k (en el orden) se aprueba
+    negativas = [0] * num_locales # cláusulas que se cumplen si se rechaza
+    cierra = [0] * num_locales    # cláusulas cuya última variable (en el orden) es la k
+    for j in range(num_agentes):
+        ks = posicion[locales[j]]
+        for k, signo in zip(ks.tolist(), signos[j].tolist()):
+            if signo == 1:
+                positivas[k] |= 1 << j
+            else:
+                negativas[k] |= 1 << j
+        cierra[int(ks.max())] |= 1 << j
+
+    pila = [(0, 0, 0)] # (siguiente variable, cláusulas satisfechas, cláusulas muertas)
+    while pila and mejor < num_agentes:
+        k, satisfechas, muertas = pila.pop()
+        if k == num_locales:
+            mejor = max(mejor, bin(satisfechas).count("1"))
+            continue
+
+        ramas = []
+        for cumple in (positivas[k], negativas[k]):
+            nuevas_satisfechas = satisfechas | cumple
+            nuevas_muertas = muertas | (cierra[k] & ~nuevas_satisfechas & todas)
+            cota = num_agentes - bin(nuevas_muertas).count("1")
+            if cota > mejor:
+                ramas.append((cota, bin(nuevas_satisfechas).count("1"), nuevas_satisfechas, nuevas_muertas))
+
+        # La rama más prometedora se explora primero (va la última a la pila)
+        for _, _, nuevas_satisfechas, nuevas_muertas in sorted(ramas, key=lambda rama: rama[:2]):
+            pila.append((k + 1, nuevas_satisfechas, nuevas_muertas))
+
+    return mejor
+
+# --- ENTRADA GENERAL: lote de problemas ---
+def optimos_maxsat(variables, signos, num_variables):
+    variables = np.asarray(variables)
+    signos = np.asarray(signos)
+    un_solo_problema = variables.ndim == 2
+    if un_solo_problema:
+        variables, signos = variables[None], signos[None]
+
+    if num_variables <= LIMITE_FUERZA_BRUTA:
+        optimos = optimos_fuerza_bruta(variables, signos, num_variables)
+    else:
+        optimos = np.array([optimo_ramificacion(v, s) for v, s in zip(variables, signos)], dtype=np.int64)
+
+    return int(optimos[0]) if un_solo_problema else optimos
+
+# Ratio de aproximación por partida (1.0 = la votación alcanzó el óptimo)
+def ratio_aproximacion(satisfechas, optimos):
+    optimos = np.asarray(optimos, dtype=np.float64)
+    return np.divide(satisfechas, optimos, out=np.ones_like(optimos), where=optimos > 0)
@@ -0,0 +1,132 @@
+import time
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+# ==========================================
+# 1. CRONÓMETRO POR FASES (opcional, por proceso)
+# ==========================================
+# Los entornos miran CRONOMETRO al empezar cada step: si es None (por defecto) no miden nada
+# y el coste es una comprobación por fase. activar_perfilado() lo crea en el proceso actual;
+# con VecEnvMultiproceso cada trabajador activa el suyo (crear_entorno(..., perfilar=True)).
+CRONOMETRO = None
+
+class Cronometro:
+    def __init__(self):
+        self.segundos = {}
+        self._ultimo = 0.0
+
+    def iniciar(self):
+        self._ultimo = time.perf_counter()
+
+    # Suma a la fase el tiempo desde la última marca (o desde iniciar)
+    def marcar(self, fase):
+        ahora = time.perf_counter()
+        self.segundos[fase] = self.segundos.get(fase, 0.0) + ahora - self._ultimo
+        self._ultimo = ahora
+
+    # Devuelve lo acumulado y empieza de cero
+    def extraer(self):
+        segundos, self.segundos = self.segundos, {}
+        return segundos
+
+def activar_perfilado():
+    global CRONOMETRO
+    if CRONOMETRO is None:
+        CRONOMETRO = Cronometro()
+    return CRONOMETRO
+
+# Fases medidas dentro del entorno (suma de todos los procesos si hay varios)
+def fases_entorno(training_env):
+    if hasattr(training_env, "perfiles_trabajadores"):
+        total = {}
+        for perfil in training_env.perfiles_trabajadores():
+            for fase, segundos in perfil.items():
+                total[fase] = total.get(fase, 0.0) + segundos
+        return total
+    return CRONOMETRO.extraer() if CRONOMETRO is not None else {}
+
+
+# ==========================================
+# 2. ENVOLTORIO: tiempo total de step del VecEnv visto por PPO
+# ==========================================
+# Incluye SuperSuit / tuberías entre procesos; restándole las fases internas del entorno
+# queda el coste de los envoltorios.
+class VecEnvCronometrado(VecEnvWrapper):
+    def __init__(self, venv):
+        super().__init__(venv)
+        self.segundos_step = 0.0
+        self._inicio = 0.0
+
+    def reset(self):
+        return self.venv.reset()
+
+    def step_async(self, actions):
+        self._inicio = time.perf_counter()
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        resultado = self.venv.step_wait()
+        self.segundos_step += time.perf_counter() - self._inicio
+        return resultado
+
+    def extraer(self):
+        segundos, self.segundos_step = self.segundos_step, 0.0
+        return segundos
+
+
+# ==========================================
+# 3. CALLBACK: rollout vs optimización + fases del entorno
+# ==========================================
+class CallbackPerfilado(BaseCallback):
+    def __init__(self, verbose=1):
+        super().__init__(verbose)
+        self.totales = {}
+        self._inicio_rollout = None
+        self._fin_rollout = None
+
+    def _acumular(self, fase, segundos):
+        self.totales[fase] = self.totales.get(fase, 0.0) + segundos
+        self.logger.record(f"perfil/{fase}_s", segundos)
+
+    def _on_training_start(self):
+        self.totales = {}
+        self._fin_rollout = None
+
+    def _on_rollout_start(self):
+        ahora = time.perf_counter()
+        # Lo que pasó desde el final del rollout anterior es la actualización de PPO (train)
+        if self._fin_rollout is not None:
+            self._acumular("optimizacion", ahora - self._fin_rollout)
+        self._inicio_rollout = ahora
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        self._fin_rollout = time.perf_counter()
+        rollout = self._fin_rollout - self._inicio_rollout
+        self._acumular("rollout", rollout)
+
+        # Desglose del rollout: step del VecEnv (envoltorios + entorno) y el resto (política, buffer)
+        if isinstance(self.training_env, VecEnvCronometrado):
+            vecenv = self.training_env.extraer()
+            fases = fases_entorno(self.training_env.venv)
+            for fase, segundos in fases.items():
+                self._acumular(f"entorno_{fase}", segundos)
+            self._acumular("envoltorios", max(0.0, vecenv - sum(fases.values())))
+            self._acumular("politica_y_buffer", max(0.0, rollout - vecenv))
+
+    def _on_training_end(self):
+        if self._fin_rollout is not None:
+            self.totales["optimizacion"] = self.totales.get("optimizacion", 0.0) + time.perf_counter() - self._fin_rollout
+        if self.verbose:
+            imprimir_perfil(self.totales)
+
+def imprimir_perfil(totales):
+    total = totales.get("rollout", 0.0) + totales.get("optimizacion", 0.0)
+    print("---------------------------------------------------------")
+    print(f"⏱️  PERFIL DEL ENTRENAMIENTO ({total:.1f} s)")
+    for fase, segundos in sorted(totales.items(), key=lambda item: -item[1]):
+        porcentaje = segundos / total if total > 0 else 0.0
+        print(f"   > {fase:<25} {segundos:>10.2f} s  {porcentaje:>7.2%}")
+    print("---------------------------------------------------------")
@@ -0,0 +1,144 @@
+import os
+import argparse
+import numpy as np
+
+# ==========================================
+# POLÍTICA PPO EN NUMPY PURO (sin torch ni stable-baselines3)
+# ==========================================
+# Del zip solo hace falta el camino determinista del actor: las capas de mlp_extractor.policy_net,
+# action_net y cómo se convierte su salida en acción. Todo cabe en un .npz de unos pocos KB:
+#   pesos_i / sesgos_i   capas ocultas (Linear), activaciones[i] su activación
+#   pesos_accion / sesgos_accion
+#   tipo_accion          "box" (media recortada a [bajo, alto]) o "multidiscreta" (argmax por ley, nvec)
+
+ACTIVACIONES = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0.0),
+    "Identity": lambda x: x,
+}
+
+# --- EXPORTAR (aquí sí se necesitan torch y SB3, una sola vez) ---
+# Arrays del .npz a partir de un modelo PPO ya cargado (o en pleno entrenamiento)
+def datos_actor(model):
+    from gymnasium.spaces import Box, MultiDiscrete
+    from torch import nn
+
+    politica = model.policy
+    if type(politica.features_extractor).__name__ != "FlattenExtractor":
+        raise ValueError(f"Solo MlpPolicy con FlattenExtractor, no {type(politica.features_extractor).__name__}")
+
+    datos = {"tamano_obs": np.array(model.observation_space.shape[0])}
+    activaciones = []
+    capa = 0
+    for modulo in politica.mlp_extractor.policy_net:
+        if isinstance(modulo, nn.Linear):
+            datos[f"pesos_{capa}"] = modulo.weight.detach().cpu().numpy().astype(np.float32)
+            datos[f"sesgos_{capa}"] = modulo.bias.detach().cpu().numpy().astype(np.float32)
+            activaciones.append("Identity")
+            capa += 1
+        elif type(modulo).__name__ in ACTIVACIONES and activaciones:
+            activaciones[-1] = type(modulo).__name__
+        else:
+            raise ValueError(f"Capa no soportada en policy_net: {modulo}")
+    datos["activaciones"] = np.array(activaciones)
+    datos["pesos_accion"] = politica.action_net.weight.detach().cpu().numpy().astype(np.float32)
+    datos["sesgos_accion"] = politica.action_net.bias.detach().cpu().numpy().astype(np.float32)
+
+    espacio = model.action_space
+    if isinstance(espacio, Box):
+        if politica.squash_output:
+            raise ValueError("Acciones con squash_output (tanh) no soportadas")
+        datos["tipo_accion"] = np.array("box")
+        datos["bajo"] = espacio.low.astype(np.float32)
+        datos["alto"] = espacio.high.astype(np.float32)
+    elif isinstance(espacio, MultiDiscrete):
+        datos["tipo_accion"] = np.array("multidiscreta")
+        datos["nvec"] = espacio.nvec.astype(np.int64)
+    else:
+        raise ValueError(f"Espacio de acciones no soportado: {espacio}")
+    return datos
+
+def exportar(ruta_modelo, ruta_npz=None):
+    from stable_baselines3 import PPO
+
+    model = PPO.load(ruta_modelo, device="cpu")
+    ruta_npz = ruta_npz or os.path.splitext(ruta_modelo)[0] + ".npz"
+    np.savez(ruta_npz, **datos_actor(model))
+    return ruta_npz
+
+# --- INFERENCIA: sustituto directo de model.predict(obs, deterministic=True) ---
+class PoliticaNumpy:
+    def __init__(self, ruta_npz):
+        with np.load(ruta_npz) as datos:
+            self.tamano_obs = int(datos["tamano_obs"])
+            activaciones = [str(a) for a in datos["activaciones"]]
+            # Pesos traspuestos una sola vez: x @ W sin copias en cada llamada
+            self.capas = [(np.ascontiguousarray(datos[f"pesos_{i}"].T), datos[f"sesgos_{i}"], ACTIVACIONES[a])
+                          for i, a in enumerate(activaciones)]
+            self.pesos_accion = np.ascontiguousarray(datos["pesos_accion"].T)
+            self.sesgos_accion = datos["sesgos_accion"]
+            self.tipo_accion = str(datos["tipo_accion"])
+            if self.tipo_accion == "box":
+                self.bajo, self.alto = datos["bajo"], datos["alto"]
+            else:
+                self.nvec = datos["nvec"]
+                # Logits de todas las leyes seguidos: trozos de nvec[i] columnas
+                self._cortes = np.cumsum(self.nvec)[:-1]
+
+    def salida(self, obs):
+        x = np.asarray(obs, dtype=np.float32)
+        for pesos, sesgos, activacion in self.capas:
+            x = activacion(x @ pesos + sesgos)
+        return x @ self.pesos_accion + self.sesgos_accion
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        if not deterministic:
+            raise ValueError("PoliticaNumpy solo implementa la política determinista")
+        obs = np.asarray(observation, dtype=np.float32)
+        individual = obs.ndim == 1
+        obs = obs.reshape(-1, self.tamano_obs)
+
+        salida = self.salida(obs)
+        if self.tipo_accion == "box":
+            acciones = np.clip(salida, self.bajo, self.alto)
+        elif np.all(self.nvec == self.nvec[0]):
+            acciones = salida.reshape(len(obs), len(self.nvec), self.nvec[0]).argmax(axis=2)
+        else:
+            acciones = np.stack([trozo.argmax(axis=1) for trozo in np.split(salida, self._cortes, axis=1)], axis=1)
+        return (acciones[0] if individual else acciones), None
+
+    # Voto binario de cada ley, como lo interpretan los entornos (Box: > 0.5; MultiDiscrete: 1 = Sí)
+    def votar(self, obs):
+        acciones, _ = self.predict(obs)
+        return acciones > 0.5
+
+# Compara con model.predict(deterministic=True) sobre observaciones aleatorias:
+# misma acción salvo redondeo de float32, y el mismo voto
+def comprobar(ruta_modelo, ruta_npz, num_obs=10_000, semilla=0):
+    from stable_baselines3 import PPO
+
+    model = PPO.load(ruta_modelo, device="cpu")
+    politica = PoliticaNumpy(ruta_npz)
+    rng = np.random.default_rng(semilla)
+    obs = rng.normal(0.0, 2.0, size=(num_obs, politica.tamano_obs)).astype(np.float32)
+
+    esperadas, _ = model.predict(obs, deterministic=True)
+    obtenidas, _ = politica.predict(obs)
+    diferencia = float(np.abs(np.asarray(esperadas, dtype=np.float64) - obtenidas).max())
+    votos_distintos = int(((np.asarray(esperadas) > 0.5) != (obtenidas > 0.5)).sum())
+    return diferencia, votos_distintos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta el actor de un modelo PPO a NumPy puro (.npz)")
+    parser.add_argument("modelos", nargs="+", help="Zips de modelos PPO")
+    parser.add_argument("--salida", default=None, help="Ruta del .npz (solo con un modelo)")
+    parser.add_argument("--comprobar", action="store_true", help="Comparar con model.predict tras exportar")
+    args = parser.parse_args()
+
+    for ruta_modelo in args.modelos:
+        ruta_npz = exportar(ruta_modelo, args.salida if len(args.modelos) == 1 else None)
+        print(f"📦 {ruta_modelo} -> {ruta_npz} ({os.path.getsize(ruta_npz) / 1024:.1f} KB)")
+        if args.comprobar:
+            diferencia, votos_distintos = comprobar(ruta_modelo, ruta_npz)
+            estado = "✅" if votos_distintos == 0 else "❌"
+            print(f"   {estado} diferencia máxima {diferencia:.2e}, votos distintos: {votos_distintos}")
@@ -0,0 +1,380 @@
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# ==========================================
+# PROTOCOLO (socket Unix, mensajes con longitud delante)
+# ==========================================
+# Cada mensaje: 4 bytes con la longitud de la cabecera JSON, la cabecera y, si la cabecera trae
+# "forma" y "dtype", los bytes del array a continuación.
+#   {"orden": "predecir", "modelo": ..., "determinista": true, "forma": [n, obs], "dtype": "float32"} + obs
+#   {"orden": "cargar", "modelo": nombre, "ruta": ...}  -> carga o sustituye en caliente
+#   {"orden": "descargar", "modelo": nombre}
+#   {"orden": "estado"}                                  -> cola y percentiles de latencia por modelo
+# Las respuestas llevan {"error": ...} si algo falla.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOCKET_POR_DEFECTO = "/tmp/marl_3sat_inferencia.sock"
+CABECERA = struct.Struct("!I")
+
+def _empaquetar(cabecera, array=None):
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        cabecera = dict(cabecera, forma=list(array.shape), dtype=array.dtype.str)
+    texto = json.dumps(cabecera).encode()
+    return CABECERA.pack(len(texto)) + texto + (array.tobytes() if array is not None else b"")
+
+def _array(cabecera, datos):
+    return np.frombuffer(datos, dtype=cabecera["dtype"]).reshape(cabecera["forma"])
+
+def _bytes_array(cabecera):
+    if "forma" not in cabecera:
+        return 0
+    return int(np.prod(cabecera["forma"])) * np.dtype(cabecera["dtype"]).itemsize
+
+async def _leer_mensaje(lector):
+    tamano, = CABECERA.unpack(await lector.readexactly(CABECERA.size))
+    cabecera = json.loads(await lector.readexactly(tamano))
+    datos = await lector.readexactly(_bytes_array(cabecera))
+    return cabecera, _array(cabecera, datos) if "forma" in cabecera else None
+
+# El nombre de un modelo es el del fichero sin .zip: "modelos/ppo_3sat_final_v1.zip" -> "ppo_3sat_final_v1"
+def nombre_modelo(ruta):
+    nombre = os.path.basename(ruta)
+    return nombre[:-4] if nombre.endswith(".zip") else nombre
+
+
+# ==========================================
+# 1. SERVIDOR
+# ==========================================
+class _Peticion:
+    def __init__(self, obs, determinista, futuro):
+        self.obs = obs
+        self.determinista = determinista
+        self.futuro = futuro
+        self.llegada = time.perf_counter()
+
+    # El cliente puede haberse ido (futuro cancelado) o la petición estar ya respondida: no se toca
+    def responder(self, acciones):
+        if not self.futuro.done():
+            self.futuro.set_result(acciones)
+
+    def fallar(self, error):
+        if not self.futuro.done():
+            self.futuro.set_exception(error)
+
+class _ModeloServido:
+    def __init__(self, nombre, ruta, model):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.model = model
+        self.cola = asyncio.Queue()
+        self.filas_en_cola = 0
+        self.peticiones = 0
+        self.filas = 0
+        self.lotes = 0
+        self.latencias = collections.deque(maxlen=10_000)
+        self.tarea = None
+
+    def estado(self):
+        latencias = np.array(self.latencias) * 1000.0
+        p50, p90, p99 = np.percentile(latencias, [50, 90, 99]) if len(latencias) else (0.0, 0.0, 0.0)
+        return {
+            "ruta": self.ruta,
+            "peticiones": self.peticiones,
+            "filas": self.filas,
+            "lotes": self.lotes,
+            "filas_por_lote": self.filas / self.lotes if self.lotes else 0.0,
+            "cola_peticiones": self.cola.qsize(),
+            "cola_filas": self.filas_en_cola,
+            "latencia_ms": {"p50": float(p50), "p90": float(p90), "p99": float(p99)},
+        }
+
+# Junta en un solo predict las peticiones que llegan de muchas partidas a la vez: un lote se cierra
+# al llegar a max_lote filas o cuando la primera petición lleva latencia_max segundos esperando.
+# El predict corre en un hilo aparte, así que el siguiente lote se va llenando mientras tanto.
+class ServidorInferencia:
+    def __init__(self, ruta_socket=SOCKET_POR_DEFECTO, max_lote=4096, latencia_max=0.002,
+                 directorio_modelos=os.path.join(BASE_DIR, "modelos")):
+        self.ruta_socket = ruta_socket
+        self.max_lote = max_lote
+        self.latencia_max = latencia_max
+        self.directorio_modelos = directorio_modelos
+        self.modelos = {}
+        self.por_defecto = None
+        self._ejecutor = ThreadPoolExecutor(1)
+        self._bloqueo_carga = asyncio.Lock()
+        self._inicio = time.perf_counter()
+
+    # --- MODELOS (carga en el hilo de inferencia: no bloquea a los clientes) ---
+    def _resolver_ruta(self, modelo):
+        for ruta in (modelo, modelo + ".zip", os.path.join(self.directorio_modelos, modelo),
+                     os.path.join(self.directorio_modelos, modelo + ".zip")):
+            if os.path.isfile(ruta):
+                return ruta
+        raise FileNotFoundError(f"No encuentro el modelo {modelo}")
+
+    async def cargar(self, modelo, ruta=None, solo_si_falta=False):
+        from stable_baselines3 import PPO
+        nombre = nombre_modelo(modelo)
+        async with self._bloqueo_carga:
+            # Varias partidas pidiendo a la vez un modelo nuevo: se carga una sola vez
+            if solo_si_falta and nombre in self.modelos:
+                return nombre
+            ruta = self._resolver_ruta(ruta or modelo)
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(self._ejecutor, lambda: PPO.load(ruta, device="cpu"))
+            return self._instalar(nombre, ruta, model)
+
+    def _instalar(self, nombre, ruta, model):
+        if nombre in self.modelos:
+            # Cambio en caliente: el lote en curso termina con el modelo viejo, los siguientes usan el nuevo
+            self.modelos[nombre].model = model
+            self.modelos[nombre].ruta = ruta
+            print(f"🔄 Modelo {nombre} sustituido por {ruta}")
+        else:
+            servido = _ModeloServido(nombre, ruta, model)
+            servido.tarea = asyncio.create_task(self._agrupar(servido))
+            self.modelos[nombre] = servido
+            print(f"🧠 Modelo {nombre} cargado desde {ruta}")
+        self.por_defecto = self.por_defecto or nombre
+        return nombre
+
+    def descargar(self, nombre):
+        servido = self.modelos.pop(nombre)
+        servido.tarea.cancel()
+        while not servido.cola.empty():
+            servido.cola.get_nowait().fallar(KeyError(f"Modelo {nombre} descargado"))
+        if self.por_defecto == nombre:
+            self.por_defecto = next(iter(self.modelos), None)
+
+    # Un modelo que no está cargado se carga la primera vez que se pide (si existe el fichero)
+    async def _modelo(self, modelo):
+        if modelo is None:
+            if self.por_defecto is None:
+                raise KeyError("No hay ningún modelo cargado")
+            return self.modelos[self.por_defecto]
+        nombre = nombre_modelo(modelo)
+        if nombre not in self.modelos:
+            await self.cargar(modelo, solo_si_falta=True)
+        return self.modelos[nombre]
+
+    # --- MICRO-LOTES ---
+    # Al descargar el modelo la tarea se cancela: las peticiones ya sacadas de la cola (lote en curso)
+    # reciben el error en vez de quedarse esperando para siempre
+    async def _agrupar(self, servido):
+        lote = []
+        try:
+            await self._agrupar_lotes(servido, lote)
+        except asyncio.CancelledError:
+            for peticion in lote:
+                peticion.fallar(KeyError(f"Modelo {servido.nombre} descargado"))
+            raise
+
+    async def _agrupar_lotes(self, servido, lote):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote.clear()
+            lote.append(await servido.cola.get())
+            filas = len(lote[0].obs)
+            limite = lote[0].llegada + self.latencia_max
+            while filas < self.max_lote:
+                if servido.cola.empty():
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        break
+                    try:
+                        peticion = await asyncio.wait_for(servido.cola.get(), restante)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    peticion = servido.cola.get_nowait()
+                lote.append(peticion)
+                filas += len(peticion.obs)
+            servido.filas_en_cola -= filas
+
+            # Un predict por grupo compatible (misma forma de observación y mismo modo)
+            grupos = {}
+            for peticion in lote:
+                grupos.setdefault((peticion.obs.shape[1:], peticion.determinista), []).append(peticion)
+            for (_, determinista), peticiones in grupos.items():
+                obs = np.concatenate([p.obs for p in peticiones])
+                model = servido.model
+                try:
+                    acciones, _ = await loop.run_in_executor(
+                        self._ejecutor, lambda: model.predict(obs, deterministic=determinista))
+                except Exception as e:
+                    for peticion in peticiones:
+                        peticion.fallar(e)
+                    continue
+                inicio = 0
+                ahora = time.perf_counter()
+                for peticion in peticiones:
+                    fin = inicio + len(peticion.obs)
+                    peticion.responder(acciones[inicio:fin])
+                    servido.latencias.append(ahora - peticion.llegada)
+                    inicio = fin
+            servido.lotes += 1
+            servido.filas += filas
+
+    async def predecir(self, obs, modelo=None, determinista=True):
+        servido = await self._modelo(modelo)
+        futuro = asyncio.get_running_loop().create_future()
+        servido.peticiones += 1
+        servido.filas_en_cola += len(obs)
+        servido.cola.put_nowait(_Peticion(obs, determinista, futuro))
+        return await futuro
+
+    def estado(self):
+        return {
+            "segundos": time.perf_counter() - self._inicio,
+            "por_defecto": self.por_defecto,
+            "max_lote": self.max_lote,
+            "latencia_max_ms": self.latencia_max * 1000.0,
+            "modelos": {nombre: servido.estado() for nombre, servido in self.modelos.items()},
+        }
+
+    # --- CONEXIONES ---
+    async def _atender(self, lector, escritor):
+        try:
+            while True:
+                try:
+                    cabecera, array = await _leer_mensaje(lector)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    orden = cabecera["orden"]
+                    if orden == "predecir":
+                        acciones = await self.predecir(array, cabecera.get("modelo"), cabecera.get("determinista", True))
+                        respuesta = _empaquetar({}, acciones)
+                    elif orden == "cargar":
+                        respuesta = _empaquetar({"modelo": await self.cargar(cabecera["modelo"], cabecera.get("ruta"))})
+                    elif orden == "descargar":
+                        self.descargar(nombre_modelo(cabecera["modelo"]))
+                        respuesta = _empaquetar({"modelo": cabecera["modelo"]})
+                    elif orden == "estado":
+                        respuesta = _empaquetar(self.estado())
+                    else:
+                        raise ValueError(f"Orden desconocida: {orden}")
+                except Exception as e:
+                    respuesta = _empaquetar({"error": f"{type(e).__name__}: {e}"})
+                escritor.write(respuesta)
+                await escritor.drain()
+        finally:
+            escritor.close()
+
+    async def servir(self, modelos_iniciales=()):
+        for modelo in modelos_iniciales:
+            nombre, _, ruta = modelo.partition("=")
+            await self.cargar(nombre, ruta or None)
+        if os.path.exists(self.ruta_socket):
+            os.remove(self.ruta_socket)
+        servidor = await asyncio.start_unix_server(self._atender, path=self.ruta_socket)
+        print(f"🚀 Servidor de inferencia en {self.ruta_socket} (lote {self.max_lote}, {self.latencia_max * 1000:.1f} ms)")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            if os.path.exists(self.ruta_socket):
+                os.remove(self.ruta_socket)
+
+
+# ==========================================
+# 2. CLIENTE (síncrono, sustituto directo de model.predict)
+# ==========================================
+# ClienteInferencia(...).predict(obs, deterministic=True) devuelve (acciones, None) como PPO,
+# así que jugar_partidas / ejecutar_partidas_lote lo usan sin cambios.
+class ClienteInferencia:
+    def __init__(self, ruta_socket=SOCKET_POR_DEFECTO, modelo=None):
+        self.modelo = modelo
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(ruta_socket)
+
+    def _leer_exacto(self, tamano):
+        partes = []
+        while tamano:
+            parte = self._socket.recv(min(tamano, 1 << 20))
+            if not parte:
+                raise ConnectionError("El servidor de inferencia cerró la conexión")
+            partes.append(parte)
+            tamano -= len(parte)
+        return b"".join(partes)
+
+    def _pedir(self, cabecera, array=None):
+        self._socket.sendall(_empaquetar(cabecera, array))
+        tamano, = CABECERA.unpack(self._leer_exacto(CABECERA.size))
+        respuesta = json.loads(self._leer_exacto(tamano))
+        if "error" in respuesta:
+            raise RuntimeError(respuesta["error"])
+        datos = self._leer_exacto(_bytes_array(respuesta))
+        return respuesta, _array(respuesta, datos) if "forma" in respuesta else None
+
+    def predict(self, observation, deterministic=True):
+        obs = np.asarray(observation, dtype=np.float32)
+        individual = obs.ndim == 1
+        if individual:
+            obs = obs[None]
+        _, acciones = self._pedir({"orden": "predecir", "modelo": self.modelo, "determinista": bool(deterministic)}, obs)
+        return (acciones[0] if individual else acciones), None
+
+    def cargar(self, modelo, ruta=None):
+        return self._pedir({"orden": "cargar", "modelo": modelo, "ruta": ruta})[0]["modelo"]
+
+    def descargar(self, modelo):
+        self._pedir({"orden": "descargar", "modelo": modelo})
+
+    def estado(self):
+        return self._pedir({"orden": "estado"})[0]
+
+    def cerrar(self):
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+def imprimir_estado(estado):
+    print("---------------------------------------------------------")
+    print(f"🛰️  SERVIDOR DE INFERENCIA ({estado['segundos']:.0f} s, lote {estado['max_lote']}, "
+          f"{estado['latencia_max_ms']:.1f} ms)")
+    for nombre, modelo in estado["modelos"].items():
+        marca = "⭐" if nombre == estado["por_defecto"] else "  "
+        latencia = modelo["latencia_ms"]
+        print(f" {marca} {nombre}: {modelo['peticiones']} peticiones, {modelo['filas_por_lote']:.0f} filas/lote, "
+              f"cola {modelo['cola_peticiones']} ({modelo['cola_filas']} filas)")
+        print(f"      latencia p50 {latencia['p50']:.2f} ms | p90 {latencia['p90']:.2f} ms | p99 {latencia['p99']:.2f} ms")
+    print("---------------------------------------------------------")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de inferencia PPO con micro-lotes")
+    parser.add_argument("--socket", default=SOCKET_POR_DEFECTO)
+    parser.add_argument("--modelo", action="append", default=[],
+                        help="Modelo a cargar al arrancar: nombre o nombre=ruta (se puede repetir)")
+    parser.add_argument("--lote", type=int, default=4096, help="Filas como mucho por predict")
+    parser.add_argument("--latencia-ms", type=float, default=2.0, help="Espera máxima para llenar un lote")
+    parser.add_argument("--estado", action="store_true", help="Mostrar el estado de un servidor ya arrancado")
+    parser.add_argument("--cargar", default=None, help="Cargar o sustituir en caliente (nombre o nombre=ruta) en un servidor ya arrancado")
+    args = parser.parse_args()
+
+    if args.estado or args.cargar:
+        with ClienteInferencia(args.socket) as cliente:
+            if args.cargar:
+                nombre, _, ruta = args.cargar.partition("=")
+                print(f"✅ Modelo {cliente.cargar(nombre, ruta or None)} listo")
+            if args.estado:
+                imprimir_estado(cliente.estado())
+    else:
+        servidor = ServidorInferencia(args.socket, args.lote, args.latencia_ms / 1000.0)
+        try:
+            asyncio.run(servidor.servir(args.modelo))
+        except KeyboardInterrupt:
+            print("\n🛑 Servidor detenido")
@@ -0,0 +1,80 @@
+import os
+import json
+import numpy as np
+
+import almacen_checkpoints
+from almacen_checkpoints import AlmacenCheckpoints
+
+
+def _guardar(almacen, pasos):
+    for p in pasos:
+        almacen.guardar(None, p)
+    almacen.esperar()
+
+
+def _preparar(monkeypatch):
+    monkeypatch.setattr(almacen_checkpoints, "datos_actor", lambda model: {"pesos_0": np.zeros(1)})
+    monkeypatch.setattr(almacen_checkpoints, "instantanea_completa", lambda model: "estado")
+    monkeypatch.setattr(almacen_checkpoints, "zip_completo", lambda instantanea: b"zip")
+
+
+# Un entrenamiento nuevo con el mismo prefijo vuelve a empezar en 0 pasos: sus checkpoints no se borran
+def test_entrenamiento_nuevo_no_hereda_el_indice(tmp_path, monkeypatch):
+    _preparar(monkeypatch)
+    anterior = AlmacenCheckpoints(str(tmp_path), "run", conservar_ultimos=2, conservar_mejores=0)
+    _guardar(anterior, [2_000_000 * i for i in range(1, 7)])
+    anterior.cerrar()
+
+    nuevo = AlmacenCheckpoints(str(tmp_path), "run", conservar_ultimos=2, conservar_mejores=0)
+    _guardar(nuevo, [2_000_000, 4_000_000])
+    nuevo.cerrar()
+
+    for pasos in (2_000_000, 4_000_000):
+        assert os.path.exists(tmp_path / f"run_{pasos}_steps.npz")
+        assert os.path.exists(tmp_path / f"run_{pasos}_steps.zip")
+    with open(tmp_path / "run_indice.json") as f:
+        assert [e["pasos"] for e in json.load(f)["checkpoints"]] == [2_000_000, 4_000_000]
+
+
+# Al continuar se sigue con el índice y la retención cuenta los checkpoints anteriores
+def test_continuar_hereda_el_indice(tmp_path, monkeypatch):
+    _preparar(monkeypatch)
+    anterior = AlmacenCheckpoints(str(tmp_path), "run", conservar_ultimos=3, conservar_mejores=0)
+    _guardar(anterior, [1, 2, 3])
+    anterior.cerrar()
+
+    continuacion = AlmacenCheckpoints(str(tmp_path), "run", conservar_ultimos=3, conservar_mejores=0, continuar=True)
+    _guardar(continuacion, [4])
+    continuacion.cerrar()
+
+    assert sorted(e["pasos"] for e in continuacion.entradas) == [2, 3, 4]
+    assert not os.path.exists(tmp_path / "run_1_steps.npz")
+
+
+# El zip se serializa en el hilo de escritura a partir de una copia: lo que PPO cambie después no le llega
+def test_zip_completo_es_una_instantanea(tmp_path):
+    import torch
+    from stable_baselines3 import PPO
+    from entorno_vectorizado import Entorno3SATVectorizado
+
+    env = Entorno3SATVectorizado(num_partidas=2, num_agentes=4, num_variables=10, variante="voto_3sat_v3", seed=0)
+    model = PPO("MlpPolicy", env, n_steps=8, batch_size=8, device="cpu", seed=0)
+    antes = {k: v.clone() for k, v in model.policy.state_dict().items()}
+
+    almacen = AlmacenCheckpoints(str(tmp_path), "run", conservar_completos=2)
+    almacen.guardar(model, 8)
+    with torch.no_grad():
+        for parametro in model.policy.parameters():
+            parametro.add_(1.0)
+    almacen.guardar(model, 16)
+    almacen.cerrar()
+
+    for pasos, esperado in ((8, antes), (16, model.policy.state_dict())):
+        cargado = PPO.load(tmp_path / f"run_{pasos}_steps.zip", device="cpu")
+        assert all(torch.equal(esperado[k], v) for k, v in cargado.policy.state_dict().items())
+
+    # Sin completos que conservar solo se exporta el actor
+    sin_completos = AlmacenCheckpoints(str(tmp_path / "actor"), "run", conservar_completos=0)
+    sin_completos.guardar(model, 8)
+    sin_completos.cerrar()
+    assert sorted(os.listdir(tmp_path / "actor")) == ["run_8_steps.npz", "run_indice.json"]
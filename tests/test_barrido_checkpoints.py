@@ -0,0 +1,23 @@
+import json
+import zipfile
+
+from barrido_checkpoints import detectar_variante
+
+
+# Zip con solo los metadatos "data" de SB3 que lee detectar_variante
+def zip_falso(ruta, tamano_obs, tipo_accion):
+    datos = {"observation_space": {"_shape": [tamano_obs]},
+             "action_space": {":type:": f"<class 'gymnasium.spaces.{tipo_accion.lower()}.{tipo_accion}'>"}}
+    with zipfile.ZipFile(ruta, "w") as z:
+        z.writestr("data", json.dumps(datos))
+    return str(ruta)
+
+# Con 10 agentes v4 y v6 tienen la misma observación (20): las separa el tipo de acción
+def test_el_tipo_de_accion_desempata(tmp_path):
+    assert detectar_variante(zip_falso(tmp_path / "a.zip", 20, "MultiDiscrete"), 10, 10) == "voto_3sat_v4_egoista"
+    assert detectar_variante(zip_falso(tmp_path / "b.zip", 20, "Box"), 10, 10) == "voto_3sat_v6_agnostico"
+
+# Con 14 agentes v3 y v5 coinciden en observación (34) y acción (Box): no se adivina
+def test_ambigua_devuelve_none(tmp_path, capsys):
+    assert detectar_variante(zip_falso(tmp_path / "c.zip", 34, "Box"), 14, 10) is None
+    assert "ruta@variante" in capsys.readouterr().out
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from barrido_hiperparametros import barrer_hiperparametros, generar_pruebas, pasos_por_actualizacion, semilla_ronda
+
+
+# Con menos pasos que una actualización de PPO todas las rondas entrenarían lo mismo: se rechaza antes de empezar
+def test_presupuesto_menor_que_una_actualizacion(tmp_path):
+    rejilla = {"learning_rate": [0.0003]}
+    actualizacion = pasos_por_actualizacion(generar_pruebas(["voto_3sat_v3"], rejilla, [0])[0], 5, 64)
+    with pytest.raises(ValueError, match="actualización"):
+        barrer_hiperparametros(["voto_3sat_v3"], rejilla, pasos_iniciales=actualizacion - 1, directorio=str(tmp_path))
+
+def test_n_steps_de_la_rejilla():
+    prueba = generar_pruebas(["voto_3sat_v3"], {"n_steps": [16]}, [0])[0]
+    assert pasos_por_actualizacion(prueba, 5, 64) == 16 * 5 * 64
+
+# Cada ronda crea el motor con otra semilla: no repite los problemas de la anterior
+def test_semilla_distinta_por_ronda():
+    from entorno_vectorizado import Entorno3SATVectorizado
+    semillas = [semilla_ronda(0, ronda) for ronda in range(3)]
+    assert len(set(semillas)) == 3 and semillas == [semilla_ronda(0, ronda) for ronda in range(3)]
+    problemas = [Entorno3SATVectorizado(num_partidas=8, num_agentes=5, num_variables=10, variante="voto_3sat_v3",
+                                        seed=semilla).reset() for semilla in semillas[:2]]
+    assert not np.array_equal(*problemas)
@@ -0,0 +1,35 @@
+from functools import partial
+import numpy as np
+import pytest
+
+from banco_instancias import escribir_banco
+from entorno_multiproceso import VecEnvMultiproceso
+from entrenar import crear_entorno
+
+
+# VecEnv.seed() (lo que hace PPO(seed=...)) llega a los trabajadores en el siguiente reset
+@pytest.mark.parametrize("usar_motor", [True, False])
+def test_seed_llega_a_los_trabajadores(usar_motor):
+    observaciones = []
+    for semilla in (3, 3, 4):
+        env = VecEnvMultiproceso([partial(crear_entorno, 4, 10, 2, usar_motor) for _ in range(2)])
+        env.seed(semilla)
+        observaciones.append(env.reset())
+        env.close()
+    assert np.array_equal(observaciones[0], observaciones[1])
+    assert not np.array_equal(observaciones[0], observaciones[2])
+    # Cada trabajador con su propia semilla: no juegan los mismos problemas
+    mitad = len(observaciones[0]) // 2
+    assert not np.array_equal(observaciones[0][:mitad], observaciones[0][mitad:])
+
+
+# Con banco y PettingZoo, cada trabajador empieza en su tramo (como hace entrenar.py): no juegan lo mismo
+def test_trabajadores_con_banco_juegan_instancias_distintas(tmp_path):
+    ruta = str(tmp_path / "banco")
+    escribir_banco(ruta, 100, 4, 10)
+    env = VecEnvMultiproceso([partial(crear_entorno, 4, 10, 2, False, ruta, None, i * 50, tramo_banco=50)
+                              for i in range(2)])
+    obs = env.reset()
+    env.close()
+    assert not np.array_equal(obs[:8], obs[8:])
+    assert not any(np.array_equal(obs[4 * i:4 * i + 4], obs[4 * j:4 * j + 4]) for i in range(4) for j in range(i))
@@ -0,0 +1,28 @@
+import numpy as np
+from stable_baselines3 import PPO
+
+from banco_instancias import escribir_banco
+from entrenar import crear_entorno
+
+
+# PettingZoo + SuperSuit: la semilla llega al primer reset y PPO(seed=...) ya no falla al llamar a seed()
+def test_semilla_con_supersuit():
+    obs = [crear_entorno(4, 10, copias=2, semilla=semilla).reset() for semilla in (5, 5, 6)]
+    assert np.array_equal(obs[0], obs[1])
+    assert not np.array_equal(obs[0], obs[2])
+
+    env = crear_entorno(4, 10, copias=2)
+    PPO("MlpPolicy", env, n_steps=8, batch_size=8, seed=1, device="cpu")
+    assert np.array_equal(env.reset(), crear_entorno(4, 10, copias=2, semilla=1).reset())
+
+
+# PettingZoo + SuperSuit con banco: cada copia juega su propio tramo y indice_banco cuenta
+def test_copias_con_banco_juegan_instancias_distintas(tmp_path):
+    ruta = str(tmp_path / "banco")
+    escribir_banco(ruta, 100, 4, 10)
+
+    obs = crear_entorno(4, 10, copias=2, ruta_banco=ruta).reset()
+    assert not np.array_equal(obs[:4], obs[4:])
+    assert not np.array_equal(obs, crear_entorno(4, 10, copias=2, ruta_banco=ruta, indice_banco=50).reset())
+    # La copia 1 empieza donde el tramo de la copia 0 acaba: instancia 50
+    assert np.array_equal(obs[4:], crear_entorno(4, 10, copias=1, ruta_banco=ruta, indice_banco=50).reset())
@@ -0,0 +1,26 @@
+import numpy as np
+
+from clausulas import generar_instancias
+from evaluacion_masiva import jugar_banco, jugar_partidas
+
+
+# Política de prueba: votos al azar pero reproducibles, con la interfaz de model.predict
+class PoliticaAlAzar:
+    def __init__(self, semilla=0):
+        self.rng = np.random.default_rng(semilla)
+
+    def predict(self, obs, deterministic=True):
+        return self.rng.random((len(obs), 10), dtype=np.float32), None
+
+
+# Con la recompensa cooperativa (v2/v3) y más de 5 agentes, 100 puntos no son "todas las cláusulas"
+def test_exito_cooperativo_con_40_agentes_jugar_partidas():
+    resultado = jugar_partidas(PoliticaAlAzar(), 512, 40, 10, "voto_3sat_v3", semilla=0)
+    assert np.array_equal(resultado["exitos"], resultado["satisfechas"] == 40)
+    assert resultado["exitos"].mean() < 0.5
+
+def test_exito_cooperativo_con_40_agentes_jugar_banco():
+    variables, signos = generar_instancias(np.random.default_rng(1), 512, 40, 10)
+    resultado = jugar_banco(PoliticaAlAzar(), variables, signos, 10, "voto_3sat_v3")
+    assert np.array_equal(resultado["exitos"], resultado["satisfechas"] == 40)
+    assert resultado["exitos"].mean() < 0.5
@@ -0,0 +1,42 @@
+import numpy as np
+
+import evaluacion_periodica
+from evaluacion_periodica import CallbackEvaluacion
+
+
+class Registro:
+    def record(self, clave, valor):
+        pass
+
+class ModeloFalso:
+    logger = Registro()
+
+class AlmacenFalso:
+    def __init__(self):
+        self.guardados, self.puntuados = [], []
+
+    def guardar(self, model, pasos):
+        self.guardados.append(pasos)
+
+    def puntuar(self, pasos, puntuacion):
+        self.puntuados.append((pasos, puntuacion))
+
+
+# Éxito en 0 (40 agentes al principio) pero cláusulas subiendo: no se para, y solo se guardan las mejoras
+def test_no_para_mientras_suben_las_clausulas(monkeypatch):
+    satisfechas = iter([20, 20, 22, 24, 26, 28, 30])
+    def jugar_banco(*args, **kwargs):
+        return {"exitos": np.zeros(4, dtype=bool), "satisfechas": np.full(4, next(satisfechas)),
+                "cambios": np.zeros(4, dtype=bool), "rondas": np.ones(4), "rondas_consenso": np.zeros(4)}
+    monkeypatch.setattr(evaluacion_periodica, "jugar_banco", jugar_banco)
+
+    almacen = AlmacenFalso()
+    callback = CallbackEvaluacion(np.zeros((4, 40, 3), dtype=np.int64), np.zeros((4, 40, 3), dtype=np.int8), 10,
+                                  "voto_3sat_v4_egoista", 100, paciencia=2, almacen=almacen, verbose=0)
+    callback.model = ModeloFalso()
+    for evaluacion in range(1, 8):
+        callback.num_timesteps = evaluacion * 100
+        assert callback._evaluar()
+
+    assert almacen.guardados == [100, 300, 400, 500, 600, 700]
+    assert almacen.puntuados[-1] == (700, 0.75)
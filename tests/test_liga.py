@@ -0,0 +1,11 @@
+from liga import cruces_liga
+
+
+# Un solo cruce por pareja únicamente si los dos modelos controlan el mismo número de agentes
+def test_cruces_simetricos_solo_con_mitades_exactas():
+    simetrico, cruces = cruces_liga(3, 0.5, 6)
+    assert simetrico and len(cruces) == 6
+
+    # 0.5 con 5 agentes son 3 contra 2: hay que jugar (a, b) y (b, a)
+    simetrico, cruces = cruces_liga(3, 0.5, 5)
+    assert not simetrico and len(cruces) == 9 and (0, 1) in cruces and (1, 0) in cruces
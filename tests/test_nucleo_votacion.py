@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import nucleo_votacion
+from entorno_vectorizado import VARIANTES, Entorno3SATVectorizado
+
+pytestmark = pytest.mark.skipif(not nucleo_votacion.NUMBA_DISPONIBLE, reason="Numba no está instalado")
+
+
+# Los dos núcleos, paso a paso con las mismas acciones: mismas recompensas, dones y observaciones
+# (también tras los auto-reset, que generan problemas nuevos con la misma semilla)
+@pytest.mark.parametrize("rondas_consenso", [None, 1])
+@pytest.mark.parametrize("variante", list(VARIANTES))
+def test_numpy_y_numba_dan_lo_mismo(variante, rondas_consenso):
+    motores = [Entorno3SATVectorizado(num_partidas=64, num_agentes=6, num_variables=10, variante=variante, seed=3,
+                                      rondas_consenso=rondas_consenso, nucleo=nucleo)
+               for nucleo in ("numpy", "numba")]
+    obs = [motor.reset() for motor in motores]
+    assert np.array_equal(*obs)
+
+    rng = np.random.default_rng(0)
+    for _ in range(12):
+        if VARIANTES[variante]["accion"] == "box":
+            acciones = rng.random((motores[0].num_envs, 10), dtype=np.float32)
+            # Votos repetidos para que haya consenso (y empates con 6 agentes)
+            acciones[: motores[0].num_envs // 2] = np.round(acciones[: motores[0].num_envs // 2])
+        else:
+            acciones = rng.integers(0, 2, (motores[0].num_envs, 10))
+        (obs_a, recompensas_a, dones_a, _), (obs_b, recompensas_b, dones_b, _) = [motor.step(acciones)
+                                                                                for motor in motores]
+        assert np.array_equal(recompensas_a, recompensas_b)
+        assert np.array_equal(dones_a, dones_b)
+        assert np.array_equal(obs_a, obs_b)
+
+
+# Los trabajadores de los pools llaman a limitar_hilos(1) para no lanzar todos los hilos de Numba en cada proceso
+def test_limitar_hilos():
+    anteriores = nucleo_votacion.numba.get_num_threads()
+    try:
+        nucleo_votacion.limitar_hilos(1)
+        assert nucleo_votacion.numba.get_num_threads() == 1
+    finally:
+        nucleo_votacion.numba.set_num_threads(anteriores)
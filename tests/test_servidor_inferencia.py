@@ -0,0 +1,26 @@
+import time
+import asyncio
+import numpy as np
+
+from servidor_inferencia import ServidorInferencia
+
+
+class ModeloLento:
+    def predict(self, obs, deterministic=True):
+        time.sleep(0.2)
+        return np.zeros((len(obs), 3), dtype=np.int64), None
+
+
+# Descargar un modelo con un lote en pleno predict: las peticiones de ese lote fallan, no se quedan colgadas
+def test_descargar_con_lote_en_curso():
+    async def jugar():
+        servidor = ServidorInferencia(ruta_socket=None, latencia_max=0.0)
+        servidor._instalar("lento", "lento.zip", ModeloLento())
+        peticiones = [asyncio.create_task(servidor.predecir(np.zeros((2, 4), dtype=np.float32), "lento"))
+                      for _ in range(3)]
+        await asyncio.sleep(0.05)
+        servidor.descargar("lento")
+        return await asyncio.wait_for(asyncio.gather(*peticiones, return_exceptions=True), 1.0)
+
+    resultados = asyncio.run(jugar())
+    assert all(isinstance(resultado, KeyError) for resultado in resultados)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from evaluacion_masiva import jugar_partidas
+from trazas import GrabadorTrazas, LectorTrazas
+from test_evaluacion_masiva import PoliticaAlAzar
+
+
+# El éxito leído de las trazas es el mismo que el de la evaluación, también con recompensa cooperativa
+def test_exitos_de_las_trazas(tmp_path):
+    grabador = GrabadorTrazas(str(tmp_path), 40, 10, 5, "voto_3sat_v3")
+    resultado = jugar_partidas(PoliticaAlAzar(), 300, 40, 10, "voto_3sat_v3", semilla=0, grabador=grabador)
+    grabador.cerrar()
+
+    lector = LectorTrazas(str(tmp_path))
+    assert np.array_equal(lector.exitos(), resultado["exitos"])
+    assert np.array_equal(lector.exitos(), lector.clausulas_satisfechas() == 40)
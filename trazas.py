@@ -0,0 +1,259 @@
+import os
+import glob
+import json
+import argparse
+import numpy as np
+
+from clausulas import LITERALES_POR_CLAUSULA, clausulas_satisfechas
+from banco_instancias import _dtype_literales, codificar_literales, decodificar_literales
+
+# ==========================================
+# FORMATO DE TRAZAS (carpeta con un fichero binario por columna)
+# ==========================================
+# Todas las partidas de una grabación tienen la misma forma (A agentes, V leyes, R rondas como mucho),
+# así que cada columna es un array [M, ...] de ancho fijo que se va añadiendo al final del fichero:
+#   literales    [M, A, 3]          cláusulas estilo DIMACS, como en banco_instancias.py
+#   votos        [M, R, A, V/8]     voto binario por ronda y agente, empaquetado a bits (1 = Sí)
+#   tableros     [M, R, V]          suma de votos de cada ronda
+#   leyes        [M, V/8]           resultado final empaquetado a bits
+#   recompensas  [M, A]             float32
+#   rondas       [M]                rondas jugadas (las que sobran hasta R quedan a 0)
+# meta.json guarda cuántas partidas son válidas: se reescribe (atómico) después de cada trozo,
+# así que una grabación cortada a medias se sigue pudiendo leer hasta el último trozo completo.
+
+VERSION_TRAZAS = 1
+
+def _columnas(num_agentes, num_variables, max_rondas):
+    bytes_leyes = (num_variables + 7) // 8
+    return {
+        "literales": (np.dtype(_dtype_literales(num_variables)).name, (num_agentes, LITERALES_POR_CLAUSULA)),
+        "votos": ("uint8", (max_rondas, num_agentes, bytes_leyes)),
+        "tableros": ("int16" if num_agentes < np.iinfo(np.int16).max else "int32", (max_rondas, num_variables)),
+        "leyes": ("uint8", (bytes_leyes,)),
+        "recompensas": ("float32", (num_agentes,)),
+        "rondas": ("uint8", ()),
+    }
+
+def _escribir_meta(ruta, meta):
+    temporal = os.path.join(ruta, "meta.json.tmp")
+    with open(temporal, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(temporal, os.path.join(ruta, "meta.json"))
+
+
+# ==========================================
+# 1. GRABADOR (por lotes de partidas, añadiendo por trozos)
+# ==========================================
+class GrabadorTrazas:
+    def __init__(self, ruta, num_agentes, num_variables, max_rondas, variante=None, partidas_por_trozo=4096):
+        self.ruta = ruta
+        self.partidas_por_trozo = partidas_por_trozo
+        os.makedirs(ruta, exist_ok=True)
+        columnas = _columnas(num_agentes, num_variables, max_rondas)
+
+        ruta_meta = os.path.join(ruta, "meta.json")
+        if os.path.exists(ruta_meta):
+            # Continuar una grabación: misma forma, y lo que quedó tras el último trozo completo se descarta
+            with open(ruta_meta) as f:
+                self.meta = json.load(f)
+            if (self.meta["num_agentes"], self.meta["num_variables"], self.meta["max_rondas"]) != (num_agentes, num_variables, max_rondas):
+                raise ValueError(f"{ruta} ya tiene trazas de otra forma: {self.meta['num_agentes']} agentes, "
+                                 f"{self.meta['num_variables']} variables, {self.meta['max_rondas']} rondas")
+            for nombre, (dtype, forma) in columnas.items():
+                tamano = self.meta["num_partidas"] * np.dtype(dtype).itemsize * int(np.prod(forma))
+                with open(os.path.join(ruta, f"{nombre}.bin"), "r+b") as f:
+                    f.truncate(tamano)
+        else:
+            self.meta = {
+                "version": VERSION_TRAZAS,
+                "num_agentes": num_agentes,
+                "num_variables": num_variables,
+                "max_rondas": max_rondas,
+                "variante": variante,
+                "num_partidas": 0,
+                "columnas": {nombre: {"dtype": dtype, "forma": list(forma)} for nombre, (dtype, forma) in columnas.items()},
+            }
+            for nombre in columnas:
+                open(os.path.join(ruta, f"{nombre}.bin"), "wb").close()
+            _escribir_meta(ruta, self.meta)
+
+        self._columnas = columnas
+        self._pendientes = {nombre: [] for nombre in columnas}
+        self._num_pendientes = 0
+
+    # Lote de n partidas: variables/signos [n, A, 3], votos [n, R, A, V] (bool o 0/1), tableros [n, R, V],
+    # leyes [n, V], recompensas [n, A], rondas [n] (por defecto todas las R)
+    def anadir(self, variables, signos, votos, tableros, leyes, recompensas, rondas=None):
+        n = len(variables)
+        if n == 0:
+            return
+        max_rondas = self.meta["max_rondas"]
+        votos = np.asarray(votos, dtype=bool)
+        tableros = np.asarray(tableros)
+        if votos.shape[1] < max_rondas:
+            # Partidas que acabaron antes: las rondas que faltan se rellenan con ceros
+            relleno = max_rondas - votos.shape[1]
+            votos = np.pad(votos, ((0, 0), (0, relleno), (0, 0), (0, 0)))
+            tableros = np.pad(tableros, ((0, 0), (0, relleno), (0, 0)))
+        if rondas is None:
+            rondas = np.full(n, max_rondas)
+
+        self._pendientes["literales"].append(codificar_literales(np.asarray(variables), np.asarray(signos),
+                                                                 self._columnas["literales"][0]))
+        self._pendientes["votos"].append(np.packbits(votos, axis=-1))
+        self._pendientes["tableros"].append(tableros.astype(self._columnas["tableros"][0]))
+        self._pendientes["leyes"].append(np.packbits(np.asarray(leyes, dtype=bool), axis=-1))
+        self._pendientes["recompensas"].append(np.asarray(recompensas, dtype=np.float32))
+        self._pendientes["rondas"].append(np.asarray(rondas, dtype=np.uint8))
+        self._num_pendientes += n
+        if self._num_pendientes >= self.partidas_por_trozo:
+            self.volcar()
+
+    # Añade al final de cada fichero lo pendiente y solo entonces actualiza meta.json
+    def volcar(self):
+        if self._num_pendientes == 0:
+            return
+        for nombre, bloques in self._pendientes.items():
+            with open(os.path.join(self.ruta, f"{nombre}.bin"), "ab") as f:
+                f.write(np.ascontiguousarray(np.concatenate(bloques)).tobytes())
+            bloques.clear()
+        self.meta["num_partidas"] += self._num_pendientes
+        self._num_pendientes = 0
+        _escribir_meta(self.ruta, self.meta)
+
+    def cerrar(self):
+        self.volcar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+# ==========================================
+# 2. LECTOR (memmap: nada se carga hasta que se pide)
+# ==========================================
+class _Segmento:
+    def __init__(self, ruta):
+        with open(os.path.join(ruta, "meta.json")) as f:
+            self.meta = json.load(f)
+        total = self.meta["num_partidas"]
+        self.columnas = {}
+        for nombre, info in self.meta["columnas"].items():
+            forma = (total,) + tuple(info["forma"])
+            if total == 0:
+                self.columnas[nombre] = np.zeros(forma, dtype=info["dtype"])
+            else:
+                self.columnas[nombre] = np.memmap(os.path.join(ruta, f"{nombre}.bin"), dtype=info["dtype"],
+                                                  mode="r", shape=forma)
+
+# Una carpeta de trazas o una carpeta con varias (p. ej. bloque_00000, bloque_00001... de evaluacion_masiva.py)
+class LectorTrazas:
+    def __init__(self, ruta):
+        if os.path.exists(os.path.join(ruta, "meta.json")):
+            rutas = [ruta]
+        else:
+            rutas = sorted(os.path.dirname(r) for r in glob.glob(os.path.join(ruta, "*", "meta.json")))
+        if not rutas:
+            raise FileNotFoundError(f"No hay trazas en {ruta}")
+        self.segmentos = [_Segmento(r) for r in rutas]
+
+        meta = self.segmentos[0].meta
+        self.num_agentes = meta["num_agentes"]
+        self.num_variables = meta["num_variables"]
+        self.max_rondas = meta["max_rondas"]
+        self.variante = meta["variante"]
+        self._limites = np.cumsum([0] + [s.meta["num_partidas"] for s in self.segmentos])
+
+    def __len__(self):
+        return int(self._limites[-1])
+
+    # --- DECODIFICACIÓN de un trozo de columnas crudas ---
+    def _decodificar(self, crudo):
+        decodificado = {}
+        for nombre, valores in crudo.items():
+            if nombre == "literales":
+                decodificado["variables"], decodificado["signos"] = decodificar_literales(valores)
+            elif nombre == "votos":
+                bits = np.unpackbits(valores, axis=-1, count=self.num_variables)
+                decodificado["votos"] = bits.astype(np.int8) * 2 - 1 # -1/+1, como en evaluar.py
+            elif nombre == "leyes":
+                decodificado["leyes"] = np.unpackbits(valores, axis=-1, count=self.num_variables)
+            else:
+                decodificado[nombre] = np.asarray(valores)
+        return decodificado
+
+    # --- UNA PARTIDA ---
+    def partida(self, indice):
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        s = int(np.searchsorted(self._limites, indice, side="right")) - 1
+        local = indice - self._limites[s]
+        partida = self._decodificar({nombre: col[local] for nombre, col in self.segmentos[s].columnas.items()})
+        rondas = int(partida["rondas"])
+        partida["votos"] = partida["votos"][:rondas]
+        partida["tableros"] = partida["tableros"][:rondas]
+        return partida
+
+    # Repetición ronda a ronda: (ronda, votos [A, V] en -1/+1, tablero [V])
+    def reproducir(self, indice):
+        partida = self.partida(indice)
+        for ronda, (votos, tablero) in enumerate(zip(partida["votos"], partida["tableros"]), start=1):
+            yield ronda, votos, tablero
+
+    # Matriz sondeos x leyes, la misma que historial_votos de evaluar.py
+    def historial_votos(self, indice):
+        return self.partida(indice)["tableros"]
+
+    # --- RECORRIDO POR TROZOS: (índice inicial, columnas decodificadas del trozo) ---
+    # Solo se leen del disco las columnas pedidas y solo un trozo cada vez
+    def trozos(self, columnas=None, tamano_trozo=65_536):
+        columnas = columnas or list(self.segmentos[0].columnas)
+        for s, segmento in enumerate(self.segmentos):
+            total = segmento.meta["num_partidas"]
+            for inicio in range(0, total, tamano_trozo):
+                fin = min(total, inicio + tamano_trozo)
+                crudo = {nombre: segmento.columnas[nombre][inicio:fin] for nombre in columnas}
+                yield int(self._limites[s]) + inicio, self._decodificar(crudo)
+
+    # Índices globales de las partidas que cumplen predicado(trozo) -> array bool por partida
+    def filtrar(self, predicado, columnas=None, tamano_trozo=65_536):
+        seleccion = [inicio + np.flatnonzero(predicado(trozo)) for inicio, trozo in self.trozos(columnas, tamano_trozo)]
+        return np.concatenate(seleccion) if seleccion else np.zeros(0, dtype=np.int64)
+
+    # Aplica funcion(trozo) a cada trozo y concatena los resultados (uno por partida)
+    def agregar(self, funcion, columnas=None, tamano_trozo=65_536):
+        partes = [np.asarray(funcion(trozo)) for _, trozo in self.trozos(columnas, tamano_trozo)]
+        return np.concatenate(partes) if partes else np.zeros(0)
+
+    # --- AGREGADOS HABITUALES ---
+    # Éxito: las cláusulas de todos los agentes satisfechas, como en evaluacion_masiva.py. No sale de las
+    # recompensas: con la cooperativa (v2/v3) o la media (v6) se llega a 100 sin que se cumplan todas
+    def exitos(self, tamano_trozo=65_536):
+        return self.clausulas_satisfechas(tamano_trozo) == self.num_agentes
+
+    def clausulas_satisfechas(self, tamano_trozo=65_536):
+        return self.agregar(lambda t: clausulas_satisfechas(t["leyes"], t["variables"], t["signos"]).sum(axis=1),
+                            ["literales", "leyes"], tamano_trozo)
+
+    # Negociación: el tablero final no coincide con el del primer sondeo
+    def cambios(self, tamano_trozo=65_536):
+        def hubo_cambios(trozo):
+            ultima = np.maximum(trozo["rondas"].astype(np.int64) - 1, 0)
+            finales = trozo["tableros"][np.arange(len(ultima)), ultima]
+            return (finales != trozo["tableros"][:, 0]).any(axis=1)
+        return self.agregar(hubo_cambios, ["tableros", "rondas"], tamano_trozo).astype(bool)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumen de una grabación de trazas")
+    parser.add_argument("ruta")
+    args = parser.parse_args()
+
+    lector = LectorTrazas(args.ruta)
+    total = len(lector)
+    print(f"📼 {total} partidas de {lector.num_agentes} agentes y {lector.num_variables} leyes ({lector.variante})")
+    if total:
+        print(f"✅ Tasa de Éxito:         {lector.exitos().mean():.2%}")
+        print(f"📜 Cláusulas satisfechas: {lector.clausulas_satisfechas().mean():.3f}")
+        print(f"🤝 Tasa de Negociación:   {lector.cambios().mean():.2%}")